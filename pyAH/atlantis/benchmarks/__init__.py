@@ -0,0 +1,9 @@
+"""Benchmarks for :ref:`pyAH <pyAH-project>` performance sensitive code.
+
+Each module in this package is a standalone script run as::
+
+    python -m atlantis.benchmarks.<module>
+
+They are not unit tests and are not run by the test suite.
+
+"""
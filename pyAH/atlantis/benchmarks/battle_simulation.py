@@ -0,0 +1,46 @@
+"""Benchmark simulating battles.
+
+Simulates battles of growing sides, with special effects, in this
+process and spread across worker processes.
+
+"""
+
+from atlantis.gamedata.battlesim import BattleSimulator
+
+import time
+
+FIREBALL = {'damage': [{'minnum': 2, 'maxnum': 10, 'type': 'energy',
+                        'expandLevel': True}]}
+
+def _side(num, men, combat):
+    """Return a side of a unit of men and a mage behind."""
+    return [{'num': num, 'name': 'Soldiers',
+             'items': [{'abr': 'VIKI', 'amt': men},
+                       {'abr': 'SWOR', 'amt': men},
+                       {'abr': 'CARM', 'amt': men // 2}],
+             'skills': [{'name': 'combat', 'level': combat}]},
+            {'num': num + 1, 'name': 'Mage', 'behind': True,
+             'items': [{'abr': 'LEAD', 'amt': 1}], 'skills': []}]
+
+def run(runs=10000, sizes=(10, 100, 1000), processes=(1, None)):
+    """Run the benchmark and print results.
+    
+    :param runs: number of battles simulated.
+    :param sizes: list of number of men of the attacker side.
+    :param processes: list of number of worker processes measured.
+    
+    """
+    for men in sizes:
+        sim = BattleSimulator(_side(1, men, 2), _side(3, men * 3 // 2, 1),
+                              specials={2: (FIREBALL, 3)})
+        for n in processes:
+            start = time.perf_counter()
+            result = sim.simulate(runs, processes=n)
+            print('{:5} men, {:>4} processes: {:9.2f} ms, '
+                  'attacker wins {:.3f}'.format(
+                          men, n or 'all',
+                          (time.perf_counter() - start) * 1000,
+                          result.win_probability('attacker')))
+
+if __name__ == '__main__':
+    run()
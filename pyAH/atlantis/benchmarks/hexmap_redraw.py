@@ -0,0 +1,65 @@
+"""Benchmark :class:`~atlantis.wxgui.hexmap.HexMapWindow` redraws.
+
+Draws a big synthetic map with lots of towns, so label layout is a
+noticeable part of the redraw, and reports the mean redraw time with
+warm label layouts and with label layouts dropped before each redraw.
+Zoomed out redraws are measured both from the terrain overview and
+with full detail.
+
+"""
+
+import wx
+
+from atlantis.benchmarks.synthetic import make_map
+from atlantis.gamedata.theme import Theme
+from atlantis.wxgui.hexmap import HexMapWindow
+from atlantis.wxgui.hexmapdata import MapData
+from atlantis.helpers.hex_math import ZOOM_25, ZOOM_100
+
+import os.path
+import timeit
+
+_theme_folder = os.path.join(os.path.dirname(__file__), '..', '..',
+                             'themes', 'pyAH')
+
+def run(width=128, height=128, repeat=20):
+    """Run the benchmark and print results.
+    
+    :param width: map width in hexes.
+    :param height: map height in hexes.
+    :param repeat: number of redraws measured.
+    
+    """
+    app = wx.App(False)
+    frame = wx.Frame(None, size=(1024, 768))
+    window = HexMapWindow(frame)
+    frame.Show()
+    
+    m = make_map(width, height, towns=.5)
+    window.set_map_data(MapData.from_map_and_theme(
+            m, Theme.read_folder(_theme_folder)))
+    window.zoom_and_center(ZOOM_100)
+    
+    def cold():
+        window._label_layouts = dict()
+        window._redraw()
+    
+    warm = timeit.timeit(window._redraw, number=repeat) / repeat
+    cold = timeit.timeit(cold, number=repeat) / repeat
+    
+    window.zoom_and_center(ZOOM_25)
+    window._redraw()
+    overview = timeit.timeit(window._redraw, number=repeat) / repeat
+    window.set_overview_zoom(None)
+    detail = timeit.timeit(window._redraw, number=repeat) / repeat
+    
+    print('map {}x{} hexes'.format(width, height))
+    print('redraw, cached labels:   {:.2f} ms'.format(warm * 1000))
+    print('redraw, uncached labels: {:.2f} ms'.format(cold * 1000))
+    print('zoomed out, overview:    {:.2f} ms'.format(overview * 1000))
+    print('zoomed out, full detail: {:.2f} ms'.format(detail * 1000))
+    
+    frame.Destroy()
+
+if __name__ == '__main__':
+    run()
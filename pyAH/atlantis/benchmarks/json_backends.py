@@ -0,0 +1,72 @@
+"""Benchmark json backends of :mod:`atlantis.helpers.json`.
+
+Reads the ruleset and theme shipped with pyAH, and a big synthetic map,
+with each installed json backend, and reports mean save and load times.
+Map load times are also given for json parsing alone, without building
+the map objects.
+Rules and theme are read from their folders, as the game does, and
+written back with :func:`~atlantis.helpers.json.json_dumpb`. Maps are
+round-tripped through
+:meth:`~atlantis.helpers.json.JsonSerializable.json_dumpb` and
+:meth:`~atlantis.helpers.json.JsonSerializable.json_loadb`.
+
+"""
+
+from atlantis.benchmarks.synthetic import make_map
+from atlantis.gamedata.map import Map
+from atlantis.gamedata.rules import AtlantisRules
+from atlantis.gamedata.theme import Theme
+from atlantis.helpers.json import get_json_backends, set_json_backend, \
+    json_dumpb, json_loads
+
+import os.path
+import timeit
+
+_base_folder = os.path.join(os.path.dirname(__file__), '..', '..')
+_rules_folder = os.path.join(_base_folder, 'rulesets', 'havilah_1.0.0')
+_theme_folder = os.path.join(_base_folder, 'themes', 'pyAH')
+
+def _time(f, repeat):
+    """Return mean time of *f* calls in milliseconds."""
+    return timeit.timeit(f, 'gc.enable()', number=repeat) / repeat * 1000
+
+def run(width=128, height=128, repeat=5, small_repeat=200):
+    """Run the benchmark and print results.
+    
+    :param width: map width in hexes.
+    :param height: map height in hexes.
+    :param repeat: number of map saves and loads measured.
+    :param small_repeat: number of rules and theme saves and loads
+        measured.
+    
+    """
+    m = make_map(width, height)
+    rules = AtlantisRules.read_folder(_rules_folder)
+    theme = Theme.read_folder(_theme_folder)
+    
+    print('map {}x{} hexes'.format(width, height))
+    for name in get_json_backends():
+        set_json_backend(name)
+        data = m.json_dumpb()
+        print('{:6} rules: save {:6.3f} ms, load {:6.3f} ms'.format(
+                name,
+                _time(lambda: json_dumpb(rules.json_serialize()),
+                      small_repeat),
+                _time(lambda: AtlantisRules.read_folder(_rules_folder),
+                      small_repeat)))
+        print('{:6} theme: save {:6.3f} ms, load {:6.3f} ms'.format(
+                name,
+                _time(lambda: json_dumpb(theme.json_serialize()),
+                      small_repeat),
+                _time(lambda: Theme.read_folder(_theme_folder),
+                      small_repeat)))
+        print('{:6} map:   save {:7.2f} ms, load {:7.2f} ms '
+              '(parse {:7.2f} ms), {:.2f} MB'.format(
+                name, _time(m.json_dumpb, repeat),
+                _time(lambda: Map.json_loadb(data), repeat),
+                _time(lambda: json_loads(data), repeat),
+                len(data) / 2 ** 20))
+    set_json_backend()
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,99 @@
+"""Benchmark storing a turn history as a base map and deltas.
+
+Builds a 100 turn history from a synthetic map, changing every turn
+the economy of visited hexes and visiting some new ones, and compares
+storing every turn as a json map with storing the first turn and the
+json deltas of the following ones. Reports total sizes, and the time
+needed to get the last turn both ways.
+
+"""
+
+from atlantis.benchmarks.synthetic import make_map, make_region
+from atlantis.gamedata.delta import map_delta, apply_delta
+from atlantis.gamedata.map import Map, HEX_CURRENT, HEX_OLD
+from atlantis.gamedata.item import ItemMarket
+
+import copy
+import json
+import random
+import time
+
+def _next_turn(m, turn, rnd, visited=.3, new_hexes=20):
+    """Return the map of next turn.
+    
+    :param m: :class:`~atlantis.gamedata.map.Map` of current turn.
+    :param turn: next turn as a (*year*, *month*) tuple.
+    :param rnd: :class:`random.Random` instance.
+    :param visited: chance of a hex being visited again.
+    :param new_hexes: number of exits only hexes visited.
+    
+    :return: the new :class:`~atlantis.gamedata.map.Map`.
+    
+    """
+    m = copy.deepcopy(m)
+    level = m.levels['surface']
+    for mh in level:
+        if mh.status == HEX_CURRENT:
+            mh.status = HEX_OLD
+            mh.last_seen = turn
+    complete = [mh for mh in level if mh.is_complete()]
+    for mh in rnd.sample(complete, int(len(complete) * visited)):
+        r = mh.region
+        r.wealth = max(0, r.wealth + rnd.randint(-50, 50))
+        r.population = max(0, r.population + rnd.randint(-20, 20))
+        if hasattr(r, 'market'):
+            r.set_market('sell', [ItemMarket(it.abr, rnd.randint(1, 200),
+                                             it.price, names=it.names)
+                                  for it in r.market['sell']])
+        mh.status = HEX_CURRENT
+    incomplete = [mh for mh in level if not mh.is_complete()]
+    for mh in rnd.sample(incomplete, min(new_hexes, len(incomplete))):
+        x, y, z = mh.region.location
+        m.add_region_info(make_region(x, y, rnd))
+    return m
+
+def run(width=64, height=64, turns=100):
+    """Run the benchmark and print results.
+    
+    :param width: map width in hexes.
+    :param height: map height in hexes.
+    :param turns: number of turns in the history.
+    
+    """
+    rnd = random.Random(0)
+    m = make_map(width, height)
+    full = [json.dumps(m.json_serialize())]
+    deltas = []
+    delta_time = 0
+    for t in range(1, turns):
+        new = _next_turn(m, (t // 12 + 1, t % 12 + 1), rnd)
+        full.append(json.dumps(new.json_serialize()))
+        start = time.perf_counter()
+        deltas.append(json.dumps(map_delta(m, new)))
+        delta_time += time.perf_counter() - start
+        m = new
+    del m, new
+    
+    start = time.perf_counter()
+    last = Map.json_deserialize(json.loads(full[-1]))
+    full_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    rebuilt = Map.json_deserialize(json.loads(full[0]))
+    for delta in deltas:
+        apply_delta(rebuilt, json.loads(delta))
+    rebuild_time = time.perf_counter() - start
+    assert rebuilt == last
+    
+    print('map {}x{} hexes, {} turns'.format(width, height, turns))
+    print('full maps:     {:8.2f} MB'.format(
+            sum([len(s) for s in full]) / 2 ** 20))
+    print('base + deltas: {:8.2f} MB'.format(
+            (len(full[0]) + sum([len(s) for s in deltas])) / 2 ** 20))
+    print('computing deltas: {:8.2f} ms per turn'.format(
+            delta_time / (turns - 1) * 1000))
+    print('loading last turn:    {:8.2f} ms'.format(full_time * 1000))
+    print('rebuilding last turn: {:8.2f} ms'.format(rebuild_time * 1000))
+
+if __name__ == '__main__':
+    run()
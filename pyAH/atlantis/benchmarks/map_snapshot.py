@@ -0,0 +1,71 @@
+"""Benchmark saving and loading maps as json and as binary snapshots.
+
+Saves a big synthetic map with :mod:`atlantis.helpers.json` and with
+:mod:`atlantis.gamedata.snapshot`, and reports file sizes and mean save
+and load times of both formats. Garbage collection is kept enabled
+while timing, as it is when a game is actually loaded. Times needed to
+open the snapshot and read a single hex from it are reported too.
+
+"""
+
+from atlantis.benchmarks.synthetic import make_map
+from atlantis.gamedata.map import Map
+from atlantis.gamedata.snapshot import dump_map, load_map, open_map
+
+from io import BytesIO, StringIO
+
+import json
+import timeit
+
+def run(width=128, height=128, repeat=5):
+    """Run the benchmark and print results.
+    
+    :param width: map width in hexes.
+    :param height: map height in hexes.
+    :param repeat: number of saves and loads measured.
+    
+    """
+    m = make_map(width, height)
+    
+    def json_dump():
+        io = StringIO()
+        json.dump(m, io, default=Map.json_serialize)
+        return io
+    
+    def snapshot_dump():
+        io = BytesIO()
+        dump_map(io, m)
+        return io
+    
+    json_file = json_dump()
+    snapshot_file = snapshot_dump()
+    
+    def json_load():
+        json_file.seek(0)
+        Map.json_deserialize(json.load(json_file))
+    
+    def snapshot_load():
+        snapshot_file.seek(0)
+        load_map(snapshot_file)
+    
+    print('map {}x{} hexes'.format(width, height))
+    for name, f, dump, load in (
+            ('json', json_file, json_dump, json_load),
+            ('snapshot', snapshot_file, snapshot_dump, snapshot_load)):
+        print('{:9} size {:6.2f} MB, save {:7.2f} ms, load {:7.2f} ms'.format(
+                name, len(f.getvalue()) / 2 ** 20,
+                timeit.timeit(dump, 'gc.enable()', number=repeat) / repeat \
+                    * 1000,
+                timeit.timeit(load, 'gc.enable()', number=repeat) / repeat \
+                    * 1000))
+    
+    def snapshot_open():
+        snapshot_file.seek(0)
+        open_map(snapshot_file).get_region((width // 2, height // 2, None))
+    
+    print('snapshot  open and read a hex {:7.2f} ms'.format(
+            timeit.timeit(snapshot_open, 'gc.enable()', number=repeat) / \
+                repeat * 1000))
+
+if __name__ == '__main__':
+    run()
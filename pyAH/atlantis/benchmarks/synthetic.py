@@ -0,0 +1,99 @@
+"""Synthetic game data used by benchmarks.
+
+Benchmarks need big maps, bigger than any report at hand. This module
+builds random but plausible :class:`~atlantis.gamedata.map.Map` objects
+so every benchmark measures the same kind of data.
+
+"""
+
+from atlantis.gamedata.map import Map, HEX_CURRENT, HEX_EXITS
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.structure import Structure
+from atlantis.gamedata.item import ItemAmount, ItemMarket
+from atlantis.gamedata.rules import DIR_NORTH, DIR_NORTHEAST, DIR_SOUTHEAST, \
+    DIR_SOUTH, DIR_SOUTHWEST, DIR_NORTHWEST
+
+import random
+
+TERRAINS = ['ocean', 'plain', 'forest', 'mountain', 'swamp', 'jungle',
+            'desert', 'tundra']
+
+TOWNS = ['village', 'town', 'city']
+
+PRODUCTS = ['GRAI', 'LIVE', 'WOOD', 'STON', 'IRON', 'HORS', 'FUR', 'HERB']
+
+# Offsets to neighbour hexes, per direction
+_NEIGHBOURS = ((DIR_NORTH, 0, -2), (DIR_NORTHEAST, 1, -1),
+               (DIR_SOUTHEAST, 1, 1), (DIR_SOUTH, 0, 2),
+               (DIR_SOUTHWEST, -1, 1), (DIR_NORTHWEST, -1, -1))
+
+def make_region(x, y, rnd, towns=.2, level=None):
+    """Return a fully reported random :class:`Region`.
+    
+    :param x: X coordinate of the region.
+    :param y: Y coordinate of the region.
+    :param rnd: :class:`random.Random` instance.
+    :param towns: chance of the region having a town.
+    :param level: level name, *None* for surface.
+    
+    :return: a :class:`~atlantis.gamedata.region.Region` object.
+    
+    """
+    terrain = rnd.choice(TERRAINS)
+    town = None
+    if terrain != 'ocean' and rnd.random() < towns:
+        town = {'name': 'Town{}x{}'.format(x, y), 'type': rnd.choice(TOWNS)}
+    population = rnd.randint(100, 10000) if terrain != 'ocean' else 0
+    r = Region((x, y, level), terrain, 'Province{}'.format(x // 8),
+               population, 'vikings' if population else None,
+               population * 2, town)
+    r.append_report_description(
+            '{} ({},{}) in Province{}, {} peasants (vikings), ${}.'.format(
+                    terrain, x, y, x // 8, population, population * 2))
+    r.append_report_description('-' * 60)
+    r.set_weather('clear', 'clear')
+    if population:
+        r.set_wages(round(rnd.uniform(11, 16), 1), population)
+        r.set_market('sell', [ItemMarket(abr, rnd.randint(1, 200),
+                                         rnd.randint(20, 200), names=abr)
+                              for abr in rnd.sample(PRODUCTS, 3)])
+        r.set_market('buy', [ItemMarket(abr, rnd.randint(1, 200),
+                                        rnd.randint(20, 200), names=abr)
+                             for abr in rnd.sample(PRODUCTS, 2)])
+        r.set_entertainment(population // 20)
+        r.set_products([ItemAmount(abr, rnd.randint(1, 50), names=abr)
+                        for abr in rnd.sample(PRODUCTS, 2)])
+    for direction, dx, dy in _NEIGHBOURS:
+        r.set_exit(direction, (x + dx, y + dy, level))
+    if rnd.random() < .1:
+        s = Structure(1, 'Shelter', rnd.choice(['Fort', 'Tower', 'Mine']))
+        s.append_report_description('+ Shelter [1] : Fort.')
+        r.append_structure(s)
+    return r
+
+def make_map(width=64, height=64, towns=.2, visited=.7, seed=0):
+    """Return a random :class:`~atlantis.gamedata.map.Map`.
+    
+    Only surface level is created. Hexes not visited are added as
+    exits-only hexes, as they would be reported by a neighbour.
+    
+    :param width: level width in hexes.
+    :param height: level height in hexes.
+    :param towns: chance of a region having a town.
+    :param visited: chance of a region being completely reported.
+    :param seed: random seed, so maps can be rebuilt identically.
+    
+    :return: a :class:`~atlantis.gamedata.map.Map` object.
+    
+    """
+    rnd = random.Random(seed)
+    m = Map()
+    for x in range(width):
+        for y in range(x % 2, height, 2):
+            r = make_region(x, y, rnd, towns)
+            if rnd.random() < visited:
+                m.add_region_info(r, HEX_CURRENT)
+            else:
+                m.add_region_info(Region(r.location, r.terrain, r.name,
+                                         town=r.town), HEX_EXITS)
+    return m
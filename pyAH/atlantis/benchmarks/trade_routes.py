@@ -0,0 +1,41 @@
+"""Benchmark finding trade routes on a whole map.
+
+Finds the best trade routes of a synthetic map, from every region with
+a market, for several movement budgets, in this process and spread
+across worker processes.
+
+"""
+
+from atlantis.benchmarks.synthetic import make_map
+from atlantis.gamedata.trade import TradePlanner
+
+import time
+
+def run(width=128, height=128, capacity=500, top=10, processes=(1, None)):
+    """Run the benchmark and print results.
+    
+    :param width: map width in hexes.
+    :param height: map height in hexes.
+    :param capacity: carrying capacity of routes.
+    :param top: number of routes found.
+    :param processes: list of number of worker processes measured.
+    
+    """
+    m = make_map(width, height)
+    start = time.perf_counter()
+    planner = TradePlanner(m)
+    print('map {}x{} hexes, planner built in {:7.2f} ms'.format(
+            width, height, (time.perf_counter() - start) * 1000))
+    for moves in (2, 6, 12):
+        for n in processes:
+            start = time.perf_counter()
+            routes = planner.find_routes(capacity, moves, top=top,
+                                         processes=n)
+            print('{:2} moves, {:>4} processes: {:8.2f} ms, '
+                  'best profit {}'.format(
+                          moves, n or 'all',
+                          (time.perf_counter() - start) * 1000,
+                          routes[0].profit if routes else 0))
+
+if __name__ == '__main__':
+    run()
@@ -8,10 +8,8 @@ import os
 
 from atlantis.wxgui.hexmap import HexMapWindow
 from atlantis.wxgui.hexmap import EVT_HEX_SELECTED
-from atlantis.wxgui import hexmapdata
-
-from atlantis.gamedata.gamedata import GameData
-from atlantis.parsers.reportparser import ReportParser
+from atlantis.wxgui.maploader import MapLoader, STAGE_PARSE
+from atlantis.wxgui.maploader import EVT_LOAD_PROGRESS, EVT_LOAD_DONE
 
 from atlantis.gamedata.rules import AtlantisRules
 from atlantis.gamedata.theme import Theme
@@ -26,6 +24,32 @@ if __name__ == '__main__':
             self.mapwindow = HexMapWindow(self)
             
             self.Bind(EVT_HEX_SELECTED, self.OnSelectHex, source=self.mapwindow)
+            self.Bind(EVT_LOAD_PROGRESS, self.OnLoadProgress)
+            self.Bind(EVT_LOAD_DONE, self.OnLoadDone)
+            self.progress = None
+        
+        def load_report(self, file_name, rules, theme):
+            self.progress = wx.ProgressDialog('Loading', 'Reading report',
+                                              parent=self)
+            MapLoader(self, file_name, rules, theme).start()
+        
+        def OnLoadProgress(self, event):
+            if self.progress:
+                if event.stage == STAGE_PARSE:
+                    self.progress.Update(int(event.progress * 90),
+                                         'Reading report')
+                else:
+                    self.progress.Update(90 + int(event.progress * 10),
+                                         'Building map')
+        
+        def OnLoadDone(self, event):
+            if self.progress:
+                self.progress.Destroy()
+                self.progress = None
+            if event.error:
+                wx.MessageBox(str(event.error), 'Error loading report')
+            else:
+                self.mapwindow.set_map_data(event.map_data)
         
         def OnSelectHex(self, event):
             print(event.hexagon)
@@ -70,14 +94,6 @@ if __name__ == '__main__':
     if openFileDialog.ShowModal() == wx.ID_CANCEL:
         sys.exit()
     
-    gd = GameData(ar)
-    parser = ReportParser(gd)
-    
-    with open(openFileDialog.GetPath()) as f:
-        parser.parse(f)
-    
-    map_data = hexmapdata.MapData.from_map_and_theme(gd.map, th)
-    
-    frame.mapwindow.set_map_data(map_data)
+    frame.load_report(openFileDialog.GetPath(), ar, th)
     
     app.MainLoop()
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""Aggregates the maps of allied factions.
+
+An alliance pools the reports of all its factions every turn. The same
+hexes are reported many times: a hex visited by a faction can be just
+an exit for another one, and factions in the same hex report it with
+the same data. :class:`AllianceMap` keeps a single
+:class:`~atlantis.gamedata.map.Map` with the best data known of every
+hex, merging maps with :meth:`Map.merge
+<atlantis.gamedata.map.Map.merge>`.
+
+Reports can be parsed in parallel by :meth:`AllianceMap.read_reports`.
+Each report is parsed by a :class:`~atlantis.gamedata.gamedata.GameData`
+in a worker process, that sends its map back pickled, and maps are
+merged one at a time as they come back, so the whole set of parsed
+reports is never held in memory.
+
+Memory doesn't grow with the number of factions either: a region equal
+to the one already in the map, reported again by other faction or in a
+later turn, is replaced by the region in the map before merging, so a
+single :class:`~atlantis.gamedata.region.Region` object is kept. And
+names repeated all over the map, as terrain types, races or items, are
+interned, sharing a single string.
+
+Units are not compared with regions. So when regions reported the
+same turn are shared, units seen by any of the factions are added to
+the region kept. Regions of different turns are only shared if none
+of them has units, as units of an older turn are not current anymore.
+
+"""
+
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.map import Map, MergeStats, SEEN_CURRENT
+from atlantis.parsers.reportparser import ReportParser
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import collections
+import itertools
+import os
+import sys
+
+# Rules of worker processes, set by _init_worker
+_worker_rules = None
+
+def _init_worker(rules):
+    """Set the rules used by a worker process."""
+    global _worker_rules
+    _worker_rules = rules
+
+def _parse_report(file_name, rules, compact):
+    """Parse a report and return its :class:`Map`."""
+    game_data = GameData(rules)
+    with open(file_name) as f:
+        ReportParser(game_data).parse(f)
+    if compact:
+        game_data.map.compact_reports()
+    return game_data.map
+
+def _read_report(file_name, compact):
+    """Parse a report in a worker process and return its map."""
+    return _parse_report(file_name, _worker_rules, compact)
+
+def _unit_lists(region):
+    """Return the unit lists of a region and its structures."""
+    lists = [getattr(region, 'units', [])]
+    for s in getattr(region, 'structures', {}).values():
+        lists.append(s.units)
+    return lists
+
+def _merge_units(region, other):
+    """Add units of *other* missing in *region*, an equal region."""
+    nums = set([u.num for units in _unit_lists(region) for u in units])
+    for unit in getattr(other, 'units', ()):
+        if unit.num not in nums:
+            region.append_unit(unit)
+    for num, s in getattr(other, 'structures', {}).items():
+        for unit in s.units:
+            if unit.num not in nums:
+                region.structures[num].append_unit(unit)
+
+def _richness(region):
+    """Return how much is known about a region, to compare regions."""
+    return (sum(1 for k in region.__dict__ \
+                if not k.startswith('_') and k != 'units'),
+            len(getattr(region, 'structures', ())),
+            sum([len(units) for units in _unit_lists(region)]))
+
+def richest_hex(old, new):
+    """Conflict policy keeping the hex whose region has more data.
+    
+    Regions are compared by the number of their attributes, as some
+    of them are only known when the region is visited, then by the
+    number of their structures, and then by the number of units seen
+    in them. This is the default policy of
+    :class:`AllianceMap`, given to :meth:`Map.merge
+    <atlantis.gamedata.map.Map.merge>`.
+    
+    :param old: :class:`~atlantis.gamedata.map.MapHex` in the map.
+    :param new: :class:`~atlantis.gamedata.map.MapHex` being merged.
+    
+    :return: *new* if its region has more data than the *old* one,
+        *old* otherwise.
+    
+    """
+    if _richness(new.region) > _richness(old.region):
+        return new
+    return old
+
+def _intern_region(region):
+    """Intern names of a region, its town and its items."""
+    # Strings are equal, so the content hash doesn't change
+    d = region.__dict__
+    for key in ('terrain', 'name', 'racenames'):
+        if d.get(key):
+            d[key] = sys.intern(d[key])
+    town = d.get('town')
+    if town:
+        for key, value in town.items():
+            town[key] = sys.intern(value)
+    items = list(d.get('products', ()))
+    for market in d.get('market', {}).values():
+        items.extend(market)
+    for it in items:
+        for key in ('abr', 'name', 'names'):
+            value = getattr(it, key)
+            if value:
+                setattr(it, key, sys.intern(value))
+
+class AllianceMap():
+    """Map pooling the reports of several factions.
+    
+    :class:`AllianceMap` has the following public attributes:
+    
+    .. attribute:: map
+    
+       :class:`~atlantis.gamedata.map.Map` with all the hexes reported.
+    
+    .. attribute:: policy
+    
+       Conflict policy used when merging maps, as described at
+       :meth:`Map.merge <atlantis.gamedata.map.Map.merge>`.
+    
+    """
+    
+    def __init__(self, m=None, policy=richest_hex):
+        """Create an :class:`AllianceMap`.
+        
+        :param m: :class:`~atlantis.gamedata.map.Map` of previous turns,
+            updated in place. A new map is created if not given.
+        :param policy: conflict policy used when merging maps.
+        
+        """
+        self.map = m if m is not None else Map()
+        self.policy = policy
+    
+    def add_map(self, m, turn):
+        """Merge a faction map into the alliance map.
+        
+        Regions of *m* equal to those in the alliance map are replaced
+        by them, and their names interned, before merging. Units of
+        regions replaced are added to the region in the alliance map if
+        both were reported the same turn. So *m* is changed, and
+        shouldn't be used anymore.
+        
+        :param m: :class:`~atlantis.gamedata.map.Map` read from a
+            faction report.
+        :param turn: turn of the report, as a (*year*, *month*) tuple.
+        
+        :return: a :class:`~atlantis.gamedata.map.MergeStats` object.
+        
+        """
+        self._share(m, turn)
+        return self.map.merge(m, turn, self.policy)
+    
+    def add_game_data(self, game_data, turn):
+        """Merge the map of a parsed report into the alliance map.
+        
+        :param game_data: :class:`~atlantis.gamedata.gamedata.GameData`
+            with a parsed faction report.
+        :param turn: turn of the report, as a (*year*, *month*) tuple.
+        
+        :return: a :class:`~atlantis.gamedata.map.MergeStats` object.
+        
+        """
+        return self.add_map(game_data.map, turn)
+    
+    def read_reports(self, file_names, rules, turn, processes=None,
+                     compact=False):
+        """Parse reports of a turn and merge them into the alliance map.
+        
+        Reports are parsed in parallel by a pool of worker processes.
+        Maps are merged in the order of *file_names*, whatever the
+        order reports are parsed in, so the result doesn't depend on
+        the parsing speed of each report. At most two reports per
+        worker are parsed or waiting to be merged at any time.
+        
+        Current hexes are not made old: call :meth:`Map.age
+        <atlantis.gamedata.map.Map.age>` first if *turn* is a new turn.
+        
+        :param file_names: list of report file names.
+        :param rules: :class:`~atlantis.gamedata.rules.AtlantisRules`
+            object used to parse the reports.
+        :param turn: turn of the reports, as a (*year*, *month*) tuple.
+        :param processes: number of worker processes. If *None* the
+            number of processors is used, and if 1 reports are parsed in
+            this process, without a pool.
+        :param compact: if *True* report lines of every region are
+            compacted, see
+            :class:`~atlantis.gamedata.description.ReportDescription`.
+        
+        :return: a :class:`~atlantis.gamedata.map.MergeStats` object,
+            with the sum of all the merges.
+        
+        """
+        stats = MergeStats()
+        if processes == 1:
+            for file_name in file_names:
+                stats += self.add_map(
+                        _parse_report(file_name, rules, compact), turn)
+            return stats
+        window = 2 * (processes or os.cpu_count() or 1)
+        file_names = iter(file_names)
+        pending = collections.deque()
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(rules,)) as executor:
+            while True:
+                for file_name in itertools.islice(file_names,
+                                                  window - len(pending)):
+                    pending.append(executor.submit(_read_report, file_name,
+                                                   compact))
+                if not pending:
+                    break
+                # Maps parsed out of order wait for the older ones
+                wait([f for f in pending if not f.done()],
+                     return_when=FIRST_COMPLETED)
+                while pending and pending[0].done():
+                    stats += self.add_map(pending.popleft().result(), turn)
+        return stats
+    
+    def _share(self, m, turn):
+        """Make *m* use regions and strings already in the map."""
+        turn = tuple(turn) if turn else None
+        levels = self.map.levels
+        for name, level in m.levels.items():
+            try:
+                hexes = levels[name].hexes
+            except KeyError:
+                hexes = dict()
+            for location, mh in level.hexes.items():
+                region = mh.region
+                old = hexes.get(location)
+                if old is None or old.region is region or \
+                        old.region != region:
+                    _intern_region(region)
+                    continue
+                last_seen = mh.last_seen
+                if turn and last_seen == SEEN_CURRENT:
+                    last_seen = turn
+                if (old.status, tuple(old.last_seen)) == \
+                        (mh.status, tuple(last_seen)):
+                    _merge_units(old.region, region)
+                    mh.region = old.region
+                elif not any(_unit_lists(old.region)) and \
+                        not any(_unit_lists(region)):
+                    mh.region = old.region
+                else:
+                    _intern_region(region)
@@ -0,0 +1,392 @@
+"""Keeps the battles reported by factions.
+
+A battle is reported as a long list of lines: both sides and their
+units, every round with its special effects and losses, and the final
+casualties and spoils. :class:`Battle` keeps all of it as plain tuples
+and dictionaries, filled by
+:class:`~atlantis.gamedata.gamedata.GameData` as
+:meth:`ReportConsumer.battle
+<atlantis.parsers.reportparser.ReportConsumer.battle>` events arrive.
+
+:class:`BattleStore` keeps the battles of many turns, indexed by
+location, faction and turn, so old battles can be looked for without
+parsing old reports again. Losses of every faction are added up per
+turn as battles are stored, so losses of a faction over many turns are
+a sum of a few numbers.
+
+Both classes implement :class:`~atlantis.helpers.json.JsonSerializable`
+interface.
+
+This module also defines the following public attributes:
+
+.. attribute:: SIDE_ATTACKER
+
+   Attacker side of a battle.
+
+.. attribute:: SIDE_DEFENDER
+
+   Defender side of a battle.
+
+"""
+
+from atlantis.helpers.json import JsonSerializable
+
+SIDE_ATTACKER = 'attacker'
+SIDE_DEFENDER = 'defender'
+
+_SIDES = (SIDE_ATTACKER, SIDE_DEFENDER)
+
+class Battle(JsonSerializable):
+    """Holds all data of a battle.
+    
+    Units are given as dictionaries with *num* and *name*, as reported.
+    Items are (*abr*, *amt*) tuples.
+    
+    :class:`Battle` has the following public attributes:
+    
+    .. attribute:: attacker
+    
+       Unit starting the battle, or *None* if unknown, as in
+       assassinations.
+    
+    .. attribute:: target
+    
+       Unit attacked.
+    
+    .. attribute:: location
+    
+       Location of the battle region, as a three elements tuple.
+    
+    .. attribute:: assassination
+    
+       *True* if the battle is an assassination attempt.
+    
+    .. attribute:: turn
+    
+       Turn of the battle as a (*year*, *month*) tuple, or *None* if
+       unknown. Set when the battle is added to a :class:`BattleStore`.
+    
+    .. attribute:: sides
+    
+       Dictionary with the list of units of every side, keyed by
+       ``attacker`` and ``defender``. Units are dictionaries with the
+       parameters of :meth:`ReportConsumer.battle_side_unit
+       <atlantis.parsers.reportparser.ReportConsumer.battle_side_unit>`.
+    
+    .. attribute:: rounds
+    
+       List of rounds, as (*num*, *attacker losses*, *defender losses*)
+       tuples, being *num* ``free`` for free rounds.
+    
+    .. attribute:: specials
+    
+       List of special effects, as (*round*, *unit num*, *description*,
+       *targets*, *target description*, *deflected*) tuples, being
+       *round* the index of the round in :attr:`rounds`. Shields cast
+       are kept as specials with no targets. Monsters regenerating or
+       taking damage are not kept.
+    
+    .. attribute:: result
+    
+       ``destroyed``, ``routed`` or ``tie``, or *None* if unknown.
+    
+    .. attribute:: loser
+    
+       Side losing the battle, or *None* if it ended in a tie.
+    
+    .. attribute:: losses
+    
+       Dictionary with the casualties of every side after healing.
+    
+    .. attribute:: healed
+    
+       Dictionary with the casualties healed of every side.
+    
+    .. attribute:: damaged
+    
+       Dictionary with the list of numbers of the units damaged of
+       every side.
+    
+    .. attribute:: spoils
+    
+       List of items taken by the winner side.
+    
+    .. attribute:: raised
+    
+       List of undead items raised after the battle.
+    
+    """
+    
+    def __init__(self, attacker, target, location, assassination=False):
+        """Create a new :class:`Battle`.
+        
+        :param attacker: unit starting the battle, as a dictionary with
+            *num* and *name*, or *None* if unknown.
+        :param target: unit attacked, as a dictionary with *num* and
+            *name*.
+        :param location: location of the battle, as a three elements
+            tuple.
+        :param assassination: *True* if the battle is an assassination
+            attempt.
+        
+        """
+        self.attacker = attacker
+        self.target = target
+        self.location = tuple(location)
+        self.assassination = assassination
+        self.turn = None
+        self.sides = {SIDE_ATTACKER: [], SIDE_DEFENDER: []}
+        self.rounds = []
+        self.specials = []
+        self.result = None
+        self.loser = None
+        self.losses = {SIDE_ATTACKER: 0, SIDE_DEFENDER: 0}
+        self.healed = {SIDE_ATTACKER: 0, SIDE_DEFENDER: 0}
+        self.damaged = {SIDE_ATTACKER: [], SIDE_DEFENDER: []}
+        self.spoils = []
+        self.raised = []
+    
+    def get_side(self, unit):
+        """Return the side of a unit.
+        
+        :param unit: dictionary with the *num* of the unit.
+        
+        :return: ``attacker`` or ``defender``, or *None* if the unit is
+            not in the battle.
+        
+        """
+        num = unit['num']
+        for side in _SIDES:
+            for u in self.sides[side]:
+                if u['num'] == num:
+                    return side
+        if self.attacker and self.attacker['num'] == num:
+            return SIDE_ATTACKER
+        if self.target and self.target['num'] == num:
+            return SIDE_DEFENDER
+        return None
+    
+    def get_factions(self, side):
+        """Return the factions of the units in a side.
+        
+        :param side: ``attacker`` or ``defender``.
+        
+        :return: set of faction numbers. Units whose faction is not
+            reported are not counted.
+        
+        """
+        return set([u['faction']['num'] for u in self.sides[side] \
+                    if u.get('faction')])
+    
+    def get_winner(self):
+        """Return the side winning the battle.
+        
+        :return: ``attacker`` or ``defender``, or *None* if the battle
+            ended in a tie or its result is unknown.
+        
+        """
+        if self.loser == SIDE_ATTACKER:
+            return SIDE_DEFENDER
+        if self.loser == SIDE_DEFENDER:
+            return SIDE_ATTACKER
+        return None
+    
+    # JsonSerializable methods
+    def json_serialize(self):
+        """Return a serializable version of :class:`Battle`.
+        
+        :return: a *dict* representing the :class:`Battle` object.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        return {'attacker': self.attacker, 'target': self.target,
+                'location': self.location,
+                'assassination': self.assassination, 'turn': self.turn,
+                'sides': self.sides, 'rounds': self.rounds,
+                'specials': self.specials, 'result': self.result,
+                'loser': self.loser, 'losses': self.losses,
+                'healed': self.healed, 'damaged': self.damaged,
+                'spoils': self.spoils, 'raised': self.raised}
+    
+    @staticmethod
+    def json_deserialize(json_object):
+        """Load :class:`Battle` from a deserialized json object.
+        
+        :param json_object: object returned by :func:`json.load`.
+        
+        :return: the :class:`Battle` object from json data.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        b = Battle(json_object['attacker'], json_object['target'],
+                   json_object['location'], json_object['assassination'])
+        if json_object['turn']:
+            b.turn = tuple(json_object['turn'])
+        b.sides = json_object['sides']
+        b.rounds = [tuple(r) for r in json_object['rounds']]
+        b.specials = [tuple(s) for s in json_object['specials']]
+        b.result = json_object['result']
+        b.loser = json_object['loser']
+        b.losses = json_object['losses']
+        b.healed = json_object['healed']
+        b.damaged = json_object['damaged']
+        b.spoils = [tuple(it) for it in json_object['spoils']]
+        b.raised = [tuple(it) for it in json_object['raised']]
+        return b
+
+class BattleStore(JsonSerializable):
+    """Battles of many turns.
+    
+    :class:`BattleStore` has the following public attributes:
+    
+    .. attribute:: battles
+    
+       List of :class:`Battle` objects, in the order they were added.
+    
+    """
+    
+    def __init__(self):
+        """Create an empty :class:`BattleStore`."""
+        self.battles = []
+        # Indexes of battles in self.battles
+        self._locations = dict()
+        self._factions = dict()
+        self._turns = dict()
+        # Faction losses, keyed by faction and turn
+        self._losses = dict()
+    
+    def add(self, battle, turn=None):
+        """Add a battle to the store.
+        
+        :param battle: :class:`Battle` object.
+        :param turn: turn of the battle, as a (*year*, *month*) tuple.
+            If not given, the turn of *battle* is kept.
+        
+        """
+        if turn is not None:
+            battle.turn = tuple(turn)
+        i = len(self.battles)
+        self.battles.append(battle)
+        self._locations.setdefault(battle.location, []).append(i)
+        self._turns.setdefault(battle.turn, []).append(i)
+        factions = set()
+        for side in _SIDES:
+            for faction in battle.get_factions(side):
+                losses = self._losses.setdefault(faction, dict())
+                losses[battle.turn] = losses.get(battle.turn, 0) + \
+                    battle.losses[side]
+                factions.add(faction)
+        for faction in factions:
+            self._factions.setdefault(faction, []).append(i)
+    
+    def add_game_data(self, game_data, turn):
+        """Add the battles of a parsed report to the store.
+        
+        :param game_data: :class:`~atlantis.gamedata.gamedata.GameData`
+            with a parsed faction report.
+        :param turn: turn of the report, as a (*year*, *month*) tuple.
+        
+        """
+        for battle in game_data.battles:
+            self.add(battle, turn)
+    
+    def find(self, location=None, faction=None, first=None, last=None):
+        """Find battles.
+        
+        :param location: if given, only battles in this location are
+            returned.
+        :param faction: if given, only battles with units of this
+            faction are returned.
+        :param first: if given, only battles of this turn or later are
+            returned.
+        :param last: if given, only battles of this turn or before are
+            returned.
+        
+        :return: list of :class:`Battle` objects, in the order they
+            were added.
+        
+        """
+        candidates = []
+        if location is not None:
+            candidates.append(self._locations.get(tuple(location), []))
+        if faction is not None:
+            candidates.append(self._factions.get(faction, []))
+        if first is not None or last is not None:
+            candidates.append(sorted(
+                    [i for turn, indexes in self._turns.items() \
+                     if turn is not None and \
+                         (first is None or turn >= tuple(first)) and \
+                         (last is None or turn <= tuple(last)) \
+                     for i in indexes]))
+        if not candidates:
+            return list(self.battles)
+        candidates.sort(key=len)
+        others = [set(c) for c in candidates[1:]]
+        return [self.battles[i] for i in candidates[0] \
+                if all([i in c for c in others])]
+    
+    def get_losses(self, faction, first=None, last=None):
+        """Return the losses of the sides a faction fought in.
+        
+        Units of a side are not told apart in battle casualties, so
+        every faction of a side is given all the losses of its side.
+        
+        :param faction: faction number.
+        :param first: if given, only battles of this turn or later are
+            counted.
+        :param last: if given, only battles of this turn or before are
+            counted.
+        
+        :return: total losses.
+        
+        """
+        losses = self._losses.get(faction, {})
+        if first is None and last is None:
+            return sum(losses.values())
+        return sum([n for turn, n in losses.items() \
+                    if turn is not None and \
+                        (first is None or turn >= tuple(first)) and \
+                        (last is None or turn <= tuple(last))])
+    
+    def get_losses_by_turn(self, faction):
+        """Return the losses of the sides a faction fought in per turn.
+        
+        :param faction: faction number.
+        
+        :return: dictionary with the losses keyed by turn.
+        
+        """
+        return dict(self._losses.get(faction, {}))
+    
+    # JsonSerializable methods
+    def json_serialize(self):
+        """Return a serializable version of :class:`BattleStore`.
+        
+        :return: a *list* with the serialized battles.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        return [b.json_serialize() for b in self.battles]
+    
+    @staticmethod
+    def json_deserialize(json_object):
+        """Load :class:`BattleStore` from a deserialized json object.
+        
+        :param json_object: object returned by :func:`json.load`.
+        
+        :return: the :class:`BattleStore` object from json data.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        store = BattleStore()
+        for b in json_object:
+            store.add(Battle.json_deserialize(b))
+        return store
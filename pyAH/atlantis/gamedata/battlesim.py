@@ -0,0 +1,479 @@
+"""Simulates battles to estimate their outcome.
+
+:class:`BattleSimulator` takes two sides described as
+:meth:`ReportConsumer.battle_side_unit
+<atlantis.parsers.reportparser.ReportConsumer.battle_side_unit>`
+parameters, as kept in :attr:`Battle.sides
+<atlantis.gamedata.battle.Battle.sides>`, and fights them many times
+with random rolls, so the chance of winning and the expected losses of
+each side are known before attacking.
+
+Battles follow Atlantis rules in a simplified way:
+
+- The side with better tactics gets a free round of attacks.
+- Every round each soldier attacks a random enemy, the front line
+  being attacked before those behind. Soldiers behind can only attack
+  with ranged weapons. An attack hits with odds of 2 to the power of
+  the attack minus the defense, and armor may save the target.
+- Special effects, given as parsed from item and skill descriptions,
+  are cast at the start of every round and hit random enemies at the
+  level of their caster, unless a shield of their type is up in the
+  other side. Their defense bonuses are added to the soldiers of the
+  caster unit.
+- Defenders in a structure get its defense bonus, up to the number of
+  soldiers it protects.
+- A side losing half of its soldiers is routed, and the winner gets a
+  free round of attacks. If both are routed at once the battle is a
+  tie. Healing is not simulated.
+
+Items are not defined by :class:`~atlantis.gamedata.rules.AtlantisRules`,
+so weapons, armor and mounts are told by an *equipment* table,
+:data:`EQUIPMENT` by default. Items with *monster* stats are monsters,
+and any other item is a man.
+
+Soldier state lives in numpy_ arrays with a row per simulation, so a
+batch of simulations is run at once. Batches can be spread across a
+pool of worker processes, each batch with its own seed spawned from a
+single one, so results don't depend on the number of processes.
+
+numpy_ is an optional dependency of pyAH, only needed by this module
+and :mod:`atlantis.gamedata.economy`.
+
+This module also defines the following public attributes:
+
+.. attribute:: EQUIPMENT
+
+   Default equipment table, for standard Atlantis items. It's a
+   dictionary keyed by item abbreviature, with dictionaries whose keys
+   are *attack* and *defense* bonuses, number of *attacks* and *ranged*
+   flag for weapons, and *armor*, the chance of saving a hit, for
+   armor. Mounts have empty dictionaries.
+
+.. _numpy: https://numpy.org
+"""
+
+from atlantis.gamedata.battle import SIDE_ATTACKER, SIDE_DEFENDER
+
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EQUIPMENT = {
+    # Weapons
+    'SWOR': {'attack': 2, 'defense': 2},
+    'PIKE': {'attack': 2, 'defense': 2},
+    'BAXE': {'attack': 4},
+    'MSWO': {'attack': 4, 'defense': 4},
+    'MAXE': {'attack': 6},
+    'ASWO': {'attack': 6, 'defense': 6},
+    'LANC': {'attack': 2, 'defense': 2},
+    'SPEA': {'attack': 1, 'defense': 1},
+    'JAVE': {'attack': 1, 'ranged': True},
+    'LBOW': {'attack': 1, 'ranged': True},
+    'XBOW': {'attack': 3, 'ranged': True},
+    'DBOW': {'attack': 2, 'ranged': True},
+    'MXBO': {'attack': 5, 'ranged': True},
+    # Armor
+    'CLAR': {'armor': 1 / 4},
+    'LARM': {'armor': 1 / 4},
+    'CARM': {'armor': 1 / 3},
+    'PARM': {'armor': 2 / 3},
+    'MARM': {'armor': 9 / 10},
+    'AARM': {'armor': 95 / 100},
+    'CLOA': {'armor': 1 / 10},
+    # Mounts
+    'HORS': {}, 'WHOR': {}, 'CAME': {}, 'WING': {}, 'ROCS': {},
+    'GRYF': {}, 'DRAG': {}}
+
+# Outcome codes
+_ATTACKER_WINS, _DEFENDER_WINS, _TIE = range(3)
+
+def _batch(simulator, seed, size):
+    """Run a batch of simulations."""
+    return simulator._run(numpy.random.default_rng(seed), size)
+
+# Simulator of worker processes, set by _init_worker
+_worker_simulator = None
+
+def _init_worker(simulator):
+    """Set the simulator used by a worker process."""
+    global _worker_simulator
+    _worker_simulator = simulator
+
+def _worker_batch(seed, size):
+    """Run a batch of simulations in a worker process."""
+    return _batch(_worker_simulator, seed, size)
+
+class _Side():
+    """Soldiers of a battle side, as arrays."""
+    
+    def __init__(self, units, equipment, structure=None, specials=None):
+        """Build the soldier arrays of a side."""
+        soldiers = []
+        self.tactics = 0
+        self.unit_nums = []
+        for ui, unit in enumerate(units):
+            self.unit_nums.append(unit['num'])
+            levels = dict([(sk['name'].lower(), sk['level']) \
+                           for sk in unit.get('skills') or ()])
+            self.tactics = max(self.tactics, levels.get('tactics', 0))
+            combat = levels.get('combat', 0)
+            behind = bool(unit.get('behind'))
+            men = 0
+            weapons = []
+            armors = []
+            for it in unit.get('items') or ():
+                amt = it.get('amt', 1)
+                monster = it.get('monster')
+                if monster:
+                    self.tactics = max(self.tactics, monster['tactics'])
+                    soldiers.extend([(monster['attackLevel'],
+                                      monster['defense'],
+                                      0 if behind else monster['numAttacks'],
+                                      monster['hits'], 0, behind, ui)] * amt)
+                elif it['abr'] in equipment:
+                    eq = equipment[it['abr']]
+                    if 'armor' in eq:
+                        armors.extend([eq['armor']] * amt)
+                    elif eq:
+                        weapons.extend([eq] * amt)
+                else:
+                    men += amt
+            weapons.sort(key=lambda w: -w.get('attack', 0))
+            armors.sort(reverse=True)
+            for i in range(men):
+                w = weapons[i] if i < len(weapons) else {}
+                attacks = w.get('attacks', 1) \
+                    if not behind or w.get('ranged') else 0
+                soldiers.append((combat + w.get('attack', 0),
+                                 combat + w.get('defense', 0), attacks, 1,
+                                 armors[i] if i < len(armors) else 0,
+                                 behind, ui))
+        
+        n = len(soldiers)
+        columns = list(zip(*soldiers)) if soldiers else [()] * 7
+        self.attack = numpy.array(columns[0], dtype=numpy.int8)
+        self.defense = numpy.array(columns[1], dtype=numpy.int8)
+        self.attacks = numpy.array(columns[2], dtype=numpy.int8)
+        self.hits = numpy.array(columns[3], dtype=numpy.int16)
+        self.armor = numpy.array(columns[4], dtype=numpy.float32)
+        self.behind = numpy.array(columns[5], dtype=bool)
+        self.unit = numpy.array(columns[6], dtype=numpy.int16)
+        # Attacker soldier of every attack slot
+        self.slots = numpy.repeat(numpy.arange(n), self.attacks)
+        
+        # Defense against special effects, per type
+        self.special_defense = dict()
+        protected = numpy.zeros(n, dtype=bool)
+        if structure is not None and structure.protect:
+            protected[:structure.protect] = True
+            for kind, bonus in (structure.defense or {}).items():
+                if kind == 'melee':
+                    self.defense[protected] += bonus
+                else:
+                    self.special_defense[kind] = \
+                        numpy.where(protected, bonus, 0).astype(numpy.int8)
+        
+        # Casters, as (unit index, level, damage list), and shields
+        self.casters = []
+        self.shields = []
+        for num, (special, level) in (specials or {}).items():
+            if num not in self.unit_nums:
+                continue
+            ui = self.unit_nums.index(num)
+            if special.get('damage'):
+                self.casters.append((ui, level, special['damage']))
+            for sh in special.get('shield', ()):
+                self.shields.append((ui, sh['type']))
+            for d in special.get('defs', ()):
+                bonus = d['val'] * (level if d.get('expandLevel') else 1)
+                if d['type'] == 'melee':
+                    self.defense[self.unit == ui] += bonus
+                else:
+                    defense = self.special_defense.setdefault(
+                            d['type'], numpy.zeros(n, dtype=numpy.int8))
+                    defense[self.unit == ui] += bonus
+    
+    def __len__(self):
+        """Return the number of soldiers."""
+        return len(self.attack)
+
+def _targets(rng, valid, slots):
+    """Pick a random valid target for every slot of every simulation.
+    
+    Return the targets and the mask of slots with a target.
+    """
+    count = valid.sum(axis=1)
+    order = numpy.argsort(~valid, axis=1, kind='stable')
+    pick = (rng.random((len(valid), slots)) * count[:, numpy.newaxis])
+    pick = numpy.minimum(pick.astype(numpy.intp),
+                         numpy.maximum(count - 1, 0)[:, numpy.newaxis])
+    return numpy.take_along_axis(order, pick, axis=1), \
+        (count > 0)[:, numpy.newaxis]
+
+def _hit_counts(hit, target, size, n):
+    """Return the number of hits taken by every soldier."""
+    flat = (numpy.arange(size)[:, numpy.newaxis] * n + target)[hit]
+    return numpy.bincount(flat, minlength=size * n).reshape(size, n)
+
+class SimulationResult():
+    """Outcomes of many simulated battles.
+    
+    :class:`SimulationResult` has the following public attributes:
+    
+    .. attribute:: losses
+    
+       Dictionary with a numpy array of the losses of every battle,
+       keyed by side.
+    
+    .. attribute:: rounds
+    
+       Numpy array with the number of rounds of every battle, free
+       rounds included.
+    
+    """
+    
+    def __init__(self, outcomes, losses, rounds):
+        """Create a :class:`SimulationResult`.
+        
+        :param outcomes: numpy array with the outcome of every battle.
+        :param losses: numpy array with a row per battle, and the losses
+            of attacker and defender.
+        :param rounds: numpy array with the rounds of every battle.
+        
+        """
+        self._outcomes = outcomes
+        self.losses = {SIDE_ATTACKER: losses[:, 0],
+                       SIDE_DEFENDER: losses[:, 1]}
+        self.rounds = rounds
+    
+    def __len__(self):
+        """Return the number of battles."""
+        return len(self._outcomes)
+    
+    def win_probability(self, side):
+        """Return the chance of a side winning.
+        
+        :param side: ``attacker`` or ``defender``.
+        
+        :return: fraction of the battles won by *side*.
+        
+        """
+        outcome = _ATTACKER_WINS if side == SIDE_ATTACKER else _DEFENDER_WINS
+        return float((self._outcomes == outcome).mean())
+    
+    def tie_probability(self):
+        """Return the chance of a tie.
+        
+        :return: fraction of the battles ending in a tie.
+        
+        """
+        return float((self._outcomes == _TIE).mean())
+    
+    def mean_losses(self, side):
+        """Return the mean losses of a side.
+        
+        :param side: ``attacker`` or ``defender``.
+        
+        :return: mean number of soldiers lost by *side*.
+        
+        """
+        return float(self.losses[side].mean())
+
+class BattleSimulator():
+    """Monte Carlo simulator of a battle between two sides."""
+    
+    def __init__(self, attackers, defenders, structure=None, specials=None,
+                 equipment=None, max_rounds=100):
+        """Create a :class:`BattleSimulator`.
+        
+        :param attackers: list of units of the attacker side, as
+            dictionaries with :meth:`ReportConsumer.battle_side_unit
+            <atlantis.parsers.reportparser.ReportConsumer.battle_side_unit>`
+            parameters.
+        :param defenders: list of units of the defender side.
+        :param structure: :class:`~atlantis.gamedata.rules.StructureType`
+            defenders are in, if any.
+        :param specials: dictionary with the special effects of units,
+            keyed by unit number, as (*special*, *level*) tuples.
+            *special* is a dictionary as parsed from item and skill
+            descriptions, with *damage*, *defs* and *shield* lists, and
+            *level* the level the effect is cast at.
+        :param equipment: equipment table, as :data:`EQUIPMENT`, which
+            is used if not given.
+        :param max_rounds: rounds fought before calling a tie.
+        
+        :raise: :class:`ImportError` if numpy is not installed.
+        
+        """
+        if numpy is None:
+            raise ImportError('numpy is needed by BattleSimulator')
+        if equipment is None:
+            equipment = EQUIPMENT
+        self._sides = (_Side(attackers, equipment, None, specials),
+                       _Side(defenders, equipment, structure, specials))
+        self.max_rounds = max_rounds
+    
+    @staticmethod
+    def from_battle(battle, **kwargs):
+        """Create a :class:`BattleSimulator` replaying a battle.
+        
+        :param battle: :class:`~atlantis.gamedata.battle.Battle` object.
+        :param kwargs: other arguments of :class:`BattleSimulator`.
+        
+        :return: the new :class:`BattleSimulator`.
+        
+        """
+        return BattleSimulator(battle.sides[SIDE_ATTACKER],
+                               battle.sides[SIDE_DEFENDER], **kwargs)
+    
+    def get_soldiers(self, side):
+        """Return the number of soldiers of a side.
+        
+        :param side: ``attacker`` or ``defender``.
+        
+        :return: number of men and monsters of *side*.
+        
+        """
+        return len(self._sides[0 if side == SIDE_ATTACKER else 1])
+    
+    def simulate(self, runs, seed=0, processes=1, batch=1000):
+        """Simulate the battle many times.
+        
+        Runs are split in batches, each of them with its own seed
+        spawned from *seed*, so the same *seed* and *batch* give the
+        same results whatever the number of processes.
+        
+        :param runs: number of battles simulated.
+        :param seed: random seed.
+        :param processes: number of worker processes batches are spread
+            across. If 1 batches are run in this process, without a
+            pool, and if *None* the number of processors is used.
+        :param batch: number of battles simulated at once.
+        
+        :return: a :class:`SimulationResult` object.
+        
+        """
+        sizes = [batch] * (runs // batch)
+        if runs % batch:
+            sizes.append(runs % batch)
+        seeds = numpy.random.SeedSequence(seed).spawn(len(sizes))
+        if processes == 1:
+            results = [_batch(self, s, size) for s, size in zip(seeds, sizes)]
+        else:
+            with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                     initargs=(self,)) as executor:
+                results = list(executor.map(_worker_batch, seeds, sizes))
+        if not results:
+            results = [(numpy.zeros(0, dtype=numpy.int8),
+                        numpy.zeros((0, 2), dtype=numpy.int32),
+                        numpy.zeros(0, dtype=numpy.int16))]
+        return SimulationResult(*[numpy.concatenate(r) \
+                                  for r in zip(*results)])
+    
+    def _run(self, rng, size):
+        """Run a batch of battles."""
+        sides = self._sides
+        hp = [numpy.broadcast_to(s.hits, (size, len(s))).copy() \
+              for s in sides]
+        outcomes = numpy.full(size, _TIE, dtype=numpy.int8)
+        rounds = numpy.zeros(size, dtype=numpy.int16)
+        done = numpy.zeros(size, dtype=bool)
+        
+        if sides[0].tactics != sides[1].tactics:
+            free = 0 if sides[0].tactics > sides[1].tactics else 1
+            active = [~done, ~done]
+            active[1 - free] = done
+            self._round(rng, hp, active)
+            rounds += 1
+        
+        for i in range(self.max_rounds):
+            if done.all():
+                break
+            self._round(rng, hp, [~done, ~done])
+            rounds[~done] += 1
+            broken = [(h <= 0).sum(axis=1) * 2 >= max(len(s), 1) \
+                      for h, s in zip(hp, sides)]
+            routed = ~done & (broken[0] | broken[1])
+            for loser, winner_outcome in ((0, _DEFENDER_WINS),
+                                          (1, _ATTACKER_WINS)):
+                lost = routed & broken[loser] & ~broken[1 - loser]
+                if lost.any():
+                    outcomes[lost] = winner_outcome
+                    active = [done, done]
+                    active[1 - loser] = lost
+                    self._round(rng, hp, active)
+                    rounds[lost] += 1
+            done |= routed
+        
+        losses = numpy.stack([(h <= 0).sum(axis=1) for h in hp],
+                             axis=1).astype(numpy.int32)
+        return outcomes, losses, rounds
+    
+    def _round(self, rng, hp, active):
+        """Fight a round, every side attacking if active.
+        
+        Special effects of both sides are cast first, and then soldiers
+        left alive attack.
+        
+        """
+        for attack in (self._cast, self._strike):
+            alive = [h > 0 for h in hp]
+            damage = [attack(rng, src, alive, active[src]) for src in (1, 0)]
+            for h, d in zip(hp, damage):
+                h -= d
+    
+    def _strike(self, rng, src, alive, active):
+        """Return the hits of the normal attacks of a side."""
+        s, d = self._sides[src], self._sides[1 - src]
+        size = len(active)
+        if not len(s.slots) or not len(d):
+            return numpy.zeros((size, len(d)), dtype=numpy.int16)
+        front = alive[1 - src] & ~d.behind
+        valid = numpy.where(front.any(axis=1)[:, numpy.newaxis], front,
+                            alive[1 - src])
+        target, has_target = _targets(rng, valid, len(s.slots))
+        hit = alive[src][:, s.slots] & active[:, numpy.newaxis] & has_target
+        odds = numpy.exp2(s.attack[s.slots].astype(numpy.float32) - \
+                          d.defense[target])
+        hit &= rng.random(target.shape, dtype=numpy.float32) < \
+            odds / (1 + odds)
+        hit &= rng.random(target.shape, dtype=numpy.float32) >= \
+            d.armor[target]
+        return _hit_counts(hit, target, size, len(d)).astype(numpy.int16)
+    
+    def _cast(self, rng, src, alive, active):
+        """Return the hits of the special effects of a side."""
+        s, d = self._sides[src], self._sides[1 - src]
+        size = len(active)
+        counts = numpy.zeros((size, len(d)), dtype=numpy.int16)
+        if not s.casters or not len(d):
+            return counts
+        for ui, level, damages in s.casters:
+            casting = active & alive[src][:, s.unit == ui].any(axis=1)
+            for dmg in damages:
+                shielded = numpy.zeros(size, dtype=bool)
+                for sui, kind in d.shields:
+                    if kind == dmg['type']:
+                        shielded |= alive[1 - src][:, d.unit == sui].any(
+                                axis=1)
+                factor = level if dmg.get('expandLevel') else 1
+                n = rng.integers(dmg['minnum'], dmg['maxnum'] + 1,
+                                 size=size) * factor
+                slots = int(n.max()) if size else 0
+                if not slots:
+                    continue
+                target, has_target = _targets(rng, alive[1 - src], slots)
+                hit = (numpy.arange(slots) < n[:, numpy.newaxis]) & \
+                    (casting & ~shielded)[:, numpy.newaxis] & has_target
+                defense = d.special_defense.get(dmg['type'])
+                if defense is not None:
+                    odds = numpy.exp2(float(level) - defense[target])
+                    hit &= rng.random(target.shape, dtype=numpy.float32) < \
+                        odds / (1 + odds)
+                counts += _hit_counts(hit, target, size, len(d)).astype(
+                        numpy.int16)
+        return counts
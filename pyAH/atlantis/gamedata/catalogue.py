@@ -0,0 +1,194 @@
+"""Catalogue of the structures of the world.
+
+Each :class:`~atlantis.gamedata.region.Region` keeps its own
+:class:`~atlantis.gamedata.structure.Structure` objects.
+:class:`StructureCatalogue` indexes the structures of all regions, so
+questions as where are all the shafts on surface, which fleets are in
+ocean hexes, or which buildings need maintenance, are answered without
+walking the map.
+
+Structures are indexed by structure type, by being a ship or a
+building, by having an inner location, by needing maintenance, and by
+level, terrain and location of their region. Looking for structures
+reads only the shortest index that applies, and checks every structure
+in it against the rest of the criteria.
+
+Ships are told apart by their number, as fleets are numbered from
+:attr:`~atlantis.gamedata.structure.SHIP_ID_OFFSET` on.
+
+Regions are indexed with the hex status they have when added, and
+kept up to date as told for
+:class:`~atlantis.gamedata.production.ProductionIndex`.
+
+"""
+
+from atlantis.gamedata.map import HEX_CURRENT, HEX_OLD, level_name
+from atlantis.gamedata.structure import SHIP_ID_OFFSET
+
+class StructureCatalogue():
+    """Index of the structures of many regions."""
+    
+    def __init__(self):
+        """Create an empty :class:`StructureCatalogue`."""
+        # (location, structure, terrain, status) keyed by location and
+        # structure number
+        self._entries = dict()
+        # Keys of the entries, as dictionaries to keep their order
+        self._types = dict()
+        self._ships = {True: dict(), False: dict()}
+        self._inner = {True: dict(), False: dict()}
+        self._maintenance = {True: dict(), False: dict()}
+        self._levels = dict()
+        self._terrains = dict()
+        self._regions = dict()
+    
+    @staticmethod
+    def from_map(m):
+        """Create a :class:`StructureCatalogue` of a map.
+        
+        Only current and old hexes are indexed.
+        
+        :param m: :class:`~atlantis.gamedata.map.Map` object.
+        
+        :return: the new :class:`StructureCatalogue`.
+        
+        """
+        catalogue = StructureCatalogue()
+        for level in m.levels.values():
+            for mh in level.hexes.values():
+                if mh.status in (HEX_CURRENT, HEX_OLD):
+                    catalogue.add_region(mh.region, mh.status)
+        return catalogue
+    
+    def __len__(self):
+        """Return the number of structures."""
+        return len(self._entries)
+    
+    def add_region(self, region, status=HEX_CURRENT):
+        """Index the structures of a region.
+        
+        Structures indexed before for the same region are replaced.
+        
+        :param region: :class:`~atlantis.gamedata.region.Region` object.
+        :param status: status of the region hex, ``HEX_CURRENT`` or
+            ``HEX_OLD``.
+        
+        """
+        self.remove_region(region.location)
+        for structure in (getattr(region, 'structures', None) or {}).values():
+            self.add_structure(region.location, region.terrain, structure,
+                               status)
+    
+    def add_structure(self, location, terrain, structure,
+                      status=HEX_CURRENT):
+        """Index a structure.
+        
+        A structure indexed before with the same location and number is
+        replaced.
+        
+        :param location: region location, as a three elements tuple.
+        :param terrain: terrain type of the region.
+        :param structure: :class:`~atlantis.gamedata.structure.Structure`
+            object.
+        :param status: status of the region hex, ``HEX_CURRENT`` or
+            ``HEX_OLD``.
+        
+        """
+        location = tuple(location)
+        key = (location, structure.num)
+        self._remove(key)
+        self._entries[key] = (location, structure, terrain, status)
+        self._types.setdefault(structure.structure_type, dict())[key] = True
+        self._ships[structure.num >= SHIP_ID_OFFSET][key] = True
+        self._inner[bool(structure.inner_location)][key] = True
+        self._maintenance[bool(structure.needs_maintenance or \
+                               structure.about_to_decay)][key] = True
+        self._levels.setdefault(level_name(location), dict())[key] = True
+        self._terrains.setdefault(terrain, dict())[key] = True
+        self._regions.setdefault(location, dict())[key] = True
+    
+    def remove_region(self, location):
+        """Remove the structures of a region.
+        
+        :param location: region location, as a three elements tuple.
+        
+        """
+        for key in list(self._regions.get(tuple(location), ())):
+            self._remove(key)
+    
+    def _remove(self, key):
+        """Remove an entry from the indexes, if indexed."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        location, structure, terrain, status = entry
+        for index, value in ((self._types, structure.structure_type),
+                             (self._levels, level_name(location)),
+                             (self._terrains, terrain),
+                             (self._regions, location)):
+            keys = index[value]
+            del keys[key]
+            if not keys:
+                del index[value]
+        for index in (self._ships, self._inner, self._maintenance):
+            index[True].pop(key, None)
+            index[False].pop(key, None)
+    
+    def get_types(self):
+        """Return the structure types indexed.
+        
+        :return: sorted list of structure type names.
+        
+        """
+        return sorted(self._types)
+    
+    def find(self, structure_type=None, ship=None, inner=None,
+             maintenance=None, level=None, terrain=None, location=None,
+             status=None):
+        """Find structures.
+        
+        :param structure_type: if given, only structures of this type,
+            as **Shaft** or **Fleet**, are returned.
+        :param ship: if *True* only ships are returned, and if *False*
+            only buildings.
+        :param inner: if *True* only structures with an inner location
+            are returned, and if *False* only those without one.
+        :param maintenance: if *True* only structures needing
+            maintenance or about to decay are returned, and if *False*
+            only those that don't.
+        :param level: if given, only structures in this level are
+            returned.
+        :param terrain: if given, only structures in regions of this
+            terrain type are returned.
+        :param location: if given, only structures in this region are
+            returned.
+        :param status: if given, only structures whose hex has this
+            status are returned.
+        
+        :return: list of (*location*, *structure*, *terrain*, *status*)
+            tuples, in the order they were added.
+        
+        """
+        candidates = []
+        if structure_type is not None:
+            candidates.append(self._types.get(structure_type, {}))
+        if ship is not None:
+            candidates.append(self._ships[bool(ship)])
+        if inner is not None:
+            candidates.append(self._inner[bool(inner)])
+        if maintenance is not None:
+            candidates.append(self._maintenance[bool(maintenance)])
+        if level is not None:
+            candidates.append(self._levels.get(level, {}))
+        if terrain is not None:
+            candidates.append(self._terrains.get(terrain, {}))
+        if location is not None:
+            candidates.append(self._regions.get(tuple(location), {}))
+        if not candidates:
+            candidates.append(self._entries)
+        
+        candidates.sort(key=len)
+        others = candidates[1:]
+        return [self._entries[key] for key in candidates[0] \
+                if all([key in c for c in others]) and \
+                    (status is None or self._entries[key][3] == status)]
@@ -0,0 +1,167 @@
+"""Differences between consecutive turn maps.
+
+Maps of consecutive turns are mostly identical: terrain, names, exits
+and towns rarely change, and lots of hexes are not even visited again.
+Instead of storing the whole map every turn, a base map can be stored
+once, and then only a *delta* for each following turn.
+
+:func:`map_delta` computes the delta between two
+:class:`~atlantis.gamedata.map.Map` objects, and :func:`apply_delta`
+applies it to the older map to get the newer one. So any turn can be
+rebuilt by loading the base map (as a json file or a
+:mod:`~atlantis.gamedata.snapshot`) and applying the deltas of every
+turn since then.
+
+Deltas are made at region field granularity, using the keys of
+:meth:`Region.json_serialize
+<atlantis.gamedata.region.Region.json_serialize>`: only fields that
+changed are stored, compacted reports being compared by their lines,
+and they are applied with
+:meth:`Region.json_update <atlantis.gamedata.region.Region.json_update>`
+that, as :meth:`Region.update
+<atlantis.gamedata.region.Region.update>`, leaves other fields as they
+are.
+
+A delta is a *dict* made only of primitive python types, so it can be
+saved with :func:`json.dump`. It has a *levels* key with a *dict* of
+level deltas, keyed by level name, and a *removed_levels* key with the
+list of levels removed. Level deltas have these keys:
+
+- *hexes*: list of new hexes, serialized with :meth:`MapHex.json_serialize
+  <atlantis.gamedata.map.MapHex.json_serialize>`.
+- *changes*: list of (*x*, *y*, *change*) lists for changed hexes.
+  *change* is a *dict* with new *status* and *last_seen* values if they
+  changed, *region* with a *dict* of changed region fields, and
+  *removed* with the list of region fields that don't exist anymore.
+- *removed*: list of (*x*, *y*) locations of removed hexes.
+
+"""
+
+from atlantis.gamedata.map import MapHex, MapLevel
+
+import copy
+
+def _compared_fields(region, json_object):
+    """Return region fields as they are compared.
+    
+    Reports are compared by their lines, so a compacted report and a
+    list of lines with the same content are the same field value.
+    
+    :param region: :class:`~atlantis.gamedata.region.Region` object.
+    :param json_object: value returned by its :meth:`json_serialize
+        <atlantis.gamedata.region.Region.json_serialize>` method.
+    
+    :return: a *dict* with the fields of *json_object*, with report
+        lines instead of compacted reports.
+    
+    """
+    fields = dict(json_object)
+    fields['report'] = region.report
+    if 'structures' in fields:
+        fields['structures'] = [
+                dict(js, report=s.report) for js, s in \
+                    zip(fields['structures'], region.structures.values())]
+    return fields
+
+def _hex_change(old, new):
+    """Return the change of a hex.
+    
+    :param old: old :class:`~atlantis.gamedata.map.MapHex`.
+    :param new: new :class:`~atlantis.gamedata.map.MapHex`.
+    
+    :return: a *dict* with the change, empty if hexes are equal.
+    
+    """
+    change = dict()
+    if new.status != old.status:
+        change['status'] = new.status
+    if tuple(new.last_seen) != tuple(old.last_seen):
+        change['last_seen'] = list(new.last_seen)
+    if new.region == old.region:
+        return change
+    old_region = _compared_fields(old.region, old.region.json_serialize())
+    new_region = new.region.json_serialize()
+    new_fields = _compared_fields(new.region, new_region)
+    fields = dict([(k, copy.deepcopy(v)) for k, v in new_region.items() \
+                   if k not in old_region or old_region[k] != new_fields[k]])
+    if fields:
+        change['region'] = fields
+    removed = [k for k in old_region if k not in new_region]
+    if removed:
+        change['removed'] = removed
+    return change
+
+def map_delta(old, new):
+    """Return the delta between two maps.
+    
+    :param old: older :class:`~atlantis.gamedata.map.Map`.
+    :param new: newer :class:`~atlantis.gamedata.map.Map`.
+    
+    :return: the delta, as a *dict*.
+    
+    """
+    levels = dict()
+    for name, level in new.levels.items():
+        try:
+            old_hexes = old.levels[name].hexes
+        except KeyError:
+            old_hexes = dict()
+        hexes = []
+        changes = []
+        for location, mh in level.hexes.items():
+            try:
+                old_mh = old_hexes[location]
+            except KeyError:
+                hexes.append(copy.deepcopy(mh.json_serialize()))
+                continue
+            if old_mh is mh or old_mh == mh:
+                continue
+            change = _hex_change(old_mh, mh)
+            if change:
+                changes.append([location[0], location[1], change])
+        removed = [list(location) for location in old_hexes \
+                   if location not in level.hexes]
+        if hexes or changes or removed or name not in old.levels:
+            levels[name] = {'hexes': hexes, 'changes': changes,
+                            'removed': removed}
+    removed_levels = [name for name in old.levels if name not in new.levels]
+    return {'levels': levels, 'removed_levels': removed_levels}
+
+def apply_delta(m, delta):
+    """Apply a delta to a map.
+    
+    :param m: :class:`~atlantis.gamedata.map.Map` object the delta
+        was computed from. It's modified to become the newer map.
+    :param delta: delta returned by :func:`map_delta`, or loaded from
+        json. Its values are not copied but used by the map, as
+        :meth:`Region.json_deserialize
+        <atlantis.gamedata.region.Region.json_deserialize>` does, so
+        a delta must not be applied to several maps.
+    
+    :raise: :class:`KeyError` if a changed hex doesn't exist in the
+        map.
+    
+    """
+    for name in delta['removed_levels']:
+        del m.levels[name]
+    for name, level_delta in delta['levels'].items():
+        try:
+            level = m.levels[name]
+        except KeyError:
+            level = m.levels[name] = MapLevel(name)
+        hexes = level.hexes
+        for x, y in level_delta['removed']:
+            del hexes[(x, y)]
+        for x, y, change in level_delta['changes']:
+            mh = hexes[(x, y)]
+            if 'status' in change:
+                mh.status = change['status']
+            if 'last_seen' in change:
+                mh.last_seen = tuple(change['last_seen'])
+            if 'region' in change:
+                mh.region.json_update(change['region'])
+            for field in change.get('removed', ()):
+                delattr(mh.region, field)
+        for json_object in level_delta['hexes']:
+            mh = MapHex.json_deserialize(json_object)
+            hexes[tuple(mh.region.location[:2])] = mh
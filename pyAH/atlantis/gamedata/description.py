@@ -0,0 +1,178 @@
+"""Keeps the report lines describing game objects.
+
+Every :class:`~atlantis.gamedata.region.Region` and
+:class:`~atlantis.gamedata.structure.Structure` keeps the report lines
+it was read from, in its *report* attribute. Lines are only shown to
+the player when asked for, but they take most of the memory used by a
+big map, and most of its size when saved.
+
+:class:`ReportDescription` lets these objects *compact* their report
+lines into a single compressed blob, with :meth:`compact_report
+<ReportDescription.compact_report>`, which is decompressed again only
+when the lines are requested. Compression uses :mod:`zlib` with a
+preset dictionary of usual report words, as a region report is too
+short to compress well on its own.
+
+Compacted reports are saved into json as a base64 string instead of a
+list of lines, so saved maps shrink too. Objects read from json keep
+their reports compacted.
+
+"""
+
+import base64
+import zlib
+
+# Blob format, written as its first byte
+_FORMAT = 1
+
+# Usual report words, more frequent last. It's part of the blob format:
+# changing it needs a new _FORMAT value
+_ZDICT = ' '.join([
+        'horses [HORS]', 'stone [STON]', 'iron [IRON]', 'fish [FISH]',
+        'livestock [LIVE]', 'silver [SILV]', 'mountain', 'swamp', 'jungle',
+        'desert', 'tundra', 'plain', '[city]', '[town]', ' : Fort.',
+        ' : Tower.', ' : Mine.', ' : Shaft.', '+ Building [',
+        '  The weather was clear last month; it will be clear next month.',
+        '  It was winter last month; it will be winter next month.',
+        'monsoon season', '  Wanted: none.', '  For Sale: none.',
+        '  Entertainment available: $', '  Products: none.',
+        ' grain [GRAI], ', ' wood [WOOD], ', ' furs [FUR], ', ' herbs [HERB]',
+        ' leaders [LEAD] at $', '  Wages: $', ' (Max: $', ').', '  Wanted: ',
+        '  For Sale: ', '  Products: ', 'Exits:', '  Northwest : ',
+        '  Southwest : ', '  Southeast : ', '  Northeast : ', '  North : ',
+        '  South : ', ', contains ', ' [village].', ' peasants (', 'forest (',
+        'ocean (', ' Ocean.', ' in ', '-' * 60]).encode('utf-8')
+
+def compress_lines(lines):
+    """Return report lines compressed into a blob.
+    
+    :param lines: list of report lines, without line ends.
+    
+    :return: compressed *bytes*.
+    
+    :raise: :class:`ValueError` if there are no lines, or any line
+        has a line end.
+    
+    """
+    if not lines:
+        raise ValueError('no report lines')
+    text = '\n'.join(lines)
+    if text.count('\n') != len(lines) - 1:
+        raise ValueError('report lines with line ends')
+    compressor = zlib.compressobj(9, zdict=_ZDICT)
+    return bytes((_FORMAT,)) + compressor.compress(text.encode('utf-8')) + \
+        compressor.flush()
+
+def decompress_lines(blob):
+    """Return report lines from a blob made by :func:`compress_lines`.
+    
+    :param blob: compressed *bytes*.
+    
+    :return: list of report lines.
+    
+    :raise: :class:`ValueError` if *blob* is not a valid blob.
+    
+    """
+    if not blob or blob[0] != _FORMAT:
+        raise ValueError('unknown report blob format')
+    decompressor = zlib.decompressobj(zdict=_ZDICT)
+    try:
+        text = decompressor.decompress(blob[1:]) + decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(str(e))
+    return text.decode('utf-8').split('\n')
+
+
+class ReportDescription():
+    """Provide its derived classes with a compactable *report*.
+    
+    Derived classes set the ``_report`` attribute to an empty list when
+    created. Then the *report* attribute is the list of lines, or a new
+    list built from the blob if the report is compacted. So lines
+    appended to a compacted report list are lost:
+    :meth:`expand_report` must be called before changing it in place.
+    
+    """
+    
+    _report_zlib = None
+    
+    @property
+    def report(self):
+        """List of report lines describing the object."""
+        lines = self._report
+        if lines is None:
+            return decompress_lines(self._report_zlib)
+        return lines
+    
+    @report.setter
+    def report(self, lines):
+        d = self.__dict__
+        d['_report'] = lines
+        d.pop('_report_zlib', None)
+    
+    def is_report_compact(self):
+        """Check if report lines are compacted.
+        
+        :return: *True* if report lines are kept compressed.
+        
+        """
+        return self._report is None
+    
+    def compact_report(self):
+        """Compress report lines into a single blob.
+        
+        Empty reports, and reports with line ends inside lines, are not
+        compacted.
+        
+        """
+        lines = self._report
+        if not lines:
+            return
+        try:
+            blob = compress_lines(lines)
+        except ValueError:
+            return
+        # Content doesn't change, so attributes are set directly,
+        # keeping any cached content hash
+        d = self.__dict__
+        d['_report_zlib'] = blob
+        d['_report'] = None
+    
+    def expand_report(self):
+        """Decompress report lines, if compacted.
+        
+        :return: the list of report lines, which can be changed in
+            place.
+        
+        """
+        lines = self._report
+        if lines is None:
+            lines = decompress_lines(self._report_zlib)
+            d = self.__dict__
+            d['_report'] = lines
+            d.pop('_report_zlib', None)
+        return lines
+    
+    def _report_json(self):
+        """Return report lines serialized for json.
+        
+        :return: list of lines, or the compacted blob as a base64
+            string.
+        
+        """
+        if self._report is None:
+            return base64.b64encode(self._report_zlib).decode('ascii')
+        return self._report
+    
+    def _report_from_json(self, value):
+        """Set report lines from :meth:`_report_json` data.
+        
+        :param value: list of lines, or the compacted blob as a base64
+            string.
+        
+        """
+        if isinstance(value, str):
+            self._report_zlib = base64.b64decode(value)
+            self._report = None
+        else:
+            self.report = value
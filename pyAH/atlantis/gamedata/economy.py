@@ -0,0 +1,274 @@
+"""Projects the income of regions.
+
+Units earn silver in a region by three activities, each of them limited
+by a pool of the region:
+
+- Taxing, up to the region :attr:`~atlantis.gamedata.region.Region.wealth`.
+- Working, paid the region wages productivity per man, up to the wages
+  amount of the region.
+- Entertaining, paid per man and level of the entertainment skill, up to
+  the region :attr:`~atlantis.gamedata.region.Region.entertainment`.
+
+:class:`EconomyProjection` loads the pools of many regions, usually a
+whole :class:`~atlantis.gamedata.map.MapLevel`, into numpy_ arrays, and
+projects the income of all of them at once for any number of men
+assigned to each activity. :meth:`EconomyProjection.sweep` runs what-if
+projections in bulk, for every region and every number of men in a
+list.
+
+Numbers of men can be given as a single number for all the regions, as
+an array with a number per region, or as any array whose first
+dimension are the regions. Pools are broadcast along the other
+dimensions.
+
+numpy_ is an optional dependency of pyAH, only needed by this module
+and :mod:`atlantis.gamedata.battlesim`.
+
+This module also defines the following public attributes:
+
+.. attribute:: TAX_INCOME
+
+   Silver collected by a taxing man.
+
+.. attribute:: ENTERTAIN_INCOME
+
+   Silver earned by an entertaining man per level of the entertainment
+   skill.
+
+.. attribute:: ACTIVITY_TAX
+
+   Constant for taxing activity.
+
+.. attribute:: ACTIVITY_WORK
+
+   Constant for working activity.
+
+.. attribute:: ACTIVITY_ENTERTAIN
+
+   Constant for entertaining activity.
+
+.. _numpy: https://numpy.org
+"""
+
+from atlantis.gamedata.map import HEX_CURRENT, HEX_OLD
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TAX_INCOME = 50
+ENTERTAIN_INCOME = 20
+
+ACTIVITY_TAX, ACTIVITY_WORK, ACTIVITY_ENTERTAIN = range(3)
+
+class EconomyProjection():
+    """Income projection of a set of regions.
+    
+    :class:`EconomyProjection` has the following public attributes.
+    Pools and *population* are numpy arrays with a value per region:
+    
+    .. attribute:: locations
+    
+       List of the locations of the regions, in the order of the arrays.
+    
+    .. attribute:: population
+    
+       Population of the regions.
+    
+    .. attribute:: wealth
+    
+       Wealth of the regions, the pool of taxes.
+    
+    .. attribute:: productivity
+    
+       Wages paid per working man.
+    
+    .. attribute:: wages
+    
+       Total wages available, the pool of work income.
+    
+    .. attribute:: entertainment
+    
+       Entertainment available, the pool of entertainment income.
+    
+    .. attribute:: tax_income
+    
+       Silver collected by a taxing man.
+    
+    .. attribute:: entertain_income
+    
+       Silver earned by an entertaining man per skill level.
+    
+    Pools unknown, as those of regions never visited, are zero.
+    
+    """
+    
+    def __init__(self, regions, tax_income=TAX_INCOME,
+                 entertain_income=ENTERTAIN_INCOME):
+        """Create an :class:`EconomyProjection`.
+        
+        :param regions: iterable of
+            :class:`~atlantis.gamedata.region.Region` objects.
+        :param tax_income: silver collected by a taxing man.
+        :param entertain_income: silver earned by an entertaining man
+            per skill level.
+        
+        :raise: :class:`ImportError` if numpy is not installed.
+        
+        """
+        if numpy is None:
+            raise ImportError('numpy is needed by EconomyProjection')
+        self.tax_income = tax_income
+        self.entertain_income = entertain_income
+        
+        self.locations = []
+        values = []
+        for region in regions:
+            self.locations.append(region.location)
+            wages = getattr(region, 'wages', None) or {}
+            values.append((region.population, region.wealth,
+                           wages.get('productivity', 0),
+                           wages.get('amount', 0),
+                           getattr(region, 'entertainment', 0)))
+        values = numpy.array(values, dtype=numpy.float64).reshape(-1, 5)
+        self.population, self.wealth, self.productivity, self.wages, \
+            self.entertainment = values.T.copy()
+        self._indexes = dict([(location, i) \
+                              for i, location in enumerate(self.locations)])
+    
+    @staticmethod
+    def from_level(level, old=True, **kwargs):
+        """Create an :class:`EconomyProjection` of a map level.
+        
+        Only regions with population are loaded.
+        
+        :param level: :class:`~atlantis.gamedata.map.MapLevel` object.
+        :param old: if *True* old hexes are loaded too, otherwise only
+            current hexes are.
+        :param kwargs: other arguments of :class:`EconomyProjection`.
+        
+        :return: the new :class:`EconomyProjection`.
+        
+        """
+        status = (HEX_CURRENT, HEX_OLD) if old else (HEX_CURRENT,)
+        return EconomyProjection([mh.region for mh in level.hexes.values() \
+                                  if mh.status in status and \
+                                      mh.region.population], **kwargs)
+    
+    def __len__(self):
+        """Return the number of regions."""
+        return len(self.locations)
+    
+    def index(self, location):
+        """Return the index of a region in the arrays.
+        
+        :param location: location of the region.
+        
+        :return: index of the region.
+        
+        :raise: :class:`KeyError` if the region is not loaded.
+        
+        """
+        return self._indexes[tuple(location)]
+    
+    @staticmethod
+    def _limit(pool, income):
+        """Limit income by a pool, broadcasting the pool along regions."""
+        income = numpy.asarray(income, dtype=numpy.float64)
+        if income.ndim > 1:
+            pool = pool.reshape((-1,) + (1,) * (income.ndim - 1))
+        return numpy.minimum(pool, income)
+    
+    def tax(self, men):
+        """Project the income of taxing.
+        
+        :param men: number of men taxing.
+        
+        :return: array with the income of every region.
+        
+        """
+        return self._limit(self.wealth,
+                           numpy.multiply(men, self.tax_income))
+    
+    def work(self, men):
+        """Project the income of working.
+        
+        :param men: number of men working.
+        
+        :return: array with the income of every region.
+        
+        """
+        men = numpy.asarray(men, dtype=numpy.float64)
+        productivity = self.productivity
+        if men.ndim > 1:
+            productivity = productivity.reshape((-1,) + (1,) * (men.ndim - 1))
+        return self._limit(self.wages, men * productivity)
+    
+    def entertain(self, men, level=1):
+        """Project the income of entertaining.
+        
+        :param men: number of men entertaining.
+        :param level: level of the entertainment skill of the men.
+        
+        :return: array with the income of every region.
+        
+        """
+        return self._limit(self.entertainment,
+                           numpy.multiply(men, level * self.entertain_income))
+    
+    def income(self, taxers=0, workers=0, entertainers=0, level=1):
+        """Project the total income of an assignment of men.
+        
+        :param taxers: number of men taxing.
+        :param workers: number of men working.
+        :param entertainers: number of men entertaining.
+        :param level: level of the entertainment skill of entertainers.
+        
+        :return: array with the income of every region.
+        
+        """
+        return self.tax(taxers) + self.work(workers) + \
+            self.entertain(entertainers, level)
+    
+    def sweep(self, sizes, activity, level=1):
+        """Project the income of an activity for many numbers of men.
+        
+        :param sizes: list of numbers of men.
+        :param activity: activity, from ``ACTIVITY_TAX`` to
+            ``ACTIVITY_ENTERTAIN``.
+        :param level: level of the entertainment skill, if *activity* is
+            ``ACTIVITY_ENTERTAIN``.
+        
+        :return: array with a row per region and a column per number of
+            men.
+        
+        :raise: :class:`ValueError` if *activity* is not valid.
+        
+        """
+        men = numpy.broadcast_to(numpy.asarray(sizes, dtype=numpy.float64),
+                                 (len(self), len(sizes)))
+        if activity == ACTIVITY_TAX:
+            return self.tax(men)
+        if activity == ACTIVITY_WORK:
+            return self.work(men)
+        if activity == ACTIVITY_ENTERTAIN:
+            return self.entertain(men, level)
+        raise ValueError('{}: bad activity'.format(activity))
+    
+    def best_activity(self, men, level=1):
+        """Return the activity paying most to a number of men.
+        
+        :param men: number of men.
+        :param level: level of the entertainment skill of the men.
+        
+        :return: tuple with an array of the best activity of every
+            region, from ``ACTIVITY_TAX`` to ``ACTIVITY_ENTERTAIN``, and
+            an array with its income. Ties go to the lowest activity.
+        
+        """
+        incomes = numpy.stack([self.tax(men), self.work(men),
+                               self.entertain(men, level)])
+        best = incomes.argmax(axis=0)
+        return best, numpy.take_along_axis(incomes, best[numpy.newaxis],
+                                           axis=0)[0]
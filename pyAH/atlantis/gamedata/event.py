@@ -0,0 +1,278 @@
+"""Keeps the events and errors reported to factions.
+
+Factions are reported a list of events and a list of errors every turn,
+most of them attached to a unit. :class:`Event` keeps one of them, as
+:class:`~atlantis.gamedata.gamedata.GameData` receives
+:meth:`ReportConsumer.faction_event
+<atlantis.parsers.reportparser.ReportConsumer.faction_event>` calls.
+
+:class:`EventStore` keeps the events of many turns with an inverted
+index of the words in their messages, and indexes by unit, type and
+turn, so events can be looked for across a long history without
+reading them all. Looking for events reads only the shortest index
+that applies, and checks every event in it against the rest of
+the criteria.
+
+Both classes implement :class:`~atlantis.helpers.json.JsonSerializable`
+interface.
+
+This module also defines the following public attributes:
+
+.. attribute:: MESSAGE_EVENT
+
+   Type of event messages.
+
+.. attribute:: MESSAGE_ERROR
+
+   Type of error messages.
+
+"""
+
+from atlantis.helpers.json import JsonSerializable
+
+import re
+
+MESSAGE_EVENT = 'event'
+MESSAGE_ERROR = 'error'
+
+_re_token = re.compile(r'\w+')
+
+def tokenize(text):
+    """Return the words of a text, as indexed by :class:`EventStore`.
+    
+    :param text: text to be split.
+    
+    :return: list of lower case words, in the order they are found.
+    
+    """
+    return _re_token.findall(text.lower())
+
+class Event(JsonSerializable):
+    """An event or error reported to a faction.
+    
+    :class:`Event` has the following public attributes:
+    
+    .. attribute:: message_type
+    
+       ``event`` or ``error``.
+    
+    .. attribute:: message
+    
+       Text of the message.
+    
+    .. attribute:: unit
+    
+       Unit the message is attached to, as a dictionary with its *num*
+       and *name*, or *None* for general faction messages.
+    
+    .. attribute:: turn
+    
+       Turn of the message as a (*year*, *month*) tuple, or *None* if
+       unknown. Set when the event is added to an :class:`EventStore`.
+    
+    """
+    
+    def __init__(self, message_type, message, unit=None):
+        """Create a new :class:`Event`.
+        
+        :param message_type: ``event`` or ``error``.
+        :param message: text of the message.
+        :param unit: unit the message is attached to, as a dictionary
+            with its *num* and *name*, if any.
+        
+        """
+        self.message_type = message_type
+        self.message = message
+        self.unit = unit
+        self.turn = None
+    
+    def __repr__(self):
+        """Return a readable representation of the event."""
+        if self.unit:
+            return '<Event {} {}: {} ({}): {}>'.format(
+                    self.turn, self.message_type, self.unit['name'],
+                    self.unit['num'], self.message)
+        return '<Event {} {}: {}>'.format(self.turn, self.message_type,
+                                          self.message)
+    
+    # JsonSerializable methods
+    def json_serialize(self):
+        """Return a serializable version of :class:`Event`.
+        
+        :return: a *dict* representing the :class:`Event` object.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        return {'message_type': self.message_type, 'message': self.message,
+                'unit': self.unit, 'turn': self.turn}
+    
+    @staticmethod
+    def json_deserialize(json_object):
+        """Load :class:`Event` from a deserialized json object.
+        
+        :param json_object: object returned by :func:`json.load`.
+        
+        :return: the :class:`Event` object from json data.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        e = Event(json_object['message_type'], json_object['message'],
+                  json_object['unit'])
+        if json_object['turn']:
+            e.turn = tuple(json_object['turn'])
+        return e
+
+class EventStore(JsonSerializable):
+    """Events and errors of many turns.
+    
+    :class:`EventStore` has the following public attributes:
+    
+    .. attribute:: events
+    
+       List of :class:`Event` objects, in the order they were added.
+    
+    """
+    
+    def __init__(self):
+        """Create an empty :class:`EventStore`."""
+        self.events = []
+        # Indexes of events in self.events
+        self._tokens = dict()
+        self._units = dict()
+        self._types = dict()
+        self._turns = dict()
+    
+    def __len__(self):
+        """Return the number of events."""
+        return len(self.events)
+    
+    def add(self, event, turn=None):
+        """Add an event to the store.
+        
+        :param event: :class:`Event` object.
+        :param turn: turn of the event, as a (*year*, *month*) tuple. If
+            not given, the turn of *event* is kept.
+        
+        """
+        if turn is not None:
+            event.turn = tuple(turn)
+        i = len(self.events)
+        self.events.append(event)
+        for token in set(tokenize(event.message)):
+            self._tokens.setdefault(token, []).append(i)
+        if event.unit:
+            self._units.setdefault(event.unit['num'], []).append(i)
+        self._types.setdefault(event.message_type, []).append(i)
+        self._turns.setdefault(event.turn, []).append(i)
+    
+    def add_game_data(self, game_data, turn):
+        """Add the events of a parsed report to the store.
+        
+        :param game_data: :class:`~atlantis.gamedata.gamedata.GameData`
+            with a parsed faction report.
+        :param turn: turn of the report, as a (*year*, *month*) tuple.
+        
+        """
+        for event in game_data.events:
+            self.add(event, turn)
+    
+    def get_turns(self):
+        """Return the turns with events.
+        
+        :return: sorted list of (*year*, *month*) tuples. Events with no
+            turn are not counted.
+        
+        """
+        return sorted([turn for turn in self._turns if turn is not None])
+    
+    def find(self, text=None, unit=None, message_type=None, first=None,
+             last=None):
+        """Find events.
+        
+        :param text: if given, only events whose message has all the
+            words in *text* are returned, in any order and case.
+        :param unit: if given, only events attached to the unit with
+            this number are returned.
+        :param message_type: if given, only events of this type,
+            ``event`` or ``error``, are returned.
+        :param first: if given, only events of this turn or later are
+            returned.
+        :param last: if given, only events of this turn or before are
+            returned.
+        
+        :return: list of :class:`Event` objects, in the order they were
+            added.
+        
+        """
+        tokens = set(tokenize(text)) if text else set()
+        if first is not None:
+            first = tuple(first)
+        if last is not None:
+            last = tuple(last)
+        
+        candidates = [self._tokens.get(token, []) for token in tokens]
+        if unit is not None:
+            candidates.append(self._units.get(unit, []))
+        if message_type is not None:
+            candidates.append(self._types.get(message_type, []))
+        if first is not None or last is not None:
+            turns = [indexes for turn, indexes in self._turns.items() \
+                     if turn is not None and \
+                         (first is None or turn >= first) and \
+                         (last is None or turn <= last)]
+            # Turn indexes are only merged if they are the shortest
+            size = sum([len(indexes) for indexes in turns])
+            if not candidates or size < min([len(c) for c in candidates]):
+                candidates = [sorted([i for indexes in turns \
+                                      for i in indexes])]
+        if not candidates:
+            return list(self.events)
+        
+        found = []
+        for i in min(candidates, key=len):
+            e = self.events[i]
+            if unit is not None and (not e.unit or e.unit['num'] != unit):
+                continue
+            if message_type is not None and e.message_type != message_type:
+                continue
+            if first is not None and (e.turn is None or e.turn < first):
+                continue
+            if last is not None and (e.turn is None or e.turn > last):
+                continue
+            if tokens and not tokens.issubset(tokenize(e.message)):
+                continue
+            found.append(e)
+        return found
+    
+    # JsonSerializable methods
+    def json_serialize(self):
+        """Return a serializable version of :class:`EventStore`.
+        
+        :return: a *list* with the serialized events.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        return [e.json_serialize() for e in self.events]
+    
+    @staticmethod
+    def json_deserialize(json_object):
+        """Load :class:`EventStore` from a deserialized json object.
+        
+        :param json_object: object returned by :func:`json.load`.
+        
+        :return: the :class:`EventStore` object from json data.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        store = EventStore()
+        for e in json_object:
+            store.add(Event.json_deserialize(e))
+        return store
@@ -9,16 +9,35 @@ two major functions:
 
 #. :class:`GameData` acts as the repository of one turn data. It holds
    faction data, map data, structure, items and skills definitions, etc.
+
+Units are kept in their region or structure, as the report lists them,
+but :class:`GameData` also indexes them by number, faction and skill
+level. So :meth:`GameData.get_unit` finds a unit without walking the
+map, and :meth:`GameData.find_units` only visits the units it returns.
+Market offers and region products are also indexed by item, in a
+:class:`~atlantis.gamedata.market.MarketIndex` and a
+:class:`~atlantis.gamedata.production.ProductionIndex`, and structures
+of all regions in a
+:class:`~atlantis.gamedata.catalogue.StructureCatalogue`. Battles are
+kept as :class:`~atlantis.gamedata.battle.Battle` objects, to be added
+to a :class:`~atlantis.gamedata.battle.BattleStore` with the battles of
+other turns, and so are events and errors, as
+:class:`~atlantis.gamedata.event.Event` objects to be added to an
+:class:`~atlantis.gamedata.event.EventStore`.
     
 """
 
 from atlantis.parsers.reportparser import ReportConsumer
+from atlantis.gamedata.battle import Battle, SIDE_ATTACKER
+from atlantis.gamedata.catalogue import StructureCatalogue
+from atlantis.gamedata.event import Event
 from atlantis.gamedata.map import Map, HEX_EXITS
+from atlantis.gamedata.market import MarketIndex
+from atlantis.gamedata.production import ProductionIndex
 from atlantis.gamedata.region import Region
-from atlantis.gamedata.structure import Structure
-from atlantis.gamedata.rules import StructureType
-
-_SHIP_ID_OFFSET = 100
+from atlantis.gamedata.structure import Structure, SHIP_ID_OFFSET
+from atlantis.gamedata.rules import StructureType, STRUCTURE_BUILDING
+from atlantis.gamedata.unit import Unit
 
 class GameData(ReportConsumer):
     """This class hold all data of an Atlantis PBEM game.
@@ -35,6 +54,57 @@ class GameData(ReportConsumer):
     easier to implement simulation engines of any type (battle or
     economic simulators).
     
+    :class:`GameData` has the following public attributes:
+    
+    .. attribute:: map
+    
+       :class:`~atlantis.gamedata.map.Map` with the regions reported.
+    
+    .. attribute:: rules
+    
+       :class:`~atlantis.gamedata.rules.AtlantisRules` of the game.
+    
+    .. attribute:: units
+    
+       Dictionary with all :class:`~atlantis.gamedata.unit.Unit`
+       reported, keyed by their number.
+    
+    .. attribute:: markets
+    
+       :class:`~atlantis.gamedata.market.MarketIndex` with the market
+       offers of all regions reported.
+    
+    .. attribute:: production
+    
+       :class:`~atlantis.gamedata.production.ProductionIndex` with the
+       products of all regions reported.
+    
+    .. attribute:: catalogue
+    
+       :class:`~atlantis.gamedata.catalogue.StructureCatalogue` with the
+       structures of all regions reported.
+    
+    .. attribute:: structures
+    
+       Dictionary with the
+       :class:`~atlantis.gamedata.rules.StructureType` defined in the
+       report, keyed by their name.
+    
+    .. attribute:: unknown_structures
+    
+       List of the names of structure types reported but defined
+       neither in the report nor in :attr:`rules`, in the order they
+       were found.
+    
+    .. attribute:: battles
+    
+       List of :class:`~atlantis.gamedata.battle.Battle` reported.
+    
+    .. attribute:: events
+    
+       List of :class:`~atlantis.gamedata.event.Event` reported, events
+       and errors in the order they were read.
+    
     """
     
     # Current region
@@ -47,6 +117,13 @@ class GameData(ReportConsumer):
     # Last line read
     _line = None
     
+    # Current battle, its side being listed, and the side of the last
+    # casualties reported
+    _battle = None
+    _battle_side = None
+    _battle_casualties = False
+    _battle_loses_side = None
+    
     def __init__(self, rules):
         """:class:`GameData` constructor.
         
@@ -61,6 +138,16 @@ class GameData(ReportConsumer):
         self.rules = rules
         self.structures = dict()
         self.unknown_structures = list()
+        self.units = dict()
+        self.markets = MarketIndex()
+        self.production = ProductionIndex()
+        self.catalogue = StructureCatalogue()
+        self.battles = list()
+        self.events = list()
+        # Units keyed by their number, in dictionaries keyed by faction
+        # number, and by skill and level
+        self._faction_units = dict()
+        self._skill_units = dict()
     
     def line(self, line):
         """Handle a new line.
@@ -81,6 +168,17 @@ class GameData(ReportConsumer):
             self._region.append_report_description(self._line)
             
     
+    def faction_event(self, message_type, message, unit=None):
+        """Handle a read event or error.
+        
+        :param message_type: ``event`` or ``error``.
+        :param message: text of the event.
+        :param unit: unit the event is attached to, if any, as a
+            dictionary with its *num* and *name*.
+        
+        """
+        self.events.append(Event(message_type, message, unit))
+    
     def region(self, terrain, name, xloc, yloc, zloc=None,
                 population=0, racenames=None, wealth=0, town=None):
         """Handle first line of region report.
@@ -167,6 +265,7 @@ class GameData(ReportConsumer):
         """
         self.update_item_definitions(items)
         self._region.set_market(market, items)
+        self.markets.add_market(self._region.location, market, items)
     
     def region_entertainment(self, amount):
         """Handle region entertainment report.
@@ -195,6 +294,8 @@ class GameData(ReportConsumer):
         
         """
         self._region.set_products(products)
+        self.production.add_products(self._region.location,
+                                     self._region.terrain, products)
         self._descr_in_region = False
     
     def region_exits(self, direction, terrain, name,
@@ -290,7 +391,7 @@ class GameData(ReportConsumer):
             self._region.pop_report_description()
             self._descr_in_region = False
         
-        if num >= _SHIP_ID_OFFSET:
+        if num >= SHIP_ID_OFFSET:
             self.update_structure_definitions(structure_type, ship=True)
         else:
             self.update_structure_definitions(structure_type, ship=False)
@@ -303,7 +404,135 @@ class GameData(ReportConsumer):
         
         self._structure = structure
         self._region.append_structure(structure)
+        self.catalogue.add_structure(self._region.location,
+                                     self._region.terrain, structure)
+        
+    def region_unit(self, num, name, items, tab=False, faction=None,
+                      attitude='neutral', skills=None, weight=None,
+                      capacity=None, **flags):
+        """Handle a unit in a region report.
         
+        Implements
+        :meth:`ReportConsumer.region_unit
+        <atlantis.parsers.reportparser.ReportConsumer.region_unit>`.
+        See this method documentation for further information.
+        
+        The unit is appended to the current structure if tabbed, and to
+        the current region otherwise, and it's indexed.
+        
+        :param num: unique identifier of the unit.
+        :param name: name of the unit.
+        :param items: list of :class:`~atlantis.gamedata.item.ItemUnit`
+            elements.
+        :param tab: if *True* the unit is inside a structure.
+        :param faction: dictionary with *num* and *name* of unit's
+            faction, if visible.
+        :param attitude: attitude towards unit's faction.
+        :param skills: list of
+            :class:`~atlantis.gamedata.skill.SkillDays` elements.
+        :param weight: unit weight.
+        :param capacity: dictionary with unit capacity per movement
+            type.
+        :param flags: other unit values and flags reported.
+        
+        """
+        
+        if self._descr_in_region:
+            self._region.pop_report_description()
+            self._descr_in_region = False
+        
+        if tab and self._structure:
+            structure = self._structure
+        else:
+            structure = None
+        unit = Unit(num, name, items, self._region.location,
+                    structure.num if structure else None, faction, attitude,
+                    skills, weight, capacity, **flags)
+        unit.append_report_description(self._line)
+        if structure:
+            structure.append_unit(unit)
+        else:
+            self._region.append_unit(unit)
+        self._index_unit(unit)
+    
+    def _index_unit(self, unit):
+        """Add a unit to the unit indexes.
+        
+        A unit reported again replaces the one indexed with the same
+        number.
+        
+        """
+        old = self.units.get(unit.num)
+        if old is not None:
+            self._unindex_unit(old)
+        self.units[unit.num] = unit
+        faction = unit.get_faction_num()
+        if faction is not None:
+            self._faction_units.setdefault(faction, dict())[unit.num] = unit
+        for sk in unit.skills:
+            levels = self._skill_units.setdefault(sk.abr, dict())
+            levels.setdefault(sk.level, dict())[unit.num] = unit
+    
+    def _unindex_unit(self, unit):
+        """Remove a unit from the faction and skill indexes."""
+        faction = unit.get_faction_num()
+        if faction is not None:
+            self._faction_units[faction].pop(unit.num, None)
+        for sk in unit.skills:
+            self._skill_units[sk.abr][sk.level].pop(unit.num, None)
+    
+    def get_unit(self, num):
+        """Get a unit by its number.
+        
+        :param num: unit number.
+        
+        :return: the :class:`~atlantis.gamedata.unit.Unit` object, or
+            *None* if the unit has not been reported. Its
+            :attr:`~atlantis.gamedata.unit.Unit.location` is the
+            location of its region.
+        
+        """
+        return self.units.get(num)
+    
+    def find_units(self, faction=None, skill=None, min_level=0):
+        """Find units by faction and skill.
+        
+        Units are looked for in the indexes, so only the units of the
+        faction, or those with the skill, are visited.
+        
+        :param faction: faction number. If *None*, units of any faction
+            are returned, including those of unknown faction.
+        :param skill: skill abbreviature. If *None*, units are not
+            filtered by skill.
+        :param min_level: minimum level of *skill*.
+        
+        :return: list of :class:`~atlantis.gamedata.unit.Unit` objects,
+            in report order if *skill* is not given, or from higher to
+            lower skill level otherwise.
+        
+        """
+        if skill is None:
+            if faction is None:
+                return list(self.units.values())
+            return list(self._faction_units.get(faction, {}).values())
+        
+        levels = self._skill_units.get(skill, {})
+        by_skill = [levels[lvl].values() \
+                    for lvl in sorted(levels, reverse=True) \
+                    if lvl >= min_level]
+        if faction is None:
+            return [u for units in by_skill for u in units]
+        
+        by_faction = self._faction_units.get(faction, {}).values()
+        if sum(len(units) for units in by_skill) <= len(by_faction):
+            return [u for units in by_skill for u in units \
+                    if u.get_faction_num() == faction]
+        found = [u for u in by_faction \
+                 if any(sk.abr == skill and sk.level >= min_level \
+                        for sk in u.skills)]
+        found.sort(key=lambda u: -u.get_skill_level(skill))
+        return found
+    
     def structure(self, name, structuretype,
                   monster=False, nomonstergrowth=False, canenter=False,
                   nobuildable=False,
@@ -359,11 +588,217 @@ class GameData(ReportConsumer):
         """
         
         self.structures[name] = StructureType(name, structuretype)
-        self.update_structure_definitions(structuretype)
+        self.update_structure_definitions(
+                name, ship=structuretype != STRUCTURE_BUILDING)
+        
+    def battle(self, att=None, tar=None, reg=None, ass=False):
+        """Handle a battle starting line.
         
+        :param att: the attacking unit, as a dictionary with unit *num*
+            and *name*, or *None* if unknown, as in assassinations.
+        :param tar: the target unit, as a dictionary with unit *num* and
+            *name*.
+        :param reg: location of the battle, as a region dictionary with
+            region *type*, *name*, *xloc*, *yloc* and, if not in
+            surface, *zloc*.
+        :param ass: *True* if it was an assassination attempt.
+        
+        """
+        self._battle = Battle(att, tar,
+                              (reg['xloc'], reg['yloc'], reg.get('zloc')),
+                              ass)
+        self._battle_side = None
+        self._battle_casualties = False
+        self._battle_loses_side = None
+        self.battles.append(self._battle)
+    
+    def battle_side(self, side):
+        """Handle a battle side marker.
+        
+        :param side: ``attacker`` or ``defender``.
+        
+        """
+        self._battle_side = side
+    
+    def battle_side_unit(self, num, name, faction=None, behind=False,
+                           items=None, skills=None):
+        """Handle a battle side unit.
+        
+        Units are kept as dictionaries with the parameters given.
+        
+        :param num: number of the unit.
+        :param name: name of the unit.
+        :param faction: dictionary with *num* and *name* of the unit
+            faction, if it's visible.
+        :param behind: *True* if the unit is behind.
+        :param items: list of items, as dictionaries.
+        :param skills: list of skills, as dictionaries.
+        
+        """
+        unit = {'num': num, 'name': name}
+        if faction:
+            unit['faction'] = faction
+        if behind:
+            unit['behind'] = True
+        if items:
+            unit['items'] = items
+        if skills:
+            unit['skills'] = skills
+        self._battle.sides[self._battle_side].append(unit)
+    
+    def battle_round(self, num, unit=None):
+        """Handle a battle round marker.
+        
+        :param num: ``free`` for free rounds, and round number for
+            normal rounds.
+        :param unit: leader unit of the side granted a free round.
+        
+        """
+        self._battle.rounds.append((num, 0, 0))
+    
+    def battle_round_shield(self, unit, shielddesc):
+        """Handle a cast shield in battle.
+        
+        :param unit: unit casting the shield, as a dictionary with
+            *num* and *name*.
+        :param shielddesc: description of the shield.
+        
+        """
+        self._battle.specials.append((len(self._battle.rounds) - 1,
+                                      unit['num'], shielddesc, 0, None,
+                                      False))
+    
+    def battle_round_special(
+            self, soldier, spelldesc, spelldesc2=None, tot=0,
+            spelltarget=None, deflected=False):
+        """Handle a special effect in battle.
+        
+        :param soldier: soldier casting the effect, as a dictionary
+            with *num* and *name*.
+        :param spelldesc: description of the spell.
+        :param spelldesc2: effect of the spell on the targets.
+        :param tot: number of targets affected.
+        :param spelltarget: description of the targets.
+        :param deflected: *True* if the effect was deflected.
+        
+        """
+        if spelldesc2:
+            spelltarget = '{} {} {}'.format(spelldesc2, tot, spelltarget)
+        self._battle.specials.append((len(self._battle.rounds) - 1,
+                                      soldier['num'], spelldesc, tot,
+                                      spelltarget, deflected))
+    
+    def battle_round_regenerate(self, soldier, regenerate, damage,
+                                   hits, maxhits):
+        """Handle regeneration/damage in battle.
+        
+        Regeneration and damage of monsters are not kept.
+        
+        """
+        pass
+    
+    def battle_loses(self, unit, loses):
+        """Handle round/battle loses.
+        
+        Loses are added to the last round, or kept as the side
+        casualties once :meth:`battle_casualties` is called.
+        
+        :param unit: leading unit of the side, as a dictionary with
+            *num* and *name*.
+        :param loses: number of casualties.
+        
+        """
+        side = self._battle.get_side(unit)
+        if side is None:
+            return
+        if self._battle_casualties:
+            self._battle.losses[side] = loses
+            self._battle_loses_side = side
+        elif self._battle.rounds:
+            num, attacker, defender = self._battle.rounds[-1]
+            if side == SIDE_ATTACKER:
+                attacker += loses
+            else:
+                defender += loses
+            self._battle.rounds[-1] = (num, attacker, defender)
+    
+    def battle_end(self, result, unit=None):
+        """Handle battle end result.
+        
+        :param result: ``destroyed``, ``routed`` or ``tie``.
+        :param unit: loser side leader unit, as a dictionary with *num*
+            and *name*.
+        
+        """
+        self._battle.result = result
+        if unit:
+            self._battle.loser = self._battle.get_side(unit)
+    
+    def battle_casualties(self):
+        """Handle battle casualties marker."""
+        self._battle_casualties = True
+    
+    def battle_casualties_heal(self, unit, heal):
+        """Handle healing after battle.
+        
+        :param unit: leading unit of the side, as a dictionary with
+            *num* and *name*.
+        :param heal: number of casualties healed.
+        
+        """
+        side = self._battle.get_side(unit)
+        if side is not None:
+            self._battle.healed[side] += heal
+    
+    def battle_casualties_units(self, units):
+        """Handle the list of damaged units.
+        
+        Units are given to the side of the last casualties reported.
+        
+        :param units: list of dictionaries with the *num* of the units.
+        
+        """
+        if self._battle_loses_side is not None:
+            self._battle.damaged[self._battle_loses_side] = \
+                [u['num'] for u in units]
+    
+    def battle_spoils(self, items):
+        """Handle battle spoils.
+        
+        :param items: list of items, as dictionaries with *abr* and
+            *amt*.
+        
+        """
+        self._battle.spoils = [(it['abr'], it['amt']) for it in items]
+    
+    def battle_raise(self, undead, unit=None):
+        """Handle battle raised undead.
+        
+        :param undead: list of undead items, as dictionaries with *abr*
+            and *amt*.
+        :param unit: wandering unit the undead join, if any.
+        
+        """
+        self._battle.raised = [(it['abr'], it['amt']) for it in undead]
+    
     # Methods handling definitions
     def update_item_definitions(self, items):
         pass
     
     def update_structure_definitions(self, structure_type, ship=False):
-        pass
\ No newline at end of file
+        """Keep track of structure types not defined.
+        
+        A structure type is known if it's defined in the report or in
+        the rules. Unknown types are added to :attr:`unknown_structures`,
+        and removed from it once defined.
+        
+        :param structure_type: name of the structure type.
+        :param ship: *True* if the structure is a ship.
+        
+        """
+        known = structure_type in self.structures or \
+            structure_type in self.rules.structures
+        if known and structure_type in self.unknown_structures:
+            self.unknown_structures.remove(structure_type)
+        elif not known and structure_type not in self.unknown_structures:
+            self.unknown_structures.append(structure_type)
\ No newline at end of file
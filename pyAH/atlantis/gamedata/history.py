@@ -0,0 +1,283 @@
+"""Keeps the history of map regions, turn after turn.
+
+A :class:`~atlantis.gamedata.map.Map` only holds the last known version
+of each hex. :class:`TurnHistory` stores every version of every region
+reported, turn by turn, in a :mod:`sqlite3` database, so questions
+about how regions evolved can be answered without loading old turns
+into memory.
+
+Each region version is stored as a row of the ``regions`` table, keyed
+by level name, hex coordinates and turn. Economic values usually looked
+at (population, wealth, entertainment, town, markets and products) have
+their own columns, so they can be queried directly, while the whole
+:class:`~atlantis.gamedata.region.Region` is kept as json.
+
+Turns are given as (*year*, *month*) tuples, as
+:class:`~atlantis.gamedata.map.MapHex` ``last_seen`` attribute. First
+turn is ``(1, 1)``.
+
+"""
+
+from atlantis.gamedata.map import HEX_CURRENT
+from atlantis.gamedata.region import Region
+from atlantis.helpers.json import json_dumps, json_loads
+
+import json
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS regions (
+    level TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    terrain TEXT,
+    name TEXT,
+    population INTEGER,
+    racenames TEXT,
+    wealth INTEGER,
+    town TEXT,
+    entertainment INTEGER,
+    market TEXT,
+    products TEXT,
+    region TEXT NOT NULL,
+    PRIMARY KEY (level, x, y, turn));
+CREATE INDEX IF NOT EXISTS regions_turn ON regions (turn);
+"""
+
+# Json columns are compared as text, so they're always written by the
+# same encoder, whatever the json backend selected
+_json_column = json.JSONEncoder(sort_keys=True).encode
+
+# Columns that can be queried by TurnHistory methods
+_FIELDS = ('status', 'terrain', 'name', 'population', 'racenames', 'wealth',
+           'town', 'entertainment', 'market', 'products')
+
+# Columns holding json values
+_JSON_FIELDS = ('town', 'market', 'products')
+
+def _turn_number(turn):
+    """Return the ordinal of a (*year*, *month*) turn, starting at 1."""
+    year, month = turn
+    return (year - 1) * 12 + month
+
+def _turn_tuple(number):
+    """Return the (*year*, *month*) turn of an ordinal."""
+    return ((number - 1) // 12 + 1, (number - 1) % 12 + 1)
+
+def _level_name(level):
+    """Return the level name of a location *z* value."""
+    if not level:
+        return 'surface'
+    return level
+
+
+class TurnHistory():
+    """Stores region versions of every turn in a sqlite database.
+    
+    Typical usage is adding the map of each turn once the report has
+    been read, and then querying for region values::
+    
+        history = TurnHistory('history.db')
+        history.add_map((3, 7), game_data.map)
+        for turn, wealth in history.get_field_history(
+                (21, 93, None), 'wealth', last=20):
+            print(turn, wealth)
+        history.close()
+    
+    """
+    
+    def __init__(self, file_name=':memory:'):
+        """Open a :class:`TurnHistory` database.
+        
+        The database is created if it doesn't exist.
+        
+        :param file_name: name of the sqlite database file. By default
+            an in memory database is used.
+        
+        """
+        self._connection = sqlite3.connect(file_name)
+        self._connection.executescript(_SCHEMA)
+    
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+    
+    def add_map(self, turn, m, statuses=(HEX_CURRENT,)):
+        """Record regions of a turn map.
+        
+        Only hexes whose information is from the given turn are
+        recorded by default. Regions already recorded for the same
+        turn are replaced.
+        
+        :param turn: turn of the map as a (*year*, *month*) tuple.
+        :param m: :class:`~atlantis.gamedata.map.Map` object.
+        :param statuses: status of the hexes recorded.
+        
+        """
+        number = _turn_number(turn)
+        rows = []
+        for level_name, level in m.levels.items():
+            for (x, y), mh in level.hexes.items():
+                if mh.status in statuses:
+                    rows.append(self._region_row(level_name, x, y, number,
+                                                 mh.status, mh.region))
+        with self._connection:
+            self._connection.executemany(
+                    'INSERT OR REPLACE INTO regions VALUES '
+                    '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    
+    @staticmethod
+    def _region_row(level, x, y, turn, status, region):
+        """Return the table row of a region."""
+        json_object = region.json_serialize()
+        
+        def dumps(key):
+            if key not in json_object:
+                return None
+            return _json_column(json_object[key])
+        
+        return (level, x, y, turn, status, region.terrain, region.name,
+                region.population, region.racenames, region.wealth,
+                dumps('town'), json_object.get('entertainment'),
+                dumps('market'), dumps('products'),
+                json_dumps(json_object))
+    
+    def get_turns(self):
+        """Return recorded turns.
+        
+        :return: list of (*year*, *month*) tuples, in order.
+        
+        """
+        return [_turn_tuple(t) for (t,) in self._connection.execute(
+                'SELECT DISTINCT turn FROM regions ORDER BY turn')]
+    
+    def get_last_turn(self):
+        """Return last recorded turn.
+        
+        :return: a (*year*, *month*) tuple, or *None* if no turn has
+            been recorded.
+        
+        """
+        (number,) = self._connection.execute(
+                'SELECT MAX(turn) FROM regions').fetchone()
+        if number is None:
+            return None
+        return _turn_tuple(number)
+    
+    def get_region(self, location, turn=None):
+        """Return a region as it was in a turn.
+        
+        :param location: three elements tuple with the location of the
+            region.
+        :param turn: turn as a (*year*, *month*) tuple. If *None* the
+            last recorded version of the region is returned.
+        
+        :return: a :class:`~atlantis.gamedata.region.Region` object,
+            or *None* if the region wasn't recorded that turn.
+        
+        """
+        x, y, level = location
+        if turn is None:
+            row = self._connection.execute(
+                    'SELECT region FROM regions '
+                    'WHERE level = ? AND x = ? AND y = ? '
+                    'ORDER BY turn DESC LIMIT 1',
+                    (_level_name(level), x, y)).fetchone()
+        else:
+            row = self._connection.execute(
+                    'SELECT region FROM regions '
+                    'WHERE level = ? AND x = ? AND y = ? AND turn = ?',
+                    (_level_name(level), x, y, _turn_number(turn))).fetchone()
+        if row is None:
+            return None
+        return Region.json_loadb(row[0])
+    
+    def get_field_history(self, location, field, last=None):
+        """Return the values a region field had along the turns.
+        
+        :param location: three elements tuple with the location of the
+            region.
+        :param field: name of the field. Allowed fields are *status*,
+            *terrain*, *name*, *population*, *racenames*, *wealth*,
+            *town*, *entertainment*, *market* and *products*. Values of
+            *town*, *market* and *products* are returned as their json
+            serialization.
+        :param last: if given, only values of the last *last* turns,
+            counted back from the last recorded turn, are returned.
+        
+        :return: list of (*turn*, *value*) tuples, in turn order.
+        
+        :raise: :class:`KeyError` if *field* is not allowed.
+        
+        """
+        if field not in _FIELDS:
+            raise KeyError('{}: field not recorded'.format(field))
+        x, y, level = location
+        query = 'SELECT turn, {} FROM regions ' \
+                'WHERE level = ? AND x = ? AND y = ?'.format(field)
+        params = [_level_name(level), x, y]
+        if last:
+            query += ' AND turn > (SELECT MAX(turn) FROM regions) - ?'
+            params.append(last)
+        query += ' ORDER BY turn'
+        
+        result = []
+        for turn, value in self._connection.execute(query, params):
+            if field in _JSON_FIELDS and value is not None:
+                value = json_loads(value)
+            result.append((_turn_tuple(turn), value))
+        return result
+    
+    def get_changed(self, field, turn=None):
+        """Return regions with a field changed in a turn.
+        
+        A region is changed in a turn if the value recorded that turn
+        is different from the value in the previous version of the
+        region recorded. Regions recorded for the first time are not
+        changed.
+        
+        :param field: name of the field, as in
+            :meth:`get_field_history`.
+        :param turn: turn as a (*year*, *month*) tuple. If *None* last
+            recorded turn is used.
+        
+        :return: list of locations (three elements tuples) of the
+            changed regions.
+        
+        :raise: :class:`KeyError` if *field* is not allowed.
+        
+        """
+        if field not in _FIELDS:
+            raise KeyError('{}: field not recorded'.format(field))
+        if turn is None:
+            turn = self.get_last_turn()
+            if turn is None:
+                return []
+        query = 'SELECT a.level, a.x, a.y FROM regions AS a ' \
+                'JOIN regions AS b ' \
+                'ON b.level = a.level AND b.x = a.x AND b.y = a.y ' \
+                'AND b.turn = (SELECT MAX(c.turn) FROM regions AS c ' \
+                '              WHERE c.level = a.level AND c.x = a.x ' \
+                '              AND c.y = a.y AND c.turn < a.turn) ' \
+                'WHERE a.turn = ? AND a.{0} IS NOT b.{0} ' \
+                'ORDER BY a.level, a.x, a.y'.format(field)
+        return [(x, y, None if level == 'surface' else level) \
+                for level, x, y in self._connection.execute(
+                        query, (_turn_number(turn),))]
+    
+    def get_market_changes(self, turn=None):
+        """Return regions whose market changed in a turn.
+        
+        :param turn: turn as a (*year*, *month*) tuple. If *None* last
+            recorded turn is used.
+        
+        :return: list of locations (three elements tuples) of the
+            regions.
+        
+        .. seealso::
+           :meth:`get_changed`
+        
+        """
+        return self.get_changed('market', turn)
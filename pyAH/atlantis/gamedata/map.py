@@ -64,6 +64,15 @@ constant values:
 .. attribute:: SEEN_CURRENT
 
    Used for ``when`` attributes when info is current.
+
+.. attribute:: MERGE_KEEP
+
+   Conflict policy of :meth:`Map.merge` keeping the hex already in the
+   map.
+
+.. attribute:: MERGE_REPLACE
+
+   Conflict policy of :meth:`Map.merge` taking the hex being merged.
    
 .. attribute:: LEVEL_NEXUS
 
@@ -88,10 +97,15 @@ constant values:
 Main class defined in this module is
 :class:`~atlantis.gamedata.map.Map`, the class that holds data from
 all map levels and handle all the internals of map viewing logic. Other
-classes are :class:`~atlantis.gamedata.map.MapLevel` and
-:class:`~atlantis.gamedata.map.MapHex`. All classes implement
+classes are :class:`~atlantis.gamedata.map.MapLevel`,
+:class:`~atlantis.gamedata.map.MapHex` and
+:class:`~atlantis.gamedata.map.MergeStats`, which tells what
+:meth:`Map.merge` did. All classes implement
 :class:`~atlantis.helper.json.JsonSerializable` and
-:class:`~atlantis.helper.comparable.RichComparable` interfaces.
+:class:`~atlantis.helper.comparable.RichComparable` interfaces, and
+:class:`~atlantis.gamedata.map.MapHex` is also
+:class:`~atlantis.helpers.comparable.ContentHashable`, so checking if
+a hex changed between two maps is usually just comparing two hashes.
 
 """
 
@@ -99,8 +113,9 @@ from atlantis.gamedata.region import Region
 from atlantis.gamedata.rules import DIR_NORTH, DIR_NORTHEAST, DIR_SOUTHEAST, \
     DIR_SOUTH, DIR_SOUTHWEST, DIR_NORTHWEST
 
-from atlantis.helpers.json import JsonSerializable
-from atlantis.helpers.comparable import RichComparable # For testing
+from atlantis.helpers.json import JsonSerializable, JsonStreamReader, \
+    json_dumps
+from atlantis.helpers.comparable import ContentHashable, RichComparable
 
 import re
 
@@ -111,9 +126,32 @@ LEVEL_NEXUS, LEVEL_SURFACE, LEVEL_UNDERWORLD, LEVEL_UNDERDEEP, LEVEL_ABYSS = \
 
 SEEN_CURRENT = (0, 0)
 
+MERGE_KEEP, MERGE_REPLACE = range(2)
+
+# Rank of SEEN_CURRENT when the turn is not known, newer than any turn
+_SEEN_NEWEST = (float('inf'), 0)
+
+def _seen_rank(last_seen, turn):
+    """Return *last_seen* to be ranked, ``SEEN_CURRENT`` as *turn*."""
+    last_seen = tuple(last_seen)
+    if last_seen == SEEN_CURRENT:
+        return turn or _SEEN_NEWEST
+    return last_seen
+
+def level_name(location):
+    """Return the name of the level of a location.
+    
+    :param location: (*x*, *y*, *z*) location, where *z* is *None* for
+        the surface.
+    
+    :return: name of the level, as used as key of :attr:`Map.levels`.
+    
+    """
+    return location[2] or 'surface'
+
 #from atlantis.gamedata.region import Region
 
-class MapHex(JsonSerializable, RichComparable):
+class MapHex(JsonSerializable, ContentHashable):
     """Holds the information of an hex in Atlantis PBEM map.
     
     :class:`~atlantis.gamedata.map.MapHex` differs from
@@ -205,6 +243,15 @@ class MapHex(JsonSerializable, RichComparable):
         else:
             return False
     
+    # ContentHashable methods
+    def _content(self):
+        """Return the content hashed, all but the region."""
+        return [self.status, self.last_seen]
+    
+    def _content_children(self):
+        """Return the region."""
+        return (self.region,)
+    
     # JsonSerializable methods
     def json_serialize(self):
         """Return a serializable version of :class:`MapHex`.
@@ -266,7 +313,10 @@ class MapLevel(JsonSerializable, RichComparable):
     
     .. attribute:: hexes
     
-       Dictionary of :class:`~atlantis.gamedata.map.MapHex` objects.
+       Dictionary of :class:`~atlantis.gamedata.map.MapHex` objects,
+       keyed by their (x, y) location. Levels of maps opened with
+       :func:`~atlantis.gamedata.snapshot.open_map` have a mapping
+       that reads hexes when they're first accessed instead.
     
     .. attribute:: level_type
     
@@ -490,6 +540,78 @@ class MapLevel(JsonSerializable, RichComparable):
                             [MapHex.json_deserialize(ob) \
                              for ob in json_object['hexes']]])
         return ml
+    
+    def json_dump_stream(self, file):
+        """Write :class:`MapLevel` as json, one hex at a time.
+        
+        Output is the same json document :meth:`json_serialize` would
+        produce, with hexes written by
+        :func:`~atlantis.helpers.json.json_dumps`, but only one hex is
+        serialized in memory at a time.
+        
+        :param file: file-like object where the json will be saved into.
+        
+        """
+        file.write('{"name": ' + json_dumps(self.name) + ', "hexes": [')
+        separator = ''
+        for mh in self.hexes.values():
+            file.write(separator)
+            file.write(json_dumps(mh.json_serialize()))
+            separator = ', '
+        file.write(']}')
+
+class MergeStats():
+    """Counts what :meth:`Map.merge` did with merged hexes.
+    
+    :class:`MergeStats` has the following public attributes, all of
+    them hex counts:
+    
+    .. attribute:: added
+    
+       Hexes that were not in the map.
+    
+    .. attribute:: replaced
+    
+       Hexes that replaced the ones in the map, as they had better
+       data.
+    
+    .. attribute:: kept
+    
+       Hexes discarded, as the map had better or the same data.
+    
+    .. attribute:: conflicts
+    
+       Hexes with different data as good as the data in the map. They
+       are also counted as *replaced* or *kept*, following the conflict
+       policy.
+    
+    .. attribute:: demoted
+    
+       Current hexes made old by :meth:`Map.age`, when merging with
+       :meth:`Map.merge_turn`.
+    
+    Stats are added with ``+=``.
+    
+    """
+    
+    def __init__(self):
+        """Create a :class:`MergeStats` with all counts at zero."""
+        self.added = self.replaced = self.kept = self.conflicts = 0
+        self.demoted = 0
+    
+    def __iadd__(self, other):
+        """Add counts of *other* stats."""
+        self.added += other.added
+        self.replaced += other.replaced
+        self.kept += other.kept
+        self.conflicts += other.conflicts
+        self.demoted += other.demoted
+        return self
+    
+    def __repr__(self):
+        return ('MergeStats(added={}, replaced={}, kept={}, conflicts={}, '
+                'demoted={})').format(self.added, self.replaced, self.kept,
+                                      self.conflicts, self.demoted)
 
 class Map(JsonSerializable, RichComparable):
     """Holds all data of Atlantis PBEM map.
@@ -587,6 +709,144 @@ class Map(JsonSerializable, RichComparable):
             
         return self.levels[level_name]
     
+    def age(self, last_turn=None):
+        """Make current hexes old.
+        
+        Called when a new turn begins, before merging the new turn
+        reports. Hexes with ``HEX_CURRENT`` status are changed to
+        ``HEX_OLD``.
+        
+        :param last_turn: turn current hexes were seen, as a (*year*,
+            *month*) tuple. If given, it's set as ``last_seen`` of hexes
+            with ``SEEN_CURRENT`` value.
+        
+        :return: number of hexes made old.
+        
+        """
+        demoted = 0
+        for level in self.levels.values():
+            for mh in level.hexes.values():
+                if mh.status == HEX_CURRENT:
+                    mh.status = HEX_OLD
+                    if last_turn and mh.last_seen == SEEN_CURRENT:
+                        mh.last_seen = tuple(last_turn)
+                    demoted += 1
+        return demoted
+    
+    def merge(self, other, turn=None, policy=MERGE_KEEP):
+        """Merge the hexes of another map into this one.
+        
+        Hexes of *other* missing in this map are added. Hexes in both
+        maps are ranked by their status, ``HEX_CURRENT`` first and
+        ``HEX_EXITS`` last, and then by ``last_seen``, taking
+        ``SEEN_CURRENT`` as *turn* or, if not given, as the newest turn.
+        The best ranked hex is kept. If both hexes are ranked the same
+        and have different data, *policy* solves the conflict.
+        
+        Only levels in *other* are walked, and hexes are compared by
+        their content hash, so merging a turn report into a big map is
+        fast. Regions of *other* are not copied but shared by both maps.
+        
+        :param other: :class:`Map` to be merged, as the map of a turn
+            report or the map of an allied faction.
+        :param turn: turn of *other*, as a (*year*, *month*) tuple. If
+            given, it's set as ``last_seen`` of *other* hexes with
+            ``SEEN_CURRENT`` value.
+        :param policy: ``MERGE_KEEP`` to keep hexes in this map,
+            ``MERGE_REPLACE`` to replace them with hexes in *other*, or
+            a function called with both conflicting
+            :class:`MapHex` objects, the one in this map first, that
+            returns the one to keep.
+        
+        :return: a :class:`MergeStats` object.
+        
+        """
+        stats = MergeStats()
+        turn = tuple(turn) if turn else None
+        for name, other_level in other.levels.items():
+            try:
+                hexes = self.levels[name].hexes
+            except KeyError:
+                hexes = self.get_level(name).hexes
+            for location, other_mh in other_level.hexes.items():
+                last_seen = other_mh.last_seen
+                if turn and last_seen == SEEN_CURRENT:
+                    last_seen = turn
+                old = hexes.get(location)
+                if old is None:
+                    hexes[location] = MapHex(other_mh.region,
+                                             other_mh.status, last_seen)
+                    stats.added += 1
+                    continue
+                new_rank = (other_mh.status, _seen_rank(last_seen, turn))
+                old_rank = (old.status, _seen_rank(old.last_seen, turn))
+                tie = new_rank == old_rank
+                if new_rank < old_rank or \
+                        (tie and old.region == other_mh.region):
+                    stats.kept += 1
+                    continue
+                new = MapHex(other_mh.region, other_mh.status, last_seen)
+                if tie:
+                    stats.conflicts += 1
+                    if policy == MERGE_KEEP:
+                        new = old
+                    elif policy != MERGE_REPLACE:
+                        new = policy(old, new)
+                if new is old:
+                    stats.kept += 1
+                else:
+                    hexes[location] = new
+                    stats.replaced += 1
+        return stats
+    
+    def merge_turn(self, maps, turn, policy=MERGE_KEEP):
+        """Merge the maps of a new turn.
+        
+        Current hexes are made old with :meth:`age`, and then every map
+        in *maps* is merged with :meth:`merge`. So reports of several
+        factions for the same turn can be merged at once into an
+        alliance map. Hexes not refreshed by *maps* are left old, and
+        those with ``SEEN_CURRENT`` value are set as seen the turn
+        before *turn*.
+        
+        :param maps: list of :class:`Map` objects read from the turn
+            reports.
+        :param turn: new turn, as a (*year*, *month*) tuple.
+        :param policy: conflict policy, as in :meth:`merge`.
+        
+        :return: a :class:`MergeStats` object, with the sum of all the
+            merges.
+        
+        """
+        year, month = turn
+        if month > 1:
+            last_turn = (year, month - 1)
+        elif year > 1:
+            last_turn = (year - 1, 12)
+        else:
+            last_turn = None
+        stats = MergeStats()
+        stats.demoted = self.age(last_turn)
+        for m in maps:
+            stats += self.merge(m, turn, policy)
+        return stats
+    
+    def compact_reports(self):
+        """Compact report lines of every region and structure.
+        
+        Report lines are kept compressed until requested, see
+        :class:`~atlantis.gamedata.description.ReportDescription`.
+        Big maps take much less memory, and are saved to smaller json
+        files.
+        
+        """
+        for level in self.levels.values():
+            for mh in level.hexes.values():
+                region = mh.region
+                region.compact_report()
+                for s in getattr(region, 'structures', {}).values():
+                    s.compact_report()
+    
     # JsonSerializable methods
     def json_serialize(self):
         """Return a serializable version of :class:`Map`.
@@ -615,4 +875,73 @@ class Map(JsonSerializable, RichComparable):
         m = Map()
         m.levels = dict([(k, MapLevel.json_deserialize(ob)) \
                          for (k, ob) in json_object['levels'].items()])
+        return m
+    
+    def json_dump_stream(self, file):
+        """Write :class:`Map` as json, streaming levels and hexes.
+        
+        The json document written is the same one :meth:`json_serialize`
+        would produce, so it can be read back by :meth:`json_deserialize`
+        as well as by :meth:`json_load_stream`. But the whole document is
+        never built in memory: hexes are serialized and written one by
+        one.
+        
+        :param file: file-like object where the json will be saved into.
+        
+        """
+        file.write('{"levels": {')
+        separator = ''
+        for name, level in self.levels.items():
+            file.write(separator + json_dumps(name) + ': ')
+            level.json_dump_stream(file)
+            separator = ', '
+        file.write('}}')
+    
+    @staticmethod
+    def json_iter_hexes(file):
+        """Read hexes from a json map file one at a time.
+        
+        Reads a json document written by :meth:`json_dump_stream` or
+        from :meth:`json_serialize` data, building each
+        :class:`MapHex` only when it's reached. Memory used doesn't
+        depend on the map size.
+        
+        :param file: file-like object where json data will be read from.
+        
+        :return: an iterator of (*level name*, :class:`MapHex`) tuples.
+        
+        """
+        reader = JsonStreamReader(file)
+        for key in reader.iter_object():
+            if key != 'levels':
+                reader.read_value()
+                continue
+            for name in reader.iter_object():
+                for level_key in reader.iter_object():
+                    if level_key != 'hexes':
+                        reader.read_value()
+                        continue
+                    for dummy in reader.iter_array():
+                        yield (name, MapHex.json_deserialize(
+                                reader.read_value()))
+    
+    @staticmethod
+    def json_load_stream(file):
+        """Load :class:`Map` from a json file, one hex at a time.
+        
+        Unlike :meth:`json_deserialize`, no json representation of the
+        whole map is held in memory: only the resulting :class:`Map` is.
+        
+        :param file: file-like object where json data will be read from.
+        
+        :return: the :class:`Map` object from json data.
+        
+        """
+        m = Map()
+        for name, mh in Map.json_iter_hexes(file):
+            try:
+                level = m.levels[name]
+            except KeyError:
+                level = m.levels[name] = MapLevel(name)
+            level.hexes[tuple(mh.region.location[:2])] = mh
         return m
\ No newline at end of file
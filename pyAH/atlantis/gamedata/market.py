@@ -0,0 +1,192 @@
+"""Inverted index of region markets.
+
+Each :class:`~atlantis.gamedata.region.Region` has its own *market*,
+with lists of :class:`~atlantis.gamedata.item.ItemMarket` sold and
+bought there. Trade planning asks the other way round: where can an
+item be sold, at which price, and how far from here.
+
+:class:`MarketIndex` keeps, for every item and market side, the offers
+of all regions sorted best first, so offers in a price range, or the
+best ones, are found by bisection without looking at any other region.
+Offers with the same price are kept in the order they're added. It's
+filled region by region, as
+:class:`~atlantis.gamedata.gamedata.GameData` reads market reports, or
+from a whole :class:`~atlantis.gamedata.map.Map`.
+
+Offers are (*location*, *market*, *amount*, *price*) tuples, where
+*market* is ``sell`` for items players can sell to the region, and
+``buy`` for items players can buy from it, as in
+:meth:`Region.set_market <atlantis.gamedata.region.Region.set_market>`.
+
+"""
+
+from atlantis.gamedata.map import level_name
+from atlantis.helpers.hex_math import hex_distance
+
+import bisect
+
+def _key(market, price):
+    """Return the sort key of a price, lower keys being better offers."""
+    return -price if market == 'sell' else price
+
+class MarketIndex():
+    """Index of market offers by item."""
+    
+    def __init__(self):
+        """Create an empty :class:`MarketIndex`."""
+        # Sort keys and offers, best first, keyed by item and market
+        self._offers = dict()
+        # Items, amounts and prices indexed, keyed by location and market
+        self._markets = dict()
+    
+    @staticmethod
+    def from_map(m):
+        """Create a :class:`MarketIndex` with the markets of a map.
+        
+        :param m: :class:`~atlantis.gamedata.map.Map` object.
+        
+        :return: the new :class:`MarketIndex`.
+        
+        """
+        index = MarketIndex()
+        for level in m.levels.values():
+            for mh in level.hexes.values():
+                index.add_region(mh.region)
+        return index
+    
+    def add_region(self, region):
+        """Index all the markets of a region.
+        
+        :param region: :class:`~atlantis.gamedata.region.Region` object.
+        
+        """
+        for market, items in getattr(region, 'market', {}).items():
+            self.add_market(region.location, market, items)
+    
+    def add_market(self, location, market, items):
+        """Index a market of a region.
+        
+        Offers indexed before for the same region and market are
+        replaced.
+        
+        :param location: region location, as a three elements tuple.
+        :param market: market type, ``sell`` or ``buy``.
+        :param items: list of :class:`~atlantis.gamedata.item.ItemMarket`
+            objects.
+        
+        """
+        location = tuple(location)
+        self.remove_market(location, market)
+        for it in items:
+            try:
+                keys, offers = self._offers[(it.abr, market)]
+            except KeyError:
+                keys, offers = self._offers[(it.abr, market)] = ([], [])
+            key = _key(market, it.price)
+            i = bisect.bisect_right(keys, key)
+            keys.insert(i, key)
+            offers.insert(i, (location, market, it.amt, it.price))
+        self._markets[(location, market)] = [(it.abr, it.amt, it.price) \
+                                             for it in items]
+    
+    def remove_market(self, location, market):
+        """Remove the offers of a region market.
+        
+        :param location: region location, as a three elements tuple.
+        :param market: market type, ``sell`` or ``buy``.
+        
+        """
+        location = tuple(location)
+        for abr, amt, price in self._markets.pop((location, market), ()):
+            keys, offers = self._offers[(abr, market)]
+            i = bisect.bisect_left(keys, _key(market, price))
+            while offers[i][0] != location:
+                i += 1
+            del keys[i]
+            del offers[i]
+    
+    def get_offers(self, location, market):
+        """Return the offers indexed of a region market.
+        
+        :param location: region location, as a three elements tuple.
+        :param market: market type, ``sell`` or ``buy``.
+        
+        :return: list of (*abr*, *amount*, *price*) tuples, in the order
+            they were added.
+        
+        """
+        return list(self._markets.get((tuple(location), market), ()))
+    
+    def get_locations(self, market):
+        """Return the locations of the regions with offers in a market.
+        
+        :param market: market type, ``sell`` or ``buy``.
+        
+        :return: list of locations, in the order they were added.
+        
+        """
+        return [location for (location, m), offers in self._markets.items() \
+                if m == market and offers]
+    
+    def get_items(self, market):
+        """Return the items with offers in a market side.
+        
+        :param market: market type, ``sell`` or ``buy``.
+        
+        :return: sorted list of item abbreviatures.
+        
+        """
+        return sorted([abr for (abr, m), (keys, offers) \
+                       in self._offers.items() if m == market and keys])
+    
+    def find(self, abr, market, min_price=None, max_price=None, top=None,
+             near=None, distance=None, width=None):
+        """Find offers of an item.
+        
+        Offers are returned best first: higher prices first for the
+        ``sell`` market, where players sell the item, and lower prices
+        first for the ``buy`` market. Offers with the same price are
+        returned in the order they were added.
+        
+        :param abr: item abbreviature.
+        :param market: market type, ``sell`` or ``buy``.
+        :param min_price: if given, minimum price of the offers.
+        :param max_price: if given, maximum price of the offers.
+        :param top: if given, maximum number of offers returned.
+        :param near: if given, only offers in the level of this location
+            are returned.
+        :param distance: if given with *near*, maximum distance in
+            hexes from *near* to the offers returned.
+        :param width: width of the level of *near*, if it wraps
+            horizontally, as in
+            :func:`~atlantis.helpers.hex_math.hex_distance`.
+        
+        :return: list of (*location*, *market*, *amount*, *price*)
+            tuples.
+        
+        """
+        try:
+            keys, offers = self._offers[(abr, market)]
+        except KeyError:
+            return []
+        if market == 'sell':
+            min_price, max_price = max_price, min_price
+        lo = 0 if min_price is None else \
+            bisect.bisect_left(keys, _key(market, min_price))
+        hi = len(keys) if max_price is None else \
+            bisect.bisect_right(keys, _key(market, max_price))
+        if near is not None:
+            level = level_name(near)
+        found = []
+        for i in range(lo, hi):
+            offer = offers[i]
+            if near is not None:
+                location = offer[0]
+                if level_name(location) != level or \
+                        (distance is not None and
+                         hex_distance(near, location, width) > distance):
+                    continue
+            found.append(offer)
+            if top and len(found) == top:
+                break
+        return found
@@ -0,0 +1,190 @@
+"""Index of region production.
+
+Each :class:`~atlantis.gamedata.region.Region` reports the items that
+can be produced there, in its *products* list. :class:`ProductionIndex`
+indexes those products by item, so questions as where's the nearest
+iron, or how much wood can be produced in the world, are answered
+without walking the map.
+
+Products are kept by item and level, with the terrain of their region
+and the status of its hex, so both current and old hexes can be asked
+for. Totals per item, level and terrain are kept up to date as regions
+are added, so totals are a lookup.
+
+Regions are indexed with the hex status they have when added, so a
+:class:`ProductionIndex` built from a map must be rebuilt, or its
+regions added again, after :meth:`Map.age
+<atlantis.gamedata.map.Map.age>` or :meth:`Map.merge
+<atlantis.gamedata.map.Map.merge>`.
+
+"""
+
+from atlantis.gamedata.map import HEX_CURRENT, HEX_OLD, level_name
+from atlantis.helpers.hex_math import hex_distance
+
+import heapq
+
+class ProductionIndex():
+    """Index of region products by item."""
+    
+    def __init__(self):
+        """Create an empty :class:`ProductionIndex`."""
+        # (location, amount, terrain, status) keyed by item, level and
+        # location
+        self._products = dict()
+        # Items indexed, keyed by location
+        self._regions = dict()
+        # Total amounts, keyed by item, level and terrain
+        self._totals = dict()
+    
+    @staticmethod
+    def from_map(m):
+        """Create a :class:`ProductionIndex` with the products of a map.
+        
+        Only current and old hexes are indexed.
+        
+        :param m: :class:`~atlantis.gamedata.map.Map` object.
+        
+        :return: the new :class:`ProductionIndex`.
+        
+        """
+        index = ProductionIndex()
+        for level in m.levels.values():
+            for mh in level.hexes.values():
+                if mh.status in (HEX_CURRENT, HEX_OLD):
+                    index.add_region(mh.region, mh.status)
+        return index
+    
+    def add_region(self, region, status=HEX_CURRENT):
+        """Index the products of a region.
+        
+        :param region: :class:`~atlantis.gamedata.region.Region` object.
+        :param status: status of the region hex, ``HEX_CURRENT`` or
+            ``HEX_OLD``.
+        
+        """
+        self.add_products(region.location, region.terrain,
+                          getattr(region, 'products', ()), status)
+    
+    def add_products(self, location, terrain, products, status=HEX_CURRENT):
+        """Index the products of a region.
+        
+        Products indexed before for the same region are replaced.
+        
+        :param location: region location, as a three elements tuple.
+        :param terrain: terrain type of the region.
+        :param products: list of :class:`~atlantis.gamedata.item.ItemAmount`
+            objects.
+        :param status: status of the region hex, ``HEX_CURRENT`` or
+            ``HEX_OLD``.
+        
+        """
+        location = tuple(location)
+        self.remove_region(location)
+        level = level_name(location)
+        for it in products:
+            try:
+                levels = self._products[it.abr]
+            except KeyError:
+                levels = self._products[it.abr] = dict()
+            try:
+                indexed = levels[level]
+            except KeyError:
+                indexed = levels[level] = dict()
+            indexed[location] = (location, it.amt, terrain, status)
+            key = (it.abr, level, terrain)
+            self._totals[key] = self._totals.get(key, 0) + it.amt
+        self._regions[location] = [it.abr for it in products]
+    
+    def remove_region(self, location):
+        """Remove the products of a region.
+        
+        :param location: region location, as a three elements tuple.
+        
+        """
+        location = tuple(location)
+        level = level_name(location)
+        for abr in self._regions.pop(location, ()):
+            indexed = self._products[abr][level]
+            loc, amt, terrain, status = indexed.pop(location)
+            key = (abr, level, terrain)
+            self._totals[key] -= amt
+    
+    def get_items(self):
+        """Return the items produced in any region.
+        
+        :return: sorted list of item abbreviatures.
+        
+        """
+        return sorted(set([abr for (abr, level, terrain), amt \
+                           in self._totals.items() if amt]))
+    
+    def total(self, abr, level=None, terrain=None):
+        """Return the total amount of an item that can be produced.
+        
+        :param abr: item abbreviature.
+        :param level: if given, only regions in this level are counted.
+        :param terrain: if given, only regions of this terrain type are
+            counted.
+        
+        :return: total amount of the item.
+        
+        """
+        return sum([amt for (a, l, t), amt in self._totals.items() \
+                    if a == abr and (level is None or l == level) and \
+                        (terrain is None or t == terrain)])
+    
+    def find(self, abr, level=None, terrain=None, status=None,
+             min_amount=1):
+        """Find regions producing an item.
+        
+        :param abr: item abbreviature.
+        :param level: if given, only regions in this level are returned.
+        :param terrain: if given, only regions of this terrain type are
+            returned.
+        :param status: if given, only regions whose hex has this status
+            are returned.
+        :param min_amount: minimum amount produced in the regions.
+        
+        :return: list of (*location*, *amount*, *terrain*, *status*)
+            tuples, in the order they were added.
+        
+        """
+        levels = self._products.get(abr, {})
+        if level is not None:
+            levels = {level: levels[level]} if level in levels else {}
+        return [p for products in levels.values() \
+                for p in products.values() \
+                if p[1] >= min_amount and \
+                    (terrain is None or p[2] == terrain) and \
+                    (status is None or p[3] == status)]
+    
+    def nearest(self, abr, location, top=1, exclude=(), width=None,
+                terrain=None, status=None, min_amount=1):
+        """Find the regions producing an item nearest to a location.
+        
+        Only regions in the level of *location* are looked for.
+        
+        :param abr: item abbreviature.
+        :param location: location regions are looked for from, as a
+            three elements tuple.
+        :param top: maximum number of regions returned.
+        :param exclude: container of locations not returned, as those of
+            regions already claimed.
+        :param width: width of the level, if it wraps horizontally, as
+            in :func:`~atlantis.helpers.hex_math.hex_distance`.
+        :param terrain: if given, only regions of this terrain type are
+            returned.
+        :param status: if given, only regions whose hex has this status
+            are returned.
+        :param min_amount: minimum amount produced in the regions.
+        
+        :return: list of (*distance*, *location*, *amount*, *terrain*,
+            *status*) tuples, nearest first.
+        
+        """
+        found = self.find(abr, level_name(location), terrain, status,
+                          min_amount)
+        distances = [(hex_distance(location, p[0], width), i) \
+                     for i, p in enumerate(found) if p[0] not in exclude]
+        return [(d,) + found[i] for d, i in heapq.nsmallest(top, distances)]
@@ -34,20 +34,30 @@ advantage of their riding skill.
 
 :class:`Region` also implements
 :class:`~atlantis.helpers.json.JsonSerializable` and
-:class:`~atlantis.helpers.comparable.RichComparable` interfaces.
+:class:`~atlantis.helpers.comparable.ContentHashable` interfaces, and
+its report lines can be compacted as
+:class:`~atlantis.gamedata.description.ReportDescription` explains.
 
 Further details about Atlantis PBEM objects hierarchy can be found at
 :ref:`atlantis.gamedata` package documentation.
 
 """
 
+from atlantis.gamedata.description import ReportDescription
 from atlantis.gamedata.item import ItemAmount, ItemMarket
 from atlantis.gamedata.structure import Structure
 
 from atlantis.helpers.json import JsonSerializable
-from atlantis.helpers.comparable import RichComparable # For testing
+from atlantis.helpers.comparable import ContentHashable
 
-class Region(JsonSerializable, RichComparable):
+def _direction(key):
+    """Return an exit direction, read from json as a string."""
+    try:
+        return int(key)
+    except ValueError:
+        return key
+
+class Region(JsonSerializable, ContentHashable, ReportDescription):
     """Holds all data of an Atlantis PBEM region.
     
     :class:`Region` has the following public attributes. Some attributes
@@ -57,7 +67,9 @@ class Region(JsonSerializable, RichComparable):
     
     .. attribute:: report
     
-       List of report lines describing the :class:`Region`.
+       List of report lines describing the :class:`Region`. If
+       compacted, see :meth:`compact_report`, a new list is returned
+       every time.
     
     .. attribute:: location
     
@@ -153,6 +165,19 @@ class Region(JsonSerializable, RichComparable):
        existing in :class:`Region`.
     
        .. note:: This attribute may not exist.
+    
+    .. attribute:: units
+    
+       List of :class:`~atlantis.gamedata.unit.Unit` objects in
+       :class:`Region` outside any structure. Units are turn data, so
+       they are neither saved into json nor compared.
+    
+       .. note:: This attribute may not exist.
+    
+    Setting any of these attributes, or calling the methods in this
+    class, invalidates the cached content hash used to compare
+    regions. If a nested value is changed in place, as the price of an
+    item in the market, :meth:`invalidate_content_hash` must be called.
        
     """
     
@@ -186,7 +211,7 @@ class Region(JsonSerializable, RichComparable):
         self.wealth = wealth
         self.town = town
         
-        self.report = []
+        self._report = []
         
     def append_report_description(self, line):
         """Append a new report line to item description.
@@ -194,7 +219,8 @@ class Region(JsonSerializable, RichComparable):
         :param line: report line to be appended to item description.
         
         """
-        self.report.append(line)
+        self.expand_report().append(line)
+        self.invalidate_content_hash()
     
     def pop_report_description(self):
         """Retrieve last line and remove it from item description.
@@ -202,7 +228,8 @@ class Region(JsonSerializable, RichComparable):
         :return: last line in the report description.
         
         """
-        return self.report.pop()
+        self.invalidate_content_hash()
+        return self.expand_report().pop()
     
     def set_weather(self, weather, nxtweather,
                       clearskies=False, blizzard=False):
@@ -244,6 +271,8 @@ class Region(JsonSerializable, RichComparable):
             self.market[market] = items
         except AttributeError:
             self.market = {market: items}
+        else:
+            self.invalidate_content_hash()
     
     def set_entertainment(self, amount):
         """Set region entertainment.
@@ -278,6 +307,8 @@ class Region(JsonSerializable, RichComparable):
             self.exits[direction] = location
         except AttributeError:
             self.exits = {direction: location}
+        else:
+            self.invalidate_content_hash()
     
     def set_gate(self, number, is_open):
         """Set a gate for the region.
@@ -300,6 +331,21 @@ class Region(JsonSerializable, RichComparable):
             self.structures[structure.num] = structure
         except AttributeError:
             self.structures = {structure.num: structure}
+        else:
+            self.invalidate_content_hash()
+    
+    def append_unit(self, unit):
+        """Append a :class:`~atlantis.gamedata.unit.Unit`.
+        
+        :param unit: :class:`~atlantis.gamedata.unit.Unit` outside any
+            structure to be appended to :class:`Region`.
+        
+        """
+        try:
+            self.units.append(unit)
+        except AttributeError:
+            # Units are not hashed, so the content hash is still valid
+            self.__dict__['units'] = [unit]
     
     # JsonSerializable methods
     def json_serialize(self):
@@ -318,7 +364,7 @@ class Region(JsonSerializable, RichComparable):
                        'racenames': self.racenames,
                        'wealth': self.wealth,
                        'town': self.town,
-                       'report': self.report}
+                       'report': self._report_json()}
         try:
             json_object['weather'] = self.weather
         except AttributeError:
@@ -377,33 +423,66 @@ class Region(JsonSerializable, RichComparable):
                    json_object['name'], json_object['population'],
                    json_object['racenames'], json_object['wealth'],
                    json_object['town'])
-        if 'report' in json_object.keys():
-            r.report = json_object['report']
-        if 'weather' in json_object.keys():
-            r.weather = json_object['weather']
-        if 'wages' in json_object.keys():
-            r.wages = json_object['wages']
-        if 'market' in json_object.keys():
-            r.market = dict()
+        r.json_update(json_object)
+        return r
+    
+    # ContentHashable methods
+    def _content(self):
+        """Return the content hashed, all but structures."""
+        json_object = self.json_serialize()
+        json_object.pop('structures', None)
+        # Compacted or not, the report is the same
+        json_object['report'] = self.report
+        # Their order depends on the report
+        for key in ('market', 'exits'):
+            if key in json_object:
+                json_object[key] = sorted(json_object[key].items())
+        return json_object
+    
+    def _content_children(self):
+        """Return region structures, ordered by number."""
+        try:
+            return [s for _, s in sorted(self.structures.items())]
+        except AttributeError:
+            return ()
+    
+    def json_update(self, json_object):
+        """Update region with partial serialized data.
+        
+        As with :meth:`update`, only the data given is overwritten.
+        *json_object* has the same keys :meth:`json_serialize` returns,
+        but any of them can be missing.
+        
+        :param json_object: *dict* with serialized region attributes.
+        
+        :raise: :class:`KeyError` if *json_object* has a location and
+            it's not the region location.
+        
+        """
+        if 'location' in json_object and \
+                tuple(json_object['location']) != self.location:
+            raise KeyError('Regions are not the same')
+        for key in ('terrain', 'name', 'population', 'racenames', 'wealth',
+                    'town', 'weather', 'wages', 'entertainment', 'gate'):
+            if key in json_object:
+                setattr(self, key, json_object[key])
+        if 'report' in json_object:
+            self._report_from_json(json_object['report'])
+        if 'market' in json_object:
+            self.market = dict()
             for mtype, mlist in json_object['market'].items():
-                r.market[mtype] = [ItemMarket.json_deserialize(it) \
-                                   for it in mlist]
-        if 'entertainment' in json_object.keys():
-            r.entertainment = json_object['entertainment']
-        if 'products' in json_object.keys():
-            r.products = [ItemAmount.json_deserialize(it) \
-                          for it in json_object['products']]
-        if 'exits' in json_object.keys():
-            r.exits = dict([(k, tuple(loc)) \
-                            for k, loc in json_object['exits'].items()])
-        if 'gate' in json_object.keys():
-            r.gate = json_object['gate']
-        if 'structures' in json_object.keys():
+                self.market[mtype] = [ItemMarket.json_deserialize(it) \
+                                      for it in mlist]
+        if 'products' in json_object:
+            self.products = [ItemAmount.json_deserialize(it) \
+                             for it in json_object['products']]
+        if 'exits' in json_object:
+            self.exits = dict([(_direction(k), tuple(loc)) \
+                               for k, loc in json_object['exits'].items()])
+        if 'structures' in json_object:
             structures = [Structure.json_deserialize(s) \
                           for s in json_object['structures']]
-            r.structures = dict([(s.num, s) for s in structures])
-            
-        return r
+            self.structures = dict([(s.num, s) for s in structures])
     
     def update(self, region):
         """Update region with new data.
@@ -356,6 +356,12 @@ class AtlantisRules(JsonSerializable, RichComparable):
     
        A dictionary TBC.
     
+    Directions are looked up by :meth:`get_direction` in a table built
+    from :attr:`strings` whenever they're set, as done when the rules
+    are loaded. Changes made in place, as setting a key of
+    :attr:`strings`, can't be noticed, so :meth:`update_tables` must be
+    called after them. Tables are not compared nor saved into json.
+    
     """
     
     def __init__(self, json_data=None):
@@ -384,6 +390,42 @@ class AtlantisRules(JsonSerializable, RichComparable):
             if 'strings' in json_data.keys():
                 self.strings = json_data['strings']
     
+    def __setattr__(self, name, value):
+        """Set an attribute, building the lookup tables on strings."""
+        object.__setattr__(self, name, value)
+        if name == 'strings':
+            self.update_tables()
+    
+    def __eq__(self, other):
+        """Return *True* if both rules are equal, *False* otherwise.
+        
+        Lookup tables are not compared.
+        
+        :param other: the rules current ones are compared to.
+        
+        :return: *True* if both rules are equal, *False* otherwise.
+        
+        """
+        d = dict(self.__dict__)
+        d.pop('_directions', None)
+        other_d = dict(other.__dict__)
+        other_d.pop('_directions', None)
+        return d == other_d
+    
+    def update_tables(self):
+        """Build the lookup tables again.
+        
+        Must be called after changing the rules in place.
+        
+        """
+        directions = dict()
+        for i, strings in enumerate(self.strings.get('directions', ())):
+            for dir_str in strings:
+                for key in (dir_str, dir_str.lower(), dir_str.title(),
+                            dir_str.upper()):
+                    directions[key] = i
+        self.__dict__['_directions'] = directions
+    
     def get_direction(self, dir_str):
         """Return the direction represented by a string.
         
@@ -398,10 +440,14 @@ class AtlantisRules(JsonSerializable, RichComparable):
             direction.
         
         """
-        for i in range(6):
-            if dir_str.lower() in self.strings['directions'][i]:
-                return i
-        else:
+        directions = self._directions
+        try:
+            return directions[dir_str]
+        except KeyError:
+            pass
+        try:
+            return directions[dir_str.lower()]
+        except KeyError:
             raise KeyError('{}: bad direction'.format(dir_str))
     
     def json_serialize(self):
@@ -462,10 +508,12 @@ class AtlantisRules(JsonSerializable, RichComparable):
         ar = AtlantisRules()
         
         with open(os.path.join(folder_name, 'terrain_types.json')) as f:
-            ar.terrain_types = json_load_list(f, TerrainType)
+            ar.terrain_types = dict([(t.name, t) for t in \
+                                     json_load_list(f, TerrainType)])
         
         with open(os.path.join(folder_name, 'structures.json')) as f:
-            ar.structures = json_load_list(f, StructureType)
+            ar.structures = dict([(s.name, s) for s in \
+                                  json_load_list(f, StructureType)])
         
         with open(os.path.join(folder_name, 'strings.json')) as f:
             ar.strings = json_load_dict(f)
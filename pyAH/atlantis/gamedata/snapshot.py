@@ -0,0 +1,756 @@
+"""Binary snapshots of Atlantis game maps.
+
+Game state is saved from turn to turn with :mod:`atlantis.helpers.json`
+functions, but json is slow to load for big worlds: every value is
+parsed from text, and every :class:`~atlantis.gamedata.region.Region`
+is rebuilt from a dictionary. :mod:`atlantis.gamedata.snapshot` defines
+a compact binary format for :class:`~atlantis.gamedata.map.Map` objects
+that loads much faster.
+
+A snapshot file is made of:
+
+- A header, with the ``MAGIC`` string and the format ``VERSION``.
+- A string table. Names (terrain types, region, race and item names,
+  item abbreviatures, etc.) are stored once in the table, and
+  referenced by their index everywhere else. Index 0 stands for *None*.
+- A value table. Irregular values (town, weather, wages, gate, exit
+  directions, etc.) are written once with a small tagged encoding that
+  keeps their python types, and referenced by their index. Lots of
+  regions share the same weather or exit directions, so the table is
+  small. Index 0 stands for *None*. Values are decoded the first time
+  they're used.
+- A level directory. For every level it has its name and an index
+  with the offset of each :class:`~atlantis.gamedata.map.MapHex` of
+  the level, keyed by its (x, y) location.
+- Hexes. Fields of hexes, regions, items and structures are packed
+  with :mod:`struct`, so most objects are read in a single step. Report
+  lines are stored inline, as they rarely repeat.
+
+Only map data is stored. Game rules are read from their own ruleset
+files, as :class:`~atlantis.gamedata.gamedata.GameData` does.
+
+Thanks to the level index a snapshot can be opened without reading
+its hexes: :func:`open_map` returns a
+:class:`~atlantis.gamedata.map.Map` whose levels load each
+:class:`~atlantis.gamedata.map.MapHex` the first time it's accessed,
+and keep it from then on. Viewers looking at a small part of a big
+world only pay for the hexes they show.
+
+:mod:`atlantis.gamedata.snapshot` defines the following constants:
+
+.. attribute:: MAGIC
+
+   Bytes every snapshot file starts with.
+
+.. attribute:: VERSION
+
+   Snapshot format version written by this module. Files with any
+   other version are not loaded.
+
+Public functions are :func:`dump_map`, :func:`load_map` and
+:func:`open_map`.
+
+"""
+
+from atlantis.gamedata.map import Map, MapLevel, MapHex
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.structure import Structure
+from atlantis.gamedata.item import ItemAmount, ItemMarket
+
+from collections.abc import MutableMapping
+
+import copy
+import gc
+import mmap
+import struct
+
+MAGIC = b'pyAHsnap'
+VERSION = 2
+
+_HEADER = struct.Struct('<8sH')
+_COUNT = struct.Struct('<I')
+_LEVEL = struct.Struct('<II')
+_INDEX = struct.Struct('<iiQ')
+_HEX = struct.Struct('<BiiiiIIIiIiHIIIII')
+_ITEM = struct.Struct('<IIIi')
+_MARKET_ITEM = struct.Struct('<IIIii')
+_EXIT = struct.Struct('<IiiI')
+_STRUCTURE = struct.Struct('<iIIBII')
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+
+# Optional region attributes, flagged in _HEX
+_WEATHER, _WAGES, _MARKET, _ENTERTAINMENT, _PRODUCTS, _EXITS, _GATE, \
+    _STRUCTURES = [1 << i for i in range(8)]
+
+# Boolean structure attributes, flagged in _STRUCTURE
+_STRUCTURE_FLAGS = ('about_to_decay', 'needs_maintenance', 'has_runes',
+                    'can_enter')
+
+# Tags of the generic value encoding
+_T_NONE, _T_FALSE, _T_TRUE, _T_INT, _T_FLOAT, _T_STR, _T_TUPLE, _T_LIST, \
+    _T_DICT = range(9)
+
+_IMMUTABLE = (type(None), bool, int, float, str)
+
+
+def _copier(value):
+    """Return how a value of the value table must be copied.
+    
+    Values read from the value table are shared by every object using
+    them, so mutable values must be copied before being given away.
+    
+    :param value: a value from the value table.
+    
+    :return: *None* if *value* needs no copy, or a function returning
+        a copy of *value*.
+    
+    """
+    if isinstance(value, _IMMUTABLE):
+        return None
+    elif isinstance(value, tuple):
+        if all([_copier(v) is None for v in value]):
+            return None
+    elif isinstance(value, list):
+        if all([isinstance(v, _IMMUTABLE) for v in value]):
+            return list
+    elif isinstance(value, dict):
+        if all([isinstance(v, _IMMUTABLE) for v in value.values()]):
+            return dict
+    return copy.deepcopy
+
+
+class _Writer():
+    """Serializes map objects into a snapshot body.
+    
+    Strings and values are collected in their tables while the body is
+    written, so tables are only complete once every object has been
+    written.
+    
+    """
+    
+    def __init__(self):
+        """Create an empty :class:`_Writer`."""
+        self.strings = {None: 0}
+        self.values = {None: 0}
+        self.value_chunks = []
+        self.chunks = []
+    
+    def ref(self, string):
+        """Return the string table index of a string.
+        
+        :param string: a string, or *None*.
+        
+        :return: index of *string* in the string table.
+        
+        """
+        try:
+            return self.strings[string]
+        except KeyError:
+            index = self.strings[string] = len(self.strings)
+            return index
+    
+    def value(self, value):
+        """Return the value table index of a value.
+        
+        Values are compared by their encoding, so equal values of
+        different types (as ``1`` and ``True``) are not merged.
+        
+        :param value: *None*, *bool*, *int*, *float*, *str*, or a
+            *tuple*, *list* or *dict* of such values.
+        
+        :return: index of *value* in the value table.
+        
+        :raise: :class:`TypeError` if *value* can't be written.
+        
+        """
+        if value is None:
+            return 0
+        chunks = []
+        self.encode(value, chunks)
+        encoded = b''.join(chunks)
+        try:
+            return self.values[encoded]
+        except KeyError:
+            index = self.values[encoded] = len(self.values)
+            self.value_chunks.append(encoded)
+            return index
+    
+    def encode(self, value, chunks):
+        """Encode a value with the tagged encoding.
+        
+        :param value: value to be encoded.
+        :param chunks: list the encoded *bytes* are appended to.
+        
+        :raise: :class:`TypeError` if *value* can't be written.
+        
+        """
+        if value is None:
+            chunks.append(bytes((_T_NONE,)))
+        elif value is False:
+            chunks.append(bytes((_T_FALSE,)))
+        elif value is True:
+            chunks.append(bytes((_T_TRUE,)))
+        elif isinstance(value, int):
+            chunks.append(bytes((_T_INT,)))
+            chunks.append(_INT.pack(value))
+        elif isinstance(value, float):
+            chunks.append(bytes((_T_FLOAT,)))
+            chunks.append(_FLOAT.pack(value))
+        elif isinstance(value, str):
+            chunks.append(bytes((_T_STR,)))
+            chunks.append(_COUNT.pack(self.ref(value)))
+        elif isinstance(value, (tuple, list)):
+            if isinstance(value, tuple):
+                chunks.append(bytes((_T_TUPLE,)))
+            else:
+                chunks.append(bytes((_T_LIST,)))
+            chunks.append(_COUNT.pack(len(value)))
+            for v in value:
+                self.encode(v, chunks)
+        elif isinstance(value, dict):
+            chunks.append(bytes((_T_DICT,)))
+            chunks.append(_COUNT.pack(len(value)))
+            for k, v in value.items():
+                self.encode(k, chunks)
+                self.encode(v, chunks)
+        else:
+            raise TypeError(
+                    '{} values are not allowed'.format(type(value).__name__))
+    
+    def tables(self):
+        """Return the string and value tables packed.
+        
+        Value table starts with the offset of every value, and the
+        size of all of them, so values can be decoded one by one when
+        needed.
+        
+        :return: *bytes* with both tables.
+        
+        """
+        strings = sorted(self.strings.items(), key=lambda s: s[1])[1:]
+        chunks = [_COUNT.pack(len(strings))]
+        for string, dummy in strings:
+            encoded = string.encode('utf-8')
+            chunks.append(_COUNT.pack(len(encoded)))
+            chunks.append(encoded)
+        chunks.append(_COUNT.pack(len(self.value_chunks)))
+        offset = 0
+        for encoded in self.value_chunks:
+            chunks.append(_COUNT.pack(offset))
+            offset += len(encoded)
+        chunks.append(_COUNT.pack(offset))
+        chunks.extend(self.value_chunks)
+        return b''.join(chunks)
+    
+    def write_count(self, count):
+        """Write an unsigned count."""
+        self.chunks.append(_COUNT.pack(count))
+    
+    def write_report(self, report):
+        """Write a list of report lines inline."""
+        chunks = self.chunks
+        chunks.append(_COUNT.pack(len(report)))
+        for line in report:
+            encoded = line.encode('utf-8')
+            chunks.append(_COUNT.pack(len(encoded)))
+            chunks.append(encoded)
+    
+    def write_items(self, items, market=False):
+        """Write a list of item amounts or market items.
+        
+        :param items: list of :class:`~atlantis.gamedata.item.ItemAmount`
+            objects.
+        :param market: if *True* items are
+            :class:`~atlantis.gamedata.item.ItemMarket` objects, and
+            their price is written too.
+        
+        """
+        ref = self.ref
+        self.write_count(len(items))
+        if market:
+            for it in items:
+                self.chunks.append(_MARKET_ITEM.pack(
+                        ref(it.abr), ref(it.name), ref(it.names), it.amt,
+                        it.price))
+        else:
+            for it in items:
+                self.chunks.append(_ITEM.pack(ref(it.abr), ref(it.name),
+                                              ref(it.names), it.amt))
+    
+    def write_structure(self, s):
+        """Write a :class:`~atlantis.gamedata.structure.Structure`."""
+        flags = 0
+        for i, attr in enumerate(_STRUCTURE_FLAGS):
+            if getattr(s, attr):
+                flags |= 1 << i
+        self.chunks.append(_STRUCTURE.pack(s.num, self.ref(s.name),
+                                           self.ref(s.structure_type),
+                                           flags, self.value(s.incomplete),
+                                           self.value(s.inner_location)))
+        self.write_items(s.items)
+        self.write_report(s.report)
+    
+    def write_hex(self, mh):
+        """Write a :class:`~atlantis.gamedata.map.MapHex`."""
+        r = mh.region
+        d = r.__dict__
+        flags = 0
+        for flag, attr in ((_WEATHER, 'weather'), (_WAGES, 'wages'),
+                           (_MARKET, 'market'),
+                           (_ENTERTAINMENT, 'entertainment'),
+                           (_PRODUCTS, 'products'), (_EXITS, 'exits'),
+                           (_GATE, 'gate'), (_STRUCTURES, 'structures')):
+            if attr in d:
+                flags |= flag
+        x, y, z = r.location
+        ref = self.ref
+        value = self.value
+        self.chunks.append(_HEX.pack(
+                mh.status, mh.last_seen[0], mh.last_seen[1], x, y, ref(z),
+                ref(r.terrain), ref(r.name), r.population, ref(r.racenames),
+                r.wealth, flags, value(r.town), value(d.get('weather')),
+                value(d.get('wages')), value(d.get('entertainment')),
+                value(d.get('gate'))))
+        self.write_report(r.report)
+        if flags & _MARKET:
+            self.write_count(len(r.market))
+            for mtype, items in r.market.items():
+                self.write_count(ref(mtype))
+                self.write_items(items, True)
+        if flags & _PRODUCTS:
+            self.write_items(r.products)
+        if flags & _EXITS:
+            self.write_count(len(r.exits))
+            for direction, (ex, ey, ez) in r.exits.items():
+                self.chunks.append(_EXIT.pack(value(direction), ex, ey,
+                                              ref(ez)))
+        if flags & _STRUCTURES:
+            self.write_count(len(r.structures))
+            for s in r.structures.values():
+                self.write_structure(s)
+    
+    def write_map(self, m):
+        """Write a :class:`~atlantis.gamedata.map.Map`.
+        
+        :return: a tuple with the level directory and the hexes, both
+            as *bytes*.
+        
+        """
+        directory = [_COUNT.pack(len(m.levels))]
+        hexes = []
+        offset = 0
+        for name, level in m.levels.items():
+            directory.append(_LEVEL.pack(self.ref(name), len(level.hexes)))
+            for (x, y), mh in level.hexes.items():
+                self.chunks = []
+                self.write_hex(mh)
+                data = b''.join(self.chunks)
+                directory.append(_INDEX.pack(x, y, offset))
+                hexes.append(data)
+                offset += len(data)
+        self.chunks = []
+        return b''.join(directory), b''.join(hexes)
+
+
+class _Reader():
+    """Builds map objects from snapshot data."""
+    
+    def __init__(self, data):
+        """Create a :class:`_Reader` on snapshot data.
+        
+        Header, string table and level directory are read. Values and
+        hexes are only read when needed.
+        
+        :param data: *bytes*, or a buffer as :class:`mmap.mmap`, with
+            the whole snapshot.
+        
+        :raise: :class:`ValueError` if *data* is not a snapshot, or it
+            has an unsupported version.
+        
+        """
+        self.data = data
+        try:
+            magic, version = _HEADER.unpack_from(data, 0)
+        except struct.error:
+            raise ValueError('not a snapshot file')
+        if magic != MAGIC:
+            raise ValueError('not a snapshot file')
+        if version != VERSION:
+            raise ValueError(
+                    'unsupported snapshot version {}'.format(version))
+        self.pos = _HEADER.size
+        self.strings = [None]
+        self.strings.extend(self.read_report())
+        
+        count = self.read_count()
+        self.value_offsets = struct.unpack_from('<{}I'.format(count + 1),
+                                                data, self.pos)
+        self.values_pos = self.pos + (count + 1) * _COUNT.size
+        self.values = [(None, None)] + [None] * count
+        self.pos = self.values_pos + self.value_offsets[-1]
+        
+        self.levels = []
+        for dummy in range(self.read_count()):
+            name, hex_count = _LEVEL.unpack_from(data, self.pos)
+            self.pos += _LEVEL.size
+            self.levels.append((self.strings[name], self.pos, hex_count))
+            self.pos += hex_count * _INDEX.size
+        self.hexes_pos = self.pos
+    
+    def read_count(self):
+        """Read an unsigned count."""
+        (count,) = _COUNT.unpack_from(self.data, self.pos)
+        self.pos += _COUNT.size
+        return count
+    
+    def read_report(self):
+        """Read a list of inline strings."""
+        data = self.data
+        (count,) = _COUNT.unpack_from(data, self.pos)
+        pos = self.pos + _COUNT.size
+        lines = []
+        for dummy in range(count):
+            (length,) = _COUNT.unpack_from(data, pos)
+            pos += _COUNT.size
+            lines.append(str(data[pos:pos + length], 'utf-8'))
+            pos += length
+        self.pos = pos
+        return lines
+    
+    def read_index(self, pos, count):
+        """Read the hex index of a level.
+        
+        :param pos: position of the index in the snapshot.
+        :param count: number of hexes in the level.
+        
+        :return: a *dict* with hex offsets keyed by their (x, y)
+            location.
+        
+        """
+        return dict([((x, y), offset) for x, y, offset in \
+                     _INDEX.iter_unpack(
+                            self.data[pos:pos + count * _INDEX.size])])
+    
+    def value(self, index):
+        """Return a value from the value table.
+        
+        :param index: index of the value in the value table.
+        
+        :return: the value, or a copy of it if it's mutable.
+        
+        """
+        entry = self.values[index]
+        if entry is None:
+            value, dummy = self.decode(
+                    self.values_pos + self.value_offsets[index - 1])
+            entry = self.values[index] = (value, _copier(value))
+        value, copier = entry
+        if copier:
+            return copier(value)
+        return value
+    
+    def decode(self, pos):
+        """Decode a value written by :meth:`_Writer.encode`.
+        
+        :param pos: position of the value in the snapshot.
+        
+        :return: a tuple with the value and the position right after
+            it.
+        
+        """
+        data = self.data
+        tag = data[pos]
+        pos += 1
+        if tag == _T_NONE:
+            return None, pos
+        elif tag == _T_FALSE:
+            return False, pos
+        elif tag == _T_TRUE:
+            return True, pos
+        elif tag == _T_INT:
+            return _INT.unpack_from(data, pos)[0], pos + _INT.size
+        elif tag == _T_FLOAT:
+            return _FLOAT.unpack_from(data, pos)[0], pos + _FLOAT.size
+        elif tag == _T_STR:
+            return self.strings[_COUNT.unpack_from(data, pos)[0]], \
+                pos + _COUNT.size
+        (count,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+        if tag in (_T_TUPLE, _T_LIST):
+            value = []
+            for dummy in range(count):
+                v, pos = self.decode(pos)
+                value.append(v)
+            if tag == _T_TUPLE:
+                value = tuple(value)
+        elif tag == _T_DICT:
+            value = dict()
+            for dummy in range(count):
+                k, pos = self.decode(pos)
+                value[k], pos = self.decode(pos)
+        else:
+            raise ValueError('unknown value tag {}'.format(tag))
+        return value, pos
+    
+    def read_items(self, market=False):
+        """Read a list of items.
+        
+        :param market: if *True*
+            :class:`~atlantis.gamedata.item.ItemMarket` objects are
+            returned, otherwise
+            :class:`~atlantis.gamedata.item.ItemAmount` are.
+        
+        """
+        strings = self.strings
+        data = self.data
+        count = self.read_count()
+        pos = self.pos
+        items = []
+        if market:
+            for dummy in range(count):
+                abr, name, names, amt, price = \
+                    _MARKET_ITEM.unpack_from(data, pos)
+                pos += _MARKET_ITEM.size
+                items.append(ItemMarket(strings[abr], amt, price,
+                                        strings[name], strings[names]))
+        else:
+            for dummy in range(count):
+                abr, name, names, amt = _ITEM.unpack_from(data, pos)
+                pos += _ITEM.size
+                items.append(ItemAmount(strings[abr], amt, strings[name],
+                                        strings[names]))
+        self.pos = pos
+        return items
+    
+    def read_structure(self):
+        """Read a :class:`~atlantis.gamedata.structure.Structure`."""
+        num, name, structure_type, flags, incomplete, inner_location = \
+            _STRUCTURE.unpack_from(self.data, self.pos)
+        self.pos += _STRUCTURE.size
+        s = Structure(num, self.strings[name], self.strings[structure_type],
+                      None, self.value(incomplete), flags & 1 == 1,
+                      flags & 2 == 2, self.value(inner_location),
+                      flags & 4 == 4, flags & 8 == 8)
+        s.items = self.read_items()
+        s.report = self.read_report()
+        return s
+    
+    def read_hex(self, offset):
+        """Read a :class:`~atlantis.gamedata.map.MapHex`.
+        
+        :param offset: offset of the hex, as found in the level index.
+        
+        """
+        self.pos = self.hexes_pos + offset
+        strings = self.strings
+        value = self.value
+        status, year, month, x, y, z, terrain, name, population, \
+            racenames, wealth, flags, town, weather, wages, entertainment, \
+            gate = _HEX.unpack_from(self.data, self.pos)
+        self.pos += _HEX.size
+        r = Region((x, y, strings[z]), strings[terrain], strings[name],
+                   population, strings[racenames], wealth, value(town))
+        r.report = self.read_report()
+        if flags & _WEATHER:
+            r.weather = value(weather)
+        if flags & _WAGES:
+            r.wages = value(wages)
+        if flags & _MARKET:
+            r.market = dict()
+            for dummy in range(self.read_count()):
+                mtype = strings[self.read_count()]
+                r.market[mtype] = self.read_items(True)
+        if flags & _ENTERTAINMENT:
+            r.entertainment = value(entertainment)
+        if flags & _PRODUCTS:
+            r.products = self.read_items()
+        if flags & _EXITS:
+            data = self.data
+            count = self.read_count()
+            pos = self.pos
+            r.exits = dict()
+            for dummy in range(count):
+                direction, ex, ey, ez = _EXIT.unpack_from(data, pos)
+                pos += _EXIT.size
+                r.exits[value(direction)] = (ex, ey, strings[ez])
+            self.pos = pos
+        if flags & _GATE:
+            r.gate = value(gate)
+        if flags & _STRUCTURES:
+            r.structures = dict()
+            for dummy in range(self.read_count()):
+                s = self.read_structure()
+                r.structures[s.num] = s
+        return MapHex(r, status, (year, month))
+    
+    def read_map(self):
+        """Read a :class:`~atlantis.gamedata.map.Map`."""
+        m = Map()
+        for name, pos, count in self.levels:
+            level = m.levels[name] = MapLevel(name)
+            level.hexes = dict([(location, self.read_hex(offset)) \
+                                for location, offset in \
+                                    self.read_index(pos, count).items()])
+        return m
+
+
+class _LazyHexes(MutableMapping):
+    """Hexes of a level, read from a snapshot when first accessed.
+    
+    :class:`_LazyHexes` replaces the *hexes* dictionary of
+    :class:`~atlantis.gamedata.map.MapLevel` objects opened by
+    :func:`open_map`. It behaves as a *dict*, but a
+    :class:`~atlantis.gamedata.map.MapHex` is only read from the
+    snapshot when its value is needed. Then it's kept, so further
+    changes to it are not lost.
+    
+    Iterating on keys or checking them doesn't read any hex, but
+    iterating on values does.
+    
+    """
+    
+    def __init__(self, reader, pos, count):
+        """Create a :class:`_LazyHexes` for a level in a snapshot.
+        
+        :param reader: :class:`_Reader` of the snapshot.
+        :param pos: position of the level index in the snapshot.
+        :param count: number of hexes in the level.
+        
+        """
+        self._reader = reader
+        self._pos = pos
+        self._count = count
+        self._offsets = None
+        self._hexes = dict()
+    
+    def _get_offsets(self):
+        """Return the level index, reading it if needed."""
+        if self._offsets is None:
+            self._offsets = self._reader.read_index(self._pos, self._count)
+        return self._offsets
+    
+    def __getitem__(self, location):
+        """Return a hex, reading it if it wasn't read yet."""
+        try:
+            return self._hexes[location]
+        except KeyError:
+            offset = self._get_offsets()[location]
+            mh = self._hexes[location] = self._reader.read_hex(offset)
+            return mh
+    
+    def __setitem__(self, location, map_hex):
+        """Set a hex, replacing the one in the snapshot if any."""
+        self._hexes[location] = map_hex
+    
+    def __delitem__(self, location):
+        """Remove a hex."""
+        offsets = self._get_offsets()
+        if location not in self._hexes and location not in offsets:
+            raise KeyError(location)
+        self._hexes.pop(location, None)
+        offsets.pop(location, None)
+    
+    def __contains__(self, location):
+        """Check if there's a hex at location, without reading it."""
+        return location in self._hexes or location in self._get_offsets()
+    
+    def __iter__(self):
+        """Iterate hex locations."""
+        offsets = self._get_offsets()
+        for location in offsets:
+            yield location
+        for location in self._hexes:
+            if location not in offsets:
+                yield location
+    
+    def __len__(self):
+        """Return the number of hexes."""
+        offsets = self._get_offsets()
+        return len(offsets) + \
+            len([k for k in self._hexes if k not in offsets])
+    
+    def __repr__(self):
+        """Return a short description of the hexes."""
+        return '{}({} hexes, {} read)'.format(
+                self.__class__.__name__, len(self), len(self._hexes))
+
+
+def dump_map(file, m):
+    """Save a :class:`~atlantis.gamedata.map.Map` as a snapshot.
+    
+    :param file: file-like object opened in binary mode where the
+        snapshot will be written.
+    :param m: :class:`~atlantis.gamedata.map.Map` to be saved.
+    
+    :raise: :class:`TypeError` if some map value can't be stored.
+    
+    """
+    writer = _Writer()
+    directory, hexes = writer.write_map(m)
+    file.write(_HEADER.pack(MAGIC, VERSION))
+    file.write(writer.tables())
+    file.write(directory)
+    file.write(hexes)
+
+def load_map(file):
+    """Load a :class:`~atlantis.gamedata.map.Map` from a snapshot.
+    
+    The whole map is read. See :func:`open_map` for reading only the
+    hexes that are used.
+    
+    :param file: file-like object opened in binary mode where the
+        snapshot will be read from.
+    
+    :return: the :class:`~atlantis.gamedata.map.Map` object.
+    
+    :raise: :class:`ValueError` if file is not a snapshot, or it was
+        written with an unsupported version of the format.
+    
+    """
+    # Lots of objects are created, but none of them is garbage: cyclic
+    # garbage collection runs would only slow loading down
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _Reader(file.read()).read_map()
+    finally:
+        if enabled:
+            gc.enable()
+
+def open_map(file):
+    """Open a snapshot, reading map hexes when they are accessed.
+    
+    Only the snapshot header, its string table and level directory are
+    read. Each :class:`~atlantis.gamedata.map.MapHex` is read the first
+    time it's got from its level, as with
+    :meth:`MapLevel.get_region
+    <atlantis.gamedata.map.MapLevel.get_region>`, and kept in the level
+    from then on.
+    
+    Files with a file descriptor are memory mapped, so the operating
+    system only reads the parts of the file actually used. Other
+    file-like objects are read as a whole.
+    
+    The file must not be closed or modified while the map is in use.
+    
+    :param file: file-like object opened in binary mode where the
+        snapshot will be read from.
+    
+    :return: the :class:`~atlantis.gamedata.map.Map` object.
+    
+    :raise: :class:`ValueError` if file is not a snapshot, or it was
+        written with an unsupported version of the format.
+    
+    """
+    try:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # Not a real file, or an empty one
+        data = file.read()
+    reader = _Reader(data)
+    m = Map()
+    for name, pos, count in reader.levels:
+        level = m.levels[name] = MapLevel(name)
+        level.hexes = _LazyHexes(reader, pos, count)
+    return m
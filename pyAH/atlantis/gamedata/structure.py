@@ -22,26 +22,40 @@ So :class:`Structure` objects are placed into
 being its ``num``, and others as their ``structure_type``, ``name`` or
 ``inner_location``. :class:`Structure` also implements
 :class:`~atlantis.helpers.json.JsonSerializable` and
-:class:`~atlantis.helpers.comparable.RichComparable` interfaces.
+:class:`~atlantis.helpers.comparable.ContentHashable` interfaces, and
+its report lines can be compacted as
+:class:`~atlantis.gamedata.description.ReportDescription` explains.
 
 Further details about Atlantis PBEM objects hierarchy can be found at
 :ref:`atlantis.gamedata` package documentation.
 
+This module also defines the following public attributes:
+
+.. attribute:: SHIP_ID_OFFSET
+
+   First number of fleets. Structures numbered from this on are ships,
+   and those numbered below are buildings.
+
 """
 
+from atlantis.gamedata.description import ReportDescription
 from atlantis.gamedata.item import ItemAmount
 
 from atlantis.helpers.json import JsonSerializable
-from atlantis.helpers.comparable import RichComparable # For testing
+from atlantis.helpers.comparable import ContentHashable
 
-class Structure(JsonSerializable, RichComparable):
+SHIP_ID_OFFSET = 100
+
+class Structure(JsonSerializable, ContentHashable, ReportDescription):
     """Hold all data of a structure.
     
     :class:`Structure` has the following public attributes:
     
     .. attribute:: report
     
-       List of report lines describing the :class:`Structure`.
+       List of report lines describing the :class:`Structure`. If
+       compacted, see :meth:`compact_report`, a new list is returned
+       every time.
     
     .. attribute:: num
     
@@ -101,6 +115,12 @@ class Structure(JsonSerializable, RichComparable):
     .. attribute:: can_enter
     
        Flags if the :class:`Structure` can be entered by players.
+    
+    .. attribute:: units
+    
+       List of :class:`~atlantis.gamedata.unit.Unit` objects in the
+       :class:`Structure`. Units are turn data, so they are neither
+       saved into json nor compared.
        
     """
     
@@ -147,7 +167,7 @@ class Structure(JsonSerializable, RichComparable):
         self.inner_location = inner_location
         self.has_runes = has_runes
         self.can_enter = can_enter
-        self.report = []
+        self._report = []
         self.units = []
         
     def append_report_description(self, line):
@@ -157,7 +177,25 @@ class Structure(JsonSerializable, RichComparable):
             description.
         
         """
-        self.report.append(line)
+        self.expand_report().append(line)
+        self.invalidate_content_hash()
+    
+    def append_unit(self, unit):
+        """Append a :class:`~atlantis.gamedata.unit.Unit`.
+        
+        :param unit: :class:`~atlantis.gamedata.unit.Unit` to be
+            appended to :class:`Structure`.
+        
+        """
+        self.units.append(unit)
+    
+    # ContentHashable methods
+    def _content(self):
+        """Return the content hashed."""
+        json_object = self.json_serialize()
+        # Compacted or not, the report is the same
+        json_object['report'] = self.report
+        return json_object
     
     # JsonSerializable methods
     def json_serialize(self):
@@ -178,7 +216,7 @@ class Structure(JsonSerializable, RichComparable):
                        'inner_location': self.inner_location,
                        'has_runes': self.has_runes,
                        'can_enter': self.can_enter,
-                       'report': self.report}
+                       'report': self._report_json()}
         
         json_object['items'] = [it.json_serialize() for it in self.items]
 #         json_object['units'] = [un.json_serialize() for un in self.units]
@@ -204,7 +242,7 @@ class Structure(JsonSerializable, RichComparable):
                       json_object['needs_maintenance'], json_object['inner_location'],
                       json_object['has_runes'], json_object['can_enter'])
         
-        s.report = json_object['report']
+        s._report_from_json(json_object['report'])
 #         s.units = [Unit.json_deserialize(un) for un in json_object['units']]
         
         return s
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""Unit tests for atlantis.gamedata.alliance module."""
+
+from atlantis.gamedata.alliance import AllianceMap, richest_hex
+from atlantis.gamedata.map import Map, MapHex, HEX_CURRENT, HEX_EXITS, \
+    MERGE_REPLACE
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.rules import AtlantisRules, DIR_NORTH, DIR_NORTHEAST
+from atlantis.gamedata.structure import Structure
+from atlantis.gamedata.unit import Unit
+
+import os.path
+import tempfile
+import unittest
+
+RULES_FOLDER = os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                            'rulesets', 'havilah_1.0.0')
+
+HEADER = """Atlantis Report For:
+{} ({}) (War 1, Trade 2, Magic 2)
+May, Year 3
+
+Hostile : none.
+Unfriendly : none.
+Neutral : none.
+Friendly : none.
+Ally : none.
+
+Unclaimed silver: 0.
+
+"""
+
+ISSHIRE = """plain (21,93) in Isshire, contains Durshire [town], 2392 peasants
+  (vikings), $11016.
+------------------------------------------------------------
+  The weather was clear last month; it will be clear next month.
+  Wages: $14.1 (Max: $3376).
+  Wanted: none.
+  For Sale: 95 vikings [VIKI] at $56, 19 leaders [LEAD] at $112.
+  Entertainment available: $550.
+  Products: 34 grain [GRAI], 14 horses [HORS].
+
+Exits:
+  North : ocean (21,91) in Atlantis Ocean.
+  Northeast : plain (22,92) in Isshire.
+
+"""
+
+ISSHIRE_NE = """plain (22,92) in Isshire, 1200 peasants (vikings), $4400.
+------------------------------------------------------------
+  The weather was clear last month; it will be clear next month.
+  Wages: $13.2 (Max: $1200).
+  Wanted: none.
+  For Sale: none.
+  Entertainment available: $220.
+  Products: 20 grain [GRAI].
+
+Exits:
+  Southwest : plain (21,93) in Isshire, contains Durshire [town].
+
+"""
+
+class TestAllianceMap(unittest.TestCase):
+    """Test AllianceMap class."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.rules = AtlantisRules.read_folder(RULES_FOLDER)
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.reports = []
+        for num, regions in ((3, ISSHIRE), (4, ISSHIRE_NE),
+                             (5, ISSHIRE + ISSHIRE_NE)):
+            file_name = os.path.join(self.folder.name,
+                                     'report.{}'.format(num))
+            with open(file_name, 'w') as f:
+                f.write(HEADER.format('Faction', num) + regions +
+                        'Orders Template (Long Format):\n')
+            self.reports.append(file_name)
+    
+    def tearDown(self):
+        self.folder.cleanup()
+    
+    def test_read_reports(self):
+        """Test AllianceMap.read_reports method."""
+        for processes in (1, 2):
+            alliance = AllianceMap()
+            stats = alliance.read_reports(self.reports, self.rules, (3, 5),
+                                          processes, compact=True)
+            self.assertEqual((stats.added, stats.replaced, stats.kept,
+                              stats.conflicts), (3, 1, 4, 0))
+            hexes = alliance.map.levels['surface'].hexes
+            self.assertEqual(sorted(hexes), [(21, 91), (21, 93), (22, 92)])
+            for location in ((21, 93), (22, 92)):
+                self.assertEqual(hexes[location].status, HEX_CURRENT)
+                self.assertEqual(hexes[location].last_seen, (3, 5))
+                self.assertTrue(hexes[location].region.is_report_compact())
+            self.assertEqual(hexes[(21, 91)].status, HEX_EXITS)
+            self.assertEqual(hexes[(22, 92)].region.population, 1200)
+            self.assertEqual(hexes[(21, 93)].region.report[0],
+                             'plain (21,93) in Isshire, contains Durshire '
+                             '[town], 2392 peasants (vikings), $11016.')
+    
+    def test_parallel_read(self):
+        """Test reports read in parallel give the same map."""
+        maps = []
+        for processes in (1, 2):
+            alliance = AllianceMap()
+            alliance.read_reports(self.reports, self.rules, (3, 5),
+                                  processes)
+            maps.append(alliance.map)
+        serial, parallel = maps
+        self.assertEqual(serial, parallel)
+        region = parallel.get_region((21, 93, None)).region
+        self.assertEqual(list(region.exits), [DIR_NORTH, DIR_NORTHEAST])
+        
+        alliance = AllianceMap(serial)
+        stats = alliance.read_reports(self.reports, self.rules, (3, 5), 2)
+        self.assertEqual((stats.added, stats.replaced, stats.kept,
+                          stats.conflicts), (0, 0, 8, 0))
+    
+    def test_share_units(self):
+        """Test units of shared regions are kept."""
+        maps = []
+        for num in (1, 2):
+            region = Region((21, 93, None), 'plain', 'Isshire', 2392,
+                            'vikings', 11016)
+            region.append_structure(Structure(1, 'Tower', 'Tower'))
+            region.append_unit(Unit(num, 'Scout', [], region.location))
+            region.structures[1].append_unit(
+                    Unit(num + 10, 'Guard', [], region.location, 1))
+            m = Map()
+            m.add_region_info(region)
+            maps.append(m)
+        
+        alliance = AllianceMap()
+        alliance.add_map(maps[0], (3, 5))
+        alliance.add_map(maps[1], (3, 5))
+        region = alliance.map.get_region((21, 93, None)).region
+        self.assertIs(region, maps[0].get_region((21, 93, None)).region)
+        self.assertEqual([u.num for u in region.units], [1, 2])
+        self.assertEqual([u.num for u in region.structures[1].units],
+                         [11, 12])
+        
+        # Units of an older turn are not shared
+        alliance.map.age()
+        m = Map()
+        m.add_region_info(Region((21, 93, None), 'plain', 'Isshire', 2392,
+                                 'vikings', 11016))
+        m.get_region((21, 93, None)).region.append_structure(
+                Structure(1, 'Tower', 'Tower'))
+        alliance.add_map(m, (3, 6))
+        region = alliance.map.get_region((21, 93, None)).region
+        self.assertIs(region, m.get_region((21, 93, None)).region)
+        self.assertFalse(hasattr(region, 'units'))
+    
+    def test_share(self):
+        """Test regions and strings are shared."""
+        alliance = AllianceMap()
+        alliance.read_reports(self.reports[:1], self.rules, (3, 4), 1)
+        region = alliance.map.get_region((21, 93, None)).region
+        alliance.map.age()
+        
+        alliance.read_reports(self.reports[2:], self.rules, (3, 5), 1)
+        mh = alliance.map.get_region((21, 93, None))
+        self.assertEqual(mh.status, HEX_CURRENT)
+        self.assertEqual(mh.last_seen, (3, 5))
+        self.assertIs(mh.region, region)
+        
+        other = alliance.map.get_region((22, 92, None)).region
+        self.assertIs(other.racenames, region.racenames)
+        self.assertIs(other.products[0].names, region.products[0].names)
+    
+    def test_policy(self):
+        """Test conflict policies."""
+        old = MapHex(Region((21, 93, None), 'plain', 'Isshire'), HEX_CURRENT)
+        region = Region((21, 93, None), 'plain', 'Isshire', 2392, 'vikings',
+                        11016)
+        region.set_entertainment(550)
+        new = MapHex(region, HEX_CURRENT)
+        self.assertIs(richest_hex(old, new), new)
+        self.assertIs(richest_hex(new, old), new)
+        
+        region = Region((21, 93, None), 'plain', 'Isshire', 2392, 'vikings',
+                        11016)
+        region.set_entertainment(550)
+        region.append_structure(Structure(1, 'Building', 'Tower'))
+        richer = MapHex(region, HEX_CURRENT)
+        self.assertIs(richest_hex(new, richer), richer)
+        self.assertIs(richest_hex(richer, new), richer)
+        
+        region = Region((21, 93, None), 'plain', 'Isshire', 2392, 'vikings',
+                        11016)
+        region.set_entertainment(550)
+        region.append_unit(Unit(1, 'Scout', [], region.location))
+        with_units = MapHex(region, HEX_CURRENT)
+        self.assertIs(richest_hex(new, with_units), with_units)
+        self.assertIs(richest_hex(richer, with_units), richer)
+        
+        m = Map()
+        m.set_region(new)
+        alliance = AllianceMap(m)
+        other = Map()
+        other.set_region(MapHex(Region((21, 93, None), 'plain', 'Isshire'),
+                                HEX_CURRENT))
+        stats = alliance.add_map(other, None)
+        self.assertEqual((stats.kept, stats.conflicts), (1, 1))
+        self.assertIs(alliance.map.get_region((21, 93, None)), new)
+        
+        alliance = AllianceMap(m, MERGE_REPLACE)
+        stats = alliance.add_map(other, None)
+        self.assertEqual((stats.replaced, stats.conflicts), (1, 1))
+        self.assertIs(alliance.map.get_region((21, 93, None)).region,
+                      other.get_region((21, 93, None)).region)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Unit tests for atlantis.gamedata.battle module."""
+
+from atlantis.gamedata.battle import Battle, BattleStore, SIDE_ATTACKER, \
+    SIDE_DEFENDER
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.rules import AtlantisRules
+from atlantis.parsers.reportparser import ReportParser
+
+import json
+import unittest
+
+BATTLE = """SQ Decec A - Ridi (512) attacks City Guard (65) in plain (18,38) in Decec!
+Attackers:
+SQ Decec A - Ridi (512) Mathoyoh (13), 10 vikings [VIKI], 10 swords [SWOR], combat 2.
+Mage eart (397) Mathoyoh (13), behind, leader [LEAD], tactics 3.
+Defenders:
+City Guard (65), 20 city guards [GUARD], 20 swords [SWOR].
+Mage eart (397) gets a free round of attacks.
+Mage eart (397) casts Force Shield.
+City Guard (65) loses 2.
+Round 1:
+Mage eart (397) strikes fear into enemy mounts, causing 8 mounts to panic.
+SQ Decec A - Ridi (512) loses 3.
+City Guard (65) loses 9.
+Round 2:
+SQ Decec A - Ridi (512) loses 1.
+City Guard (65) loses 9.
+City Guard (65) is destroyed!
+Total Casualties:
+SQ Decec A - Ridi (512) loses 4.
+Damaged units: 512.
+City Guard (65) loses 20.
+Damaged units: 65.
+Spoils: 18 swords [SWOR], 899 silver [SILV].
+"""
+
+def _battle(location, attackers, defenders, losses):
+    """Return a battle between factions."""
+    b = Battle({'num': 1, 'name': 'A'}, {'num': 2, 'name': 'B'}, location)
+    for side, factions in ((SIDE_ATTACKER, attackers),
+                           (SIDE_DEFENDER, defenders)):
+        for faction in factions:
+            b.sides[side].append({'num': faction * 100, 'name': 'U',
+                                  'faction': {'num': faction, 'name': 'F'}})
+    b.losses = dict(zip((SIDE_ATTACKER, SIDE_DEFENDER), losses))
+    return b
+
+class TestBattle(unittest.TestCase):
+    """Test battle handlers of GameData and Battle class."""
+    
+    def setUp(self):
+        self.gd = GameData(AtlantisRules())
+        parser = ReportParser(self.gd)
+        for line in BATTLE.splitlines():
+            parser.parse_battle(line)
+        self.battle = self.gd.battles[0]
+    
+    def test_battle(self):
+        """Test battles are kept as they're reported."""
+        b = self.battle
+        self.assertEqual(len(self.gd.battles), 1)
+        self.assertEqual(b.attacker, {'num': 512, 'name': 'SQ Decec A - Ridi'})
+        self.assertEqual(b.target, {'num': 65, 'name': 'City Guard'})
+        self.assertEqual(b.location, (18, 38, None))
+        self.assertFalse(b.assassination)
+        self.assertEqual([u['num'] for u in b.sides[SIDE_ATTACKER]],
+                         [512, 397])
+        self.assertTrue(b.sides[SIDE_ATTACKER][1]['behind'])
+        self.assertEqual(b.sides[SIDE_DEFENDER][0]['items'][0]['abr'],
+                         'GUARD')
+        self.assertEqual(b.get_factions(SIDE_ATTACKER), {13})
+        self.assertEqual(b.get_factions(SIDE_DEFENDER), set())
+        
+        self.assertEqual(b.rounds, [('free', 0, 2), (1, 3, 9), (2, 1, 9)])
+        self.assertEqual(b.specials,
+                         [(0, 397, 'Force Shield', 0, None, False),
+                          (1, 397, 'strikes fear into enemy mounts', 8,
+                           'causing 8 mounts to panic', False)])
+        self.assertEqual((b.result, b.loser, b.get_winner()),
+                         ('destroyed', SIDE_DEFENDER, SIDE_ATTACKER))
+        self.assertEqual(b.losses, {SIDE_ATTACKER: 4, SIDE_DEFENDER: 20})
+        self.assertEqual(b.damaged, {SIDE_ATTACKER: [512],
+                                     SIDE_DEFENDER: [65]})
+        self.assertEqual(b.spoils, [('SWOR', 18), ('SILV', 899)])
+    
+    def test_assassination(self):
+        """Test assassinations, with no attacker."""
+        ReportParser(self.gd).parse_battle(
+                'Easy Target (43) is assassinated in plain (18,38) in Decec!')
+        b = self.gd.battles[-1]
+        self.assertIsNone(b.attacker)
+        self.assertEqual(b.target, {'num': 43, 'name': 'Easy Target'})
+        self.assertTrue(b.assassination)
+        self.assertEqual(b.get_side({'num': 43}), SIDE_DEFENDER)
+        self.assertIsNone(b.get_side({'num': 1}))
+    
+    def test_json_methods(self):
+        """Test Battle json methods."""
+        b = self.battle
+        b.turn = (3, 5)
+        b_new = Battle.json_deserialize(json.loads(json.dumps(
+                b.json_serialize())))
+        self.assertEqual(b_new.__dict__, b.__dict__)
+
+class TestBattleStore(unittest.TestCase):
+    """Test BattleStore class."""
+    
+    def setUp(self):
+        self.store = store = BattleStore()
+        store.add(_battle((1, 1, None), [3], [4], (5, 10)), (1, 1))
+        store.add(_battle((1, 1, None), [3, 5], [], (2, 20)), (1, 2))
+        store.add(_battle((2, 2, None), [4], [3], (7, 1)), (1, 2))
+        store.add(_battle((2, 2, None), [5], [4], (1, 1)), (1, 3))
+    
+    def test_find(self):
+        """Test BattleStore.find method."""
+        store = self.store
+        b = store.battles
+        self.assertEqual(store.find(), b)
+        self.assertEqual(store.find(location=(1, 1, None)), b[:2])
+        self.assertEqual(store.find(faction=3), b[:3])
+        self.assertEqual(store.find(faction=4, location=(2, 2, None)), b[2:])
+        self.assertEqual(store.find(first=(1, 2)), b[1:])
+        self.assertEqual(store.find(faction=3, first=(1, 2), last=(1, 2)),
+                         b[1:3])
+        self.assertEqual(store.find(faction=6), [])
+    
+    def test_losses(self):
+        """Test faction losses."""
+        store = self.store
+        self.assertEqual(store.get_losses(3), 5 + 2 + 1)
+        self.assertEqual(store.get_losses(4), 10 + 7 + 1)
+        self.assertEqual(store.get_losses(3, first=(1, 2)), 3)
+        self.assertEqual(store.get_losses(4, last=(1, 2)), 17)
+        self.assertEqual(store.get_losses(6), 0)
+        self.assertEqual(store.get_losses_by_turn(3),
+                         {(1, 1): 5, (1, 2): 3})
+    
+    def test_add_game_data(self):
+        """Test BattleStore.add_game_data method."""
+        gd = GameData(AtlantisRules())
+        parser = ReportParser(gd)
+        for line in BATTLE.splitlines():
+            parser.parse_battle(line)
+        self.store.add_game_data(gd, (1, 4))
+        self.assertEqual(self.store.battles[-1].turn, (1, 4))
+        self.assertEqual(self.store.get_losses_by_turn(13), {(1, 4): 4})
+    
+    def test_json_methods(self):
+        """Test BattleStore json methods."""
+        store = BattleStore.json_loadb(self.store.json_dumpb())
+        self.assertEqual([b.__dict__ for b in store.battles],
+                         [b.__dict__ for b in self.store.battles])
+        self.assertEqual(store.get_losses_by_turn(4),
+                         self.store.get_losses_by_turn(4))
+        self.assertEqual(store.find(faction=5, first=(1, 3)),
+                         store.battles[3:])
+
+if __name__ == '__main__':
+    unittest.main()
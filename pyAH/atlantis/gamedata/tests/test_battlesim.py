@@ -0,0 +1,117 @@
+"""Unit tests for atlantis.gamedata.battlesim module."""
+
+from atlantis.gamedata.battle import SIDE_ATTACKER, SIDE_DEFENDER
+from atlantis.gamedata.battlesim import BattleSimulator, numpy
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.rules import AtlantisRules, StructureType, \
+    STRUCTURE_BUILDING
+from atlantis.parsers.reportparser import ReportParser
+
+import unittest
+
+BATTLE = """Raiders (512) attacks City Guard (65) in plain (18,38) in Decec!
+Attackers:
+Raiders (512) Mathoyoh (13), 10 vikings [VIKI], 10 swords [SWOR], combat 2.
+Defenders:
+City Guard (65), 20 city guards [GUARD], 20 swords [SWOR].
+"""
+
+FIREBALL = {'damage': [{'minnum': 2, 'maxnum': 10, 'type': 'energy',
+                        'expandLevel': True}]}
+
+def _unit(num, men, abr='VIKI', skills=(), behind=False, items=()):
+    """Return a unit as a battle_side_unit dictionary."""
+    unit = {'num': num, 'name': 'Unit',
+            'items': [{'abr': abr, 'amt': men}] + list(items),
+            'skills': [{'name': name, 'level': level} \
+                       for name, level in skills]}
+    if behind:
+        unit['behind'] = True
+    return unit
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestBattleSimulator(unittest.TestCase):
+    """Test BattleSimulator class."""
+    
+    def test_soldiers(self):
+        """Test men and monsters are soldiers, and equipment isn't."""
+        wolves = {'abr': 'WOLF', 'amt': 4,
+                  'monster': {'attackLevel': 1, 'defense': 1,
+                              'numAttacks': 1, 'hits': 1, 'tactics': 2}}
+        sim = BattleSimulator(
+                [_unit(1, 10, items=[{'abr': 'SWOR', 'amt': 5},
+                                     {'abr': 'HORS', 'amt': 10}])],
+                [_unit(2, 0, items=[wolves])])
+        self.assertEqual(sim.get_soldiers(SIDE_ATTACKER), 10)
+        self.assertEqual(sim.get_soldiers(SIDE_DEFENDER), 4)
+    
+    def test_from_battle(self):
+        """Test simulating a parsed battle."""
+        gd = GameData(AtlantisRules())
+        parser = ReportParser(gd)
+        for line in BATTLE.splitlines():
+            parser.parse_battle(line)
+        sim = BattleSimulator.from_battle(gd.battles[0])
+        self.assertEqual(sim.get_soldiers(SIDE_ATTACKER), 10)
+        self.assertEqual(sim.get_soldiers(SIDE_DEFENDER), 20)
+        result = sim.simulate(200)
+        self.assertEqual(len(result), 200)
+        self.assertAlmostEqual(result.win_probability(SIDE_ATTACKER) +
+                               result.win_probability(SIDE_DEFENDER) +
+                               result.tie_probability(), 1)
+    
+    def test_outcome(self):
+        """Test a much stronger side wins."""
+        sim = BattleSimulator([_unit(1, 50, skills=[('combat', 3)])],
+                              [_unit(2, 5)])
+        result = sim.simulate(500)
+        self.assertGreater(result.win_probability(SIDE_ATTACKER), 0.95)
+        self.assertGreaterEqual(result.mean_losses(SIDE_DEFENDER), 3)
+        self.assertLess(result.mean_losses(SIDE_ATTACKER), 5)
+        self.assertTrue((result.rounds >= 1).all())
+    
+    def test_structure(self):
+        """Test structures help defenders."""
+        attackers = [_unit(1, 20)]
+        defenders = [_unit(2, 20)]
+        fort = StructureType('Fort', STRUCTURE_BUILDING, protect=50,
+                              defense={'melee': 4})
+        open_field = BattleSimulator(attackers, defenders).simulate(500)
+        walled = BattleSimulator(attackers, defenders,
+                                 structure=fort).simulate(500)
+        self.assertGreater(walled.win_probability(SIDE_DEFENDER),
+                           open_field.win_probability(SIDE_DEFENDER) + 0.5)
+    
+    def test_specials(self):
+        """Test special effects and shields."""
+        attackers = [_unit(1, 10), _unit(3, 1, 'LEAD', behind=True)]
+        defenders = [_unit(2, 20), _unit(4, 1, 'LEAD', behind=True)]
+        plain = BattleSimulator(attackers, defenders).simulate(500)
+        fireball = BattleSimulator(attackers, defenders,
+                                   specials={3: (FIREBALL, 3)}).simulate(500)
+        self.assertGreater(fireball.win_probability(SIDE_ATTACKER),
+                           plain.win_probability(SIDE_ATTACKER) + 0.5)
+        
+        shield = {'shield': [{'type': 'energy'}]}
+        shielded = BattleSimulator(attackers, defenders,
+                                   specials={3: (FIREBALL, 3),
+                                             4: (shield, 3)}).simulate(500)
+        self.assertEqual(shielded.win_probability(SIDE_ATTACKER),
+                         plain.win_probability(SIDE_ATTACKER))
+    
+    def test_reproducible(self):
+        """Test results only depend on the seed."""
+        sim = BattleSimulator([_unit(1, 20, skills=[('combat', 1)])],
+                              [_unit(2, 25)])
+        result = sim.simulate(250, seed=7, batch=100)
+        again = sim.simulate(250, seed=7, batch=100, processes=2)
+        for side in (SIDE_ATTACKER, SIDE_DEFENDER):
+            self.assertTrue((result.losses[side] == again.losses[side]).all())
+        self.assertTrue((result.rounds == again.rounds).all())
+        other = sim.simulate(250, seed=8, batch=100)
+        self.assertFalse((result.losses[SIDE_ATTACKER] ==
+                          other.losses[SIDE_ATTACKER]).all())
+        self.assertEqual(len(sim.simulate(0)), 0)
+
+if __name__ == '__main__':
+    unittest.main()
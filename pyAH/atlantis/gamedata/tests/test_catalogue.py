@@ -0,0 +1,113 @@
+"""Unit tests for atlantis.gamedata.catalogue module."""
+
+from atlantis.gamedata.catalogue import StructureCatalogue
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.map import Map, HEX_CURRENT, HEX_OLD
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.rules import AtlantisRules, StructureType, \
+    STRUCTURE_BUILDING
+from atlantis.gamedata.structure import Structure
+
+import unittest
+
+def _region(location, terrain, structures):
+    """Return a region with (*num*, *type*, *flags*) structures."""
+    region = Region(location, terrain, 'Isshire')
+    for num, structure_type, flags in structures:
+        region.append_structure(Structure(num, 'Building', structure_type,
+                                          **flags))
+    return region
+
+class TestStructureCatalogue(unittest.TestCase):
+    """Test StructureCatalogue class."""
+    
+    def setUp(self):
+        """Index structures of surface and underworld hexes."""
+        self.m = m = Map()
+        m.add_region_info(_region((21, 93, None), 'plain',
+                                  [(1, 'Shaft', {'inner_location': True}),
+                                   (2, 'Tower', {'needs_maintenance': True}),
+                                   (100, 'Fleet', {})]))
+        m.add_region_info(_region((21, 91, None), 'ocean',
+                                  [(101, 'Fleet', {}),
+                                   (102, 'Fleet', {'about_to_decay': True})]))
+        m.add_region_info(_region((24, 90, None), 'forest',
+                                  [(1, 'Shaft',
+                                    {'inner_location': (3, 3, 'underworld')}),
+                                   (2, 'Mine', {})]), HEX_OLD)
+        m.add_region_info(_region((3, 3, 'underworld'), 'tunnels',
+                                  [(1, 'Shaft', {'inner_location': True})]))
+        self.catalogue = StructureCatalogue.from_map(m)
+    
+    def _find(self, **kwargs):
+        """Return locations and numbers of the structures found."""
+        return [(loc, s.num) for loc, s, terrain, status \
+                in self.catalogue.find(**kwargs)]
+    
+    def test_find(self):
+        """Test finding structures."""
+        catalogue = self.catalogue
+        self.assertEqual(len(catalogue), 8)
+        self.assertEqual(catalogue.get_types(),
+                         ['Fleet', 'Mine', 'Shaft', 'Tower'])
+        self.assertEqual(self._find(structure_type='Shaft', level='surface'),
+                         [((21, 93, None), 1), ((24, 90, None), 1)])
+        self.assertEqual(self._find(ship=True, terrain='ocean'),
+                         [((21, 91, None), 101), ((21, 91, None), 102)])
+        self.assertEqual(self._find(ship=False, maintenance=True),
+                         [((21, 93, None), 2)])
+        self.assertEqual(self._find(maintenance=True),
+                         [((21, 93, None), 2), ((21, 91, None), 102)])
+        self.assertEqual(self._find(inner=True, status=HEX_CURRENT),
+                         [((21, 93, None), 1), ((3, 3, 'underworld'), 1)])
+        self.assertEqual(len(self._find(inner=False)), 5)
+        self.assertEqual(self._find(location=(24, 90, None)),
+                         [((24, 90, None), 1), ((24, 90, None), 2)])
+        self.assertEqual(self._find(level='underworld', ship=True), [])
+        self.assertEqual(self._find(structure_type='Castle'), [])
+        self.assertEqual(len(self._find()), 8)
+        
+        loc, s, terrain, status = catalogue.find(structure_type='Mine')[0]
+        self.assertEqual((loc, s.structure_type, terrain, status),
+                         ((24, 90, None), 'Mine', 'forest', HEX_OLD))
+    
+    def test_add_region(self):
+        """Test regions added again replace their structures."""
+        catalogue = self.catalogue
+        catalogue.add_region(_region((21, 93, None), 'plain',
+                                     [(1, 'Shaft', {'inner_location': True}),
+                                      (2, 'Tower', {})]))
+        self.assertEqual(len(catalogue), 7)
+        self.assertEqual(self._find(maintenance=True),
+                         [((21, 91, None), 102)])
+        self.assertEqual(self._find(location=(21, 93, None)),
+                         [((21, 93, None), 1), ((21, 93, None), 2)])
+        
+        catalogue.remove_region((21, 91, None))
+        catalogue.remove_region((21, 91, None))
+        self.assertEqual(self._find(ship=True), [])
+        self.assertNotIn('Fleet', catalogue.get_types())
+        self.assertEqual(self._find(terrain='ocean'), [])
+    
+    def test_game_data(self):
+        """Test structures are indexed and unknown types kept."""
+        gd = GameData(AtlantisRules())
+        gd.line('plain (21,93) in Isshire, 2392 peasants (vikings), $11016.')
+        gd.region('plain', 'Isshire', 21, 93, population=2392,
+                  racenames='vikings', wealth=11016)
+        gd.line('+ Shaft [1] : Shaft, contains an inner location.')
+        gd.region_structure(1, 'Shaft', 'Shaft', inner_location=True)
+        gd.line('+ Ark [100] : Fleet.')
+        gd.region_structure(100, 'Ark', 'Fleet')
+        self.assertEqual(
+                [(loc, s.name) for loc, s, terrain, status \
+                 in gd.catalogue.find(ship=True, terrain='plain')],
+                [((21, 93, None), 'Ark')])
+        self.assertEqual(gd.unknown_structures, ['Shaft', 'Fleet'])
+        
+        gd.structure('Shaft', STRUCTURE_BUILDING, canenter=True)
+        self.assertEqual(gd.unknown_structures, ['Fleet'])
+        self.assertIsInstance(gd.structures['Shaft'], StructureType)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Unit tests for atlantis.gamedata.delta module."""
+
+from atlantis.gamedata.delta import map_delta, apply_delta
+from atlantis.gamedata.map import Map, HEX_CURRENT, HEX_EXITS, HEX_OLD
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.item import ItemMarket
+
+import copy
+import json
+import unittest
+
+class TestDelta(unittest.TestCase):
+    """Test map_delta and apply_delta functions."""
+    
+    def _make_map(self):
+        """Return a map to be changed."""
+        m = Map()
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings', 11016,
+                   {'name': 'Durshire', 'type': 'town'})
+        r.set_market('sell', [ItemMarket('GRAI', 93, 22)])
+        r.set_entertainment(553)
+        m.add_region_info(r)
+        m.add_region_info(Region((21, 91, None), 'forest', 'Isshire'),
+                          HEX_EXITS)
+        m.add_region_info(Region((22, 92, None), 'forest', 'Isshire', 100,
+                                 'vikings', 200))
+        m.add_region_info(Region((1, 2, 'underworld'), 'tunnels', 'Ithaca',
+                                 200, 'drow elves', 50))
+        return m
+    
+    def _change_map(self, m):
+        """Change all kind of things of a map."""
+        mh = m.get_region((21, 93, None))
+        mh.region.wealth = 12000
+        mh.region.set_market('sell', [ItemMarket('GRAI', 90, 25)])
+        del mh.region.entertainment
+        mh = m.get_region((22, 92, None))
+        mh.status = HEX_OLD
+        mh.last_seen = (1, 12)
+        del m.levels['surface'].hexes[(21, 91)]
+        m.add_region_info(Region((21, 95, None), 'forest', 'Isshire'),
+                          HEX_EXITS)
+        del m.levels['underworld']
+        m.add_region_info(Region((1, 1, 'underdeep'), 'tunnels', 'Deep',
+                                 200, 'drow elves', 50))
+    
+    def test_map_delta(self):
+        """Test map_delta function."""
+        old = self._make_map()
+        self.assertEqual(map_delta(old, self._make_map()),
+                         {'levels': {}, 'removed_levels': []})
+        
+        new = self._make_map()
+        self._change_map(new)
+        delta = map_delta(old, new)
+        self.assertEqual(delta['removed_levels'], ['underworld'])
+        self.assertEqual(sorted(delta['levels'].keys()),
+                         ['surface', 'underdeep'])
+        surface = delta['levels']['surface']
+        self.assertEqual(surface['removed'], [[21, 91]])
+        self.assertEqual(len(surface['hexes']), 1)
+        changes = dict([((x, y), change) \
+                        for x, y, change in surface['changes']])
+        self.assertEqual(sorted(changes[(21, 93)]['region'].keys()),
+                         ['market', 'wealth'])
+        self.assertEqual(changes[(21, 93)]['removed'], ['entertainment'])
+        self.assertEqual(changes[(22, 92)],
+                         {'status': HEX_OLD, 'last_seen': [1, 12]})
+    
+    def test_compacted_reports(self):
+        """Test reports are compared by their lines."""
+        old = self._make_map()
+        old.get_region((21, 93, None)).region.append_report_description(
+                'Isshire (21,93) in Isshire, contains Durshire [town].')
+        new = copy.deepcopy(old)
+        new.get_region((21, 93, None)).region.wealth = 12000
+        old.compact_reports()
+        
+        for a, b in ((old, new), (new, old)):
+            delta = map_delta(a, b)
+            surface = delta['levels']['surface']
+            self.assertEqual(surface['changes'],
+                             [[21, 93, {'region': {'wealth': b.get_region(
+                                     (21, 93, None)).region.wealth}}]])
+    
+    def test_apply_delta(self):
+        """Test apply_delta function."""
+        old = self._make_map()
+        new = self._make_map()
+        self._change_map(new)
+        delta = map_delta(old, new)
+        apply_delta(old, copy.deepcopy(delta))
+        self.assertEqual(old, new)
+        
+        new.get_region((21, 93, None)).region.market['sell'][0].price = 1
+        self.assertEqual(old.get_region(
+                (21, 93, None)).region.market['sell'][0].price, 25)
+        new.get_region((21, 93, None)).region.market['sell'][0].price = 25
+        
+        old = self._make_map()
+        apply_delta(old, json.loads(json.dumps(delta)))
+        self.assertEqual(old, new)
+        self.assertEqual(old.get_region((22, 92, None)).last_seen, (1, 12))
+        self.assertEqual(old.get_region((22, 92, None)).status, HEX_OLD)
+    
+    def test_turns(self):
+        """Test rebuilding several turns from a base map."""
+        turns = [self._make_map()]
+        for wealth in range(100, 500, 100):
+            m = copy.deepcopy(turns[-1])
+            m.get_region((21, 93, None)).region.wealth += wealth
+            m.get_region((21, 93, None)).status = HEX_CURRENT
+            turns.append(m)
+        deltas = [map_delta(turns[i - 1], turns[i]) \
+                  for i in range(1, len(turns))]
+        
+        m = self._make_map()
+        for delta in deltas:
+            apply_delta(m, delta)
+        self.assertEqual(m, turns[-1])
+        self.assertEqual(m.get_region((21, 93, None)).region.wealth, 12016)
+
+if __name__ == '__main__':
+    unittest.main()
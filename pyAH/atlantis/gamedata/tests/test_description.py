@@ -0,0 +1,157 @@
+"""Unit tests for atlantis.gamedata.description module."""
+
+from atlantis.gamedata.description import compress_lines, decompress_lines
+from atlantis.gamedata.map import Map
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.structure import Structure
+
+import json
+import unittest
+
+LINES = ['plain (21,93) in Isshire, contains Durshire [town], 2392 peasants '
+         '(vikings), $11016.',
+         '------------------------------------------------------------',
+         '  The weather was clear last month; it will be clear next month.',
+         '  Wages: $14.1 (Max: $3376).',
+         '  Wanted: none.',
+         '  For Sale: 95 vikings [VIKI] at $56, 19 leaders [LEAD] at $112.',
+         '  Entertainment available: $550.',
+         '  Products: 34 grain [GRAI], 14 horses [HORS].',
+         '',
+         'Exits:',
+         '  North : ocean (21,91) in Atlantis Ocean.',
+         '  Northeast : plain (22,92) in Isshire.']
+
+class TestCompression(unittest.TestCase):
+    """Test compress_lines and decompress_lines functions."""
+    
+    def test_round_trip(self):
+        """Test lines are decompressed as they were."""
+        for lines in (LINES, [''], ['', ''], ['Ñandú (1,2)']):
+            blob = compress_lines(lines)
+            self.assertIsInstance(blob, bytes)
+            self.assertEqual(decompress_lines(blob), lines)
+        self.assertLess(len(compress_lines(LINES)),
+                        len('\n'.join(LINES)) / 2)
+    
+    def test_errors(self):
+        """Test invalid lines and blobs."""
+        self.assertRaises(ValueError, compress_lines, [])
+        self.assertRaises(ValueError, compress_lines, ['one\ntwo'])
+        self.assertRaises(ValueError, decompress_lines, b'')
+        blob = compress_lines(LINES)
+        self.assertRaises(ValueError, decompress_lines, b'\x00' + blob[1:])
+        self.assertRaises(ValueError, decompress_lines, blob[:1] + b'xxxx')
+
+class TestReportDescription(unittest.TestCase):
+    """Test ReportDescription class."""
+    
+    def setUp(self):
+        self.region = Region((21, 93, None), 'plain', 'Isshire')
+        for line in LINES:
+            self.region.append_report_description(line)
+    
+    def test_compact_report(self):
+        """Test compacting and expanding reports."""
+        region = self.region
+        self.assertFalse(region.is_report_compact())
+        region.compact_report()
+        self.assertTrue(region.is_report_compact())
+        self.assertEqual(region.report, LINES)
+        self.assertIsNot(region.report, region.report)
+        
+        lines = region.expand_report()
+        self.assertFalse(region.is_report_compact())
+        self.assertEqual(lines, LINES)
+        self.assertIs(region.report, lines)
+        
+        region = Region((21, 93, None), 'plain', 'Isshire')
+        region.compact_report()
+        self.assertFalse(region.is_report_compact())
+        region.append_report_description('one\ntwo')
+        region.compact_report()
+        self.assertFalse(region.is_report_compact())
+    
+    def test_change_compact(self):
+        """Test changing compacted reports."""
+        region = self.region
+        region.compact_report()
+        region.append_report_description('A new line.')
+        self.assertFalse(region.is_report_compact())
+        self.assertEqual(region.report, LINES + ['A new line.'])
+        
+        region.compact_report()
+        self.assertEqual(region.pop_report_description(), 'A new line.')
+        self.assertEqual(region.report, LINES)
+        
+        region.compact_report()
+        region.report = ['Other line.']
+        self.assertFalse(region.is_report_compact())
+        self.assertEqual(region.report, ['Other line.'])
+    
+    def test_content_hash(self):
+        """Test compacting doesn't change the content hash."""
+        region = self.region
+        structure = Structure(1, 'Tomasa', 'Mine')
+        structure.append_report_description('+ Tomasa [1] : Mine.')
+        region.append_structure(structure)
+        digest = region.content_hash()
+        
+        other = Region.json_deserialize(
+            json.loads(json.dumps(region.json_serialize())))
+        region.compact_report()
+        structure.compact_report()
+        self.assertEqual(region.content_hash(), digest)
+        self.assertEqual(region, other)
+        
+        region.invalidate_content_hash()
+        structure.invalidate_content_hash()
+        self.assertEqual(region.content_hash(), digest)
+        
+        region.append_report_description('A new line.')
+        self.assertNotEqual(region.content_hash(), digest)
+        self.assertNotEqual(region, other)
+    
+    def test_json_methods(self):
+        """Test compacted reports are kept compacted in json."""
+        region = self.region
+        structure = Structure(1, 'Tomasa', 'Mine')
+        structure.append_report_description('+ Tomasa [1] : Mine.')
+        region.append_structure(structure)
+        region.compact_report()
+        structure.compact_report()
+        
+        json_object = json.loads(json.dumps(region.json_serialize()))
+        self.assertIsInstance(json_object['report'], str)
+        self.assertIsInstance(json_object['structures'][0]['report'], str)
+        region_new = Region.json_deserialize(json_object)
+        structure_new = region_new.structures[1]
+        self.assertTrue(region_new.is_report_compact())
+        self.assertTrue(structure_new.is_report_compact())
+        self.assertEqual(region_new.report, LINES)
+        self.assertEqual(structure_new.report, ['+ Tomasa [1] : Mine.'])
+        self.assertEqual(region_new, region)
+        
+        region_new.json_update({'report': ['Other line.']})
+        self.assertFalse(region_new.is_report_compact())
+        self.assertEqual(region_new.report, ['Other line.'])
+        self.assertNotEqual(region_new, region)
+        region_new.json_update({'report': json_object['report']})
+        self.assertTrue(region_new.is_report_compact())
+        self.assertEqual(region_new, region)
+    
+    def test_map_compact_reports(self):
+        """Test Map.compact_reports method."""
+        structure = Structure(1, 'Tomasa', 'Mine')
+        structure.append_report_description('+ Tomasa [1] : Mine.')
+        self.region.append_structure(structure)
+        m = Map()
+        m.add_region_info(self.region)
+        m.add_region_info(Region((1, 1, 'underworld'), 'tunnels'))
+        m.compact_reports()
+        self.assertTrue(self.region.is_report_compact())
+        self.assertTrue(structure.is_report_compact())
+        self.assertEqual(m.get_region((21, 93, None)).region.report, LINES)
+
+if __name__ == '__main__':
+    unittest.main()
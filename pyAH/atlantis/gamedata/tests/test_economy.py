@@ -0,0 +1,99 @@
+"""Unit tests for atlantis.gamedata.economy module."""
+
+from atlantis.gamedata.economy import EconomyProjection, ACTIVITY_TAX, \
+    ACTIVITY_WORK, ACTIVITY_ENTERTAIN, numpy
+from atlantis.gamedata.map import Map, HEX_OLD, HEX_EXITS
+from atlantis.gamedata.region import Region
+
+import unittest
+
+def _region(x, y, population, wealth, productivity, wages, entertainment):
+    """Return a surface plain with the pools of its economy."""
+    region = Region((x, y, None), 'plain', 'Isshire', population, 'vikings',
+                    wealth)
+    region.set_wages(productivity, wages)
+    region.set_entertainment(entertainment)
+    return region
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestEconomyProjection(unittest.TestCase):
+    """Test EconomyProjection class."""
+    
+    def setUp(self):
+        """Project a current, an old and an exits hex."""
+        m = Map()
+        m.add_region_info(_region(21, 93, 2392, 11016, 14.1, 3376, 550))
+        m.add_region_info(_region(22, 92, 1200, 400, 13, 1200, 220),
+                          HEX_OLD)
+        m.add_region_info(Region((21, 91, None), 'ocean', 'Atlantis Ocean'),
+                          HEX_EXITS)
+        self.level = m.levels['surface']
+        self.economy = EconomyProjection.from_level(self.level)
+    
+    def test_from_level(self):
+        """Test EconomyProjection.from_level method."""
+        economy = self.economy
+        self.assertEqual(len(economy), 2)
+        i = economy.index((22, 92, None))
+        self.assertEqual(economy.locations[i], (22, 92, None))
+        self.assertEqual(economy.wealth[i], 400)
+        self.assertEqual(economy.productivity[i], 13)
+        self.assertEqual(economy.wages[i], 1200)
+        self.assertEqual(economy.entertainment[i], 220)
+        self.assertRaises(KeyError, economy.index, (21, 91, None))
+        
+        self.assertEqual(len(EconomyProjection.from_level(self.level,
+                                                          old=False)), 1)
+        economy = EconomyProjection([Region((1, 1, None), 'plain')])
+        self.assertEqual(economy.wages.tolist(), [0])
+        self.assertEqual(len(EconomyProjection([])), 0)
+    
+    def test_income(self):
+        """Test income projections."""
+        economy = self.economy
+        a, b = economy.index((21, 93, None)), economy.index((22, 92, None))
+        tax = economy.tax(10)
+        self.assertEqual((tax[a], tax[b]), (500, 400))
+        work = economy.work(100)
+        self.assertAlmostEqual(work[a], 1410)
+        self.assertEqual(work[b], 1200)
+        entertain = economy.entertain(10, level=2)
+        self.assertEqual((entertain[a], entertain[b]), (400, 220))
+        
+        men = [0, 0]
+        men[a] = 4
+        self.assertEqual(economy.tax(men)[a], 200)
+        self.assertEqual(economy.tax(men)[b], 0)
+        income = economy.income(taxers=10, workers=100, entertainers=10,
+                                level=2)
+        self.assertAlmostEqual(income[a], 2310)
+        self.assertEqual(income[b], 1820)
+    
+    def test_sweep(self):
+        """Test EconomyProjection.sweep method."""
+        economy = self.economy
+        b = economy.index((22, 92, None))
+        tax = economy.sweep([0, 4, 8, 12], ACTIVITY_TAX)
+        self.assertEqual(tax.shape, (2, 4))
+        self.assertEqual(tax[b].tolist(), [0, 200, 400, 400])
+        work = economy.sweep([10, 100], ACTIVITY_WORK)
+        self.assertEqual(work[b].tolist(), [130, 1200])
+        entertain = economy.sweep([10], ACTIVITY_ENTERTAIN, level=3)
+        self.assertEqual(entertain[b].tolist(), [220])
+        self.assertRaises(ValueError, economy.sweep, [1], 5)
+    
+    def test_best_activity(self):
+        """Test EconomyProjection.best_activity method."""
+        economy = self.economy
+        a, b = economy.index((21, 93, None)), economy.index((22, 92, None))
+        best, income = economy.best_activity(20)
+        self.assertEqual((best[a], income[a]), (ACTIVITY_TAX, 1000))
+        self.assertEqual((best[b], income[b]), (ACTIVITY_TAX, 400))
+        best, income = economy.best_activity(3, level=5)
+        self.assertEqual((best[b], income[b]), (ACTIVITY_ENTERTAIN, 220))
+        best, income = economy.best_activity(1000)
+        self.assertEqual((best[a], income[a]), (ACTIVITY_TAX, 11016))
+        self.assertEqual((best[b], income[b]), (ACTIVITY_WORK, 1200))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Unit tests for atlantis.gamedata.event module."""
+
+from atlantis.gamedata.event import Event, EventStore, tokenize, \
+    MESSAGE_EVENT, MESSAGE_ERROR
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.rules import AtlantisRules
+from atlantis.parsers.reportparser import ReportParser
+
+import json
+import unittest
+
+ERRORS = """Scout (412): MOVE: Can't move that direction.
+Scout (412): GIVE: Not enough.
+Miners (413): PRODUCE: Unit doesn't have the required skill.
+Your faction can't have more than 10 mages."""
+
+EVENTS = """Scout (412): Walks from plain (18,38) in Decec to forest (18,40) in Decec.
+Miners (413): Produces 10 iron [IRON] in plain (18,38) in Decec.
+Scout (412): Receives 100 silver [SILV] from Miners (413)."""
+
+def _game_data():
+    """Return game data with parsed errors and events."""
+    gd = GameData(AtlantisRules())
+    parser = ReportParser(gd)
+    for line in ERRORS.splitlines():
+        parser.parse_event('error', line)
+    for line in EVENTS.splitlines():
+        parser.parse_event('event', line)
+    return gd
+
+class TestEvent(unittest.TestCase):
+    """Test faction_event handler of GameData and Event class."""
+    
+    def test_faction_event(self):
+        """Test events are kept as they're reported."""
+        gd = _game_data()
+        self.assertEqual(len(gd.events), 7)
+        e = gd.events[0]
+        self.assertEqual(e.message_type, MESSAGE_ERROR)
+        self.assertEqual(e.message, "MOVE: Can't move that direction")
+        self.assertEqual(e.unit, {'num': 412, 'name': 'Scout'})
+        self.assertIsNone(e.turn)
+        self.assertIsNone(gd.events[3].unit)
+        self.assertEqual(gd.events[4].message_type, MESSAGE_EVENT)
+    
+    def test_tokenize(self):
+        """Test words of messages."""
+        self.assertEqual(tokenize("MOVE: Can't move [IRON] (18,38)."),
+                         ['move', 'can', 't', 'move', 'iron', '18', '38'])
+    
+    def test_json(self):
+        """Test Event serialization."""
+        e = Event(MESSAGE_ERROR, 'GIVE: Not enough', {'num': 1, 'name': 'U'})
+        e.turn = (1, 3)
+        e_copy = Event.json_deserialize(json.loads(json.dumps(
+                e.json_serialize())))
+        self.assertEqual(e_copy.json_serialize(), e.json_serialize())
+        self.assertEqual(e_copy.turn, (1, 3))
+
+class TestEventStore(unittest.TestCase):
+    """Test EventStore class."""
+    
+    def setUp(self):
+        self.store = EventStore()
+        for turn in ((1, 11), (1, 12), (2, 1)):
+            self.store.add_game_data(_game_data(), turn)
+    
+    def test_add(self):
+        """Test events are added with their turn."""
+        self.assertEqual(len(self.store), 21)
+        self.assertEqual(self.store.events[7].turn, (1, 12))
+        self.assertEqual(self.store.get_turns(), [(1, 11), (1, 12), (2, 1)])
+    
+    def test_find(self):
+        """Test finding events."""
+        store = self.store
+        self.assertEqual(len(store.find()), 21)
+        errors = store.find(unit=412, message_type=MESSAGE_ERROR)
+        self.assertEqual(len(errors), 6)
+        self.assertEqual([e.turn for e in errors],
+                         [(1, 11), (1, 11), (1, 12), (1, 12), (2, 1), (2, 1)])
+        self.assertEqual(len(store.find(unit=412, message_type=MESSAGE_ERROR,
+                                        first=(1, 12))), 4)
+        self.assertEqual(len(store.find(unit=412, first=(1, 12),
+                                        last=(1, 12))), 4)
+        self.assertEqual(len(store.find(last=(1, 11))), 7)
+        self.assertEqual(store.find(unit=999), [])
+        
+        # Words, in any order and case
+        found = store.find('IRON produces', last=(1, 12))
+        self.assertEqual([(e.turn, e.unit['num']) for e in found],
+                         [((1, 11), 413), ((1, 12), 413)])
+        self.assertEqual(len(store.find('decec', unit=412)), 3)
+        self.assertEqual(len(store.find('413')), 3)
+        self.assertEqual(store.find('iron', unit=412), [])
+        self.assertEqual(store.find('mithril'), [])
+        self.assertEqual(len(store.find('mages', message_type=MESSAGE_ERROR,
+                                        first=(2, 1))), 1)
+    
+    def test_json(self):
+        """Test EventStore serialization."""
+        store = EventStore.json_deserialize(json.loads(json.dumps(
+                self.store.json_serialize())))
+        self.assertEqual(len(store), 21)
+        self.assertEqual(store.json_serialize(), self.store.json_serialize())
+        self.assertEqual(len(store.find('not enough', unit=412,
+                                        first=(2, 1))), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Unit tests for atlantis.gamedata.gamedata module."""
+
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.item import ItemUnit
+from atlantis.gamedata.rules import AtlantisRules, TerrainType, \
+    DIR_NORTH, DIR_NORTHWEST
+from atlantis.gamedata.skill import SkillDays
+from atlantis.parsers.reportparser import ReportParser
+
+from io import StringIO
+import os.path
+import unittest
+
+RULES_FOLDER = os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                            'rulesets', 'havilah_1.0.0')
+
+REPORT = """Atlantis Report For:
+Faction (3) (War 1, Trade 2, Magic 2)
+May, Year 3
+
+Hostile : none.
+Unfriendly : none.
+Neutral : none.
+Friendly : none.
+Ally : none.
+
+Unclaimed silver: 0.
+
+plain (21,93) in Isshire, 2392 peasants (vikings), $11016.
+------------------------------------------------------------
+  Wages: $14.1 (Max: $3376).
+
+Exits:
+  North : ocean (21,91) in Atlantis Ocean.
+
+* Miner (1), Faction (3), avoiding, behind, 10 vikings [VIKI]. Skills:
+  mining [MINE] 3 (180).
+- Guard (2), Other (4), 5 vikings [VIKI].
+
+Orders Template (Long Format):
+"""
+
+class TestGameData(unittest.TestCase):
+    """Test GameData class."""
+    
+    def setUp(self):
+        self.gd = gd = GameData(AtlantisRules())
+        gd.line('plain (21,93) in Isshire, 2392 peasants (vikings), $11016.')
+        gd.region('plain', 'Isshire', 21, 93, population=2392,
+                  racenames='vikings', wealth=11016)
+        self.unit(1, 'Miner', faction=3, skills=[('MINE', 3), ('COMB', 1)])
+        self.unit(2, 'Guard', faction=None)
+        gd.line('+ Mine [1] : Mine.')
+        gd.region_structure(1, 'Mine', 'Mine')
+        self.unit(3, 'Apprentice', tab=True, faction=3,
+                  skills=[('MINE', 1)])
+        self.unit(4, 'Master', tab=True, faction=4, skills=[('MINE', 5)])
+        
+        gd.line('plain (22,92) in Isshire, 1200 peasants (vikings), $4400.')
+        gd.region('plain', 'Isshire', 22, 92, population=1200,
+                  racenames='vikings', wealth=4400)
+        self.unit(5, 'Quarrier', faction=3, skills=[('QUAR', 2), ('MINE', 4)])
+    
+    def unit(self, num, name, faction, tab=False, skills=()):
+        """Report a unit."""
+        line = '{}* {} ({})'.format('  ' if tab else '', name, num)
+        self.gd.line(line)
+        self.gd.region_unit(
+                num, name, [ItemUnit(abr='VIKI', names='vikings', amt=10)],
+                tab=tab,
+                faction={'num': faction, 'name': 'F'} if faction else None,
+                skills=[SkillDays(abr, abr.lower(), level, 30) \
+                        for abr, level in skills],
+                behind=True)
+    
+    def test_region_unit(self):
+        """Test GameData.region_unit method."""
+        region = self.gd.map.get_region((21, 93, None)).region
+        self.assertEqual([u.num for u in region.units], [1, 2])
+        self.assertEqual([u.num for u in region.structures[1].units], [3, 4])
+        self.assertEqual(region.report, ['plain (21,93) in Isshire, 2392 '
+                                         'peasants (vikings), $11016.'])
+        unit = region.units[0]
+        self.assertEqual(unit.report, ['* Miner (1)'])
+        self.assertEqual(unit.location, (21, 93, None))
+        self.assertIsNone(unit.structure)
+        self.assertEqual(unit.flags, {'behind': True})
+        self.assertEqual(region.structures[1].units[0].structure, 1)
+        self.assertEqual(region.structures[1].report, ['+ Mine [1] : Mine.'])
+        
+        region = self.gd.map.get_region((22, 92, None)).region
+        self.assertEqual([u.num for u in region.units], [5])
+        self.assertFalse(hasattr(region, 'structures'))
+    
+    def test_get_unit(self):
+        """Test GameData.get_unit method."""
+        self.assertEqual(self.gd.get_unit(4).name, 'Master')
+        self.assertEqual(self.gd.get_unit(4).location, (21, 93, None))
+        self.assertEqual(self.gd.get_unit(5).location, (22, 92, None))
+        self.assertIsNone(self.gd.get_unit(6))
+    
+    def test_find_units(self):
+        """Test GameData.find_units method."""
+        def nums(**kwargs):
+            return [u.num for u in self.gd.find_units(**kwargs)]
+        self.assertEqual(nums(), [1, 2, 3, 4, 5])
+        self.assertEqual(nums(faction=3), [1, 3, 5])
+        self.assertEqual(nums(faction=5), [])
+        self.assertEqual(nums(skill='MINE'), [4, 5, 1, 3])
+        self.assertEqual(nums(skill='MINE', min_level=3), [4, 5, 1])
+        self.assertEqual(nums(skill='MINE', min_level=3, faction=3), [5, 1])
+        self.assertEqual(nums(skill='MINE', faction=4), [4])
+        self.assertEqual(nums(skill='COMB', faction=3), [1])
+        self.assertEqual(nums(skill='COMB', min_level=2, faction=3), [])
+        self.assertEqual(nums(skill='WEAP'), [])
+    
+    def test_report_read_twice(self):
+        """Test units reported again are indexed once."""
+        gd = GameData(AtlantisRules.read_folder(RULES_FOLDER))
+        for dummy in range(2):
+            ReportParser(gd).parse(StringIO(REPORT))
+        self.assertEqual([u.num for u in gd.find_units()], [1, 2])
+        self.assertEqual([u.num for u in gd.find_units(faction=3)], [1])
+        self.assertEqual([u.num for u in gd.find_units(faction=4)], [2])
+        self.assertEqual([u.num for u in gd.find_units(skill='MINE')], [1])
+        self.assertEqual(
+                [u.num for u in gd.find_units(skill='MINE', faction=3)], [1])
+        self.assertIs(gd.find_units(skill='MINE')[0], gd.get_unit(1))
+    
+    def test_rules_tables(self):
+        """Test exits use the lookup tables of rules."""
+        rules = AtlantisRules()
+        rules.strings = {'directions': [['n', 'north'], ['ne', 'northeast'],
+                                        ['se', 'southeast'], ['s', 'south'],
+                                        ['sw', 'southwest'],
+                                        ['nw', 'northwest']]}
+        rules.terrain_types['plain'] = TerrainType(name='plain')
+        gd = GameData(rules)
+        gd.line('plain (21,93) in Isshire, 2392 peasants (vikings), $11016.')
+        gd.region('plain', 'Isshire', 21, 93, population=2392,
+                  racenames='vikings', wealth=11016)
+        gd.region_exits('Northwest', 'plain', 'Isshire', 20, 92, None)
+        gd.region_exits('North', 'ocean', 'Atlantis Ocean', 21, 91, None)
+        
+        region = gd.map.get_region((21, 93, None)).region
+        self.assertEqual(region.terrain, 'plain')
+        self.assertEqual(region.exits, {DIR_NORTHWEST: (20, 92, None),
+                                        DIR_NORTH: (21, 91, None)})
+        self.assertEqual(gd.map.get_region((20, 92, None)).region.terrain,
+                         'plain')
+        self.assertEqual(gd.map.get_region((21, 91, None)).region.terrain,
+                         'ocean')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Unit tests for atlantis.gamedata.history module."""
+
+from atlantis.gamedata.history import TurnHistory
+from atlantis.gamedata.map import Map, HEX_EXITS, HEX_OLD
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.item import ItemMarket
+from atlantis.helpers.json import get_json_backends, set_json_backend
+
+import unittest
+
+class TestTurnHistory(unittest.TestCase):
+    """Test TurnHistory class."""
+    
+    def _make_map(self, wealth, price):
+        """Return a turn map with some changing values."""
+        m = Map()
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings',
+                   wealth, {'name': 'Durshire', 'type': 'town'})
+        r.set_market('sell', [ItemMarket('GRAI', 93, price)])
+        m.add_region_info(r)
+        r = Region((22, 94, None), 'forest', 'Isshire', 2000, 'vikings',
+                   wealth // 2)
+        r.set_market('sell', [ItemMarket('GRAI', 93, 20)])
+        m.add_region_info(r)
+        m.add_region_info(Region((21, 91, None), 'forest', 'Isshire'),
+                          HEX_EXITS)
+        r = Region((1, 2, 'underworld'), 'tunnels', 'Ithaca', 200,
+                   'drow elves', 50)
+        m.add_region_info(r)
+        return m
+    
+    def setUp(self):
+        self.history = TurnHistory()
+        self.history.add_map((1, 11), self._make_map(1000, 20))
+        self.history.add_map((1, 12), self._make_map(1100, 20))
+        self.history.add_map((2, 1), self._make_map(1200, 25))
+    
+    def tearDown(self):
+        self.history.close()
+    
+    def test_turns(self):
+        """Test TurnHistory turn methods."""
+        self.assertEqual(self.history.get_turns(), [(1, 11), (1, 12), (2, 1)])
+        self.assertEqual(self.history.get_last_turn(), (2, 1))
+        self.assertEqual(TurnHistory().get_last_turn(), None)
+    
+    def test_add_map(self):
+        """Test only current hexes are recorded by default."""
+        m = self._make_map(1300, 25)
+        m.get_region((21, 93, None)).status = HEX_OLD
+        self.history.add_map((2, 2), m)
+        self.assertEqual(self.history.get_region((21, 93, None), (2, 2)),
+                         None)
+        self.assertEqual(self.history.get_region((22, 94, None)).wealth, 650)
+        self.assertEqual(self.history.get_region((21, 91, None)), None)
+        
+        self.history.add_map((2, 2), m, (HEX_OLD,))
+        self.assertEqual(self.history.get_region((21, 93, None)).wealth, 1300)
+    
+    def test_get_region(self):
+        """Test TurnHistory.get_region method."""
+        r = self.history.get_region((21, 93, None), (1, 12))
+        self.assertEqual(r, self._make_map(1100, 20).get_region(
+                (21, 93, None)).region)
+        r = self.history.get_region((1, 2, 'underworld'))
+        self.assertEqual(r.name, 'Ithaca')
+        self.assertEqual(self.history.get_region((21, 93, None), (1, 1)),
+                         None)
+    
+    def test_get_field_history(self):
+        """Test TurnHistory.get_field_history method."""
+        self.assertEqual(
+                self.history.get_field_history((21, 93, None), 'wealth'),
+                [((1, 11), 1000), ((1, 12), 1100), ((2, 1), 1200)])
+        self.assertEqual(
+                self.history.get_field_history((21, 93, None), 'wealth', 2),
+                [((1, 12), 1100), ((2, 1), 1200)])
+        self.assertEqual(
+                self.history.get_field_history((21, 93, None), 'town', 1),
+                [((2, 1), {'name': 'Durshire', 'type': 'town'})])
+        self.assertEqual(
+                self.history.get_field_history((5, 5, None), 'wealth'), [])
+        self.assertRaises(KeyError, self.history.get_field_history,
+                          (21, 93, None), 'region')
+    
+    def test_get_changed(self):
+        """Test TurnHistory get_changed and get_market_changes methods."""
+        self.assertEqual(self.history.get_market_changes(), [(21, 93, None)])
+        self.assertEqual(self.history.get_market_changes((1, 12)), [])
+        self.assertEqual(self.history.get_market_changes((1, 11)), [])
+        self.assertEqual(self.history.get_changed('wealth'),
+                         [(21, 93, None), (22, 94, None)])
+        self.assertEqual(self.history.get_changed('population'), [])
+        self.assertRaises(KeyError, self.history.get_changed, 'x')
+    
+    def test_json_backends(self):
+        """Test json columns don't depend on the json backend."""
+        backends = get_json_backends()
+        history = TurnHistory()
+        try:
+            for turn, backend in (((1, 1), backends[0]),
+                                  ((1, 2), backends[-1])):
+                set_json_backend(backend)
+                history.add_map(turn, self._make_map(1000, 20))
+            for field in ('town', 'market', 'products'):
+                self.assertEqual(history.get_changed(field), [])
+        finally:
+            set_json_backend()
+            history.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 """Unit tests for atlantis.gamedata.map module."""
 
 from atlantis.gamedata.map import MapHex, MapLevel, Map, \
-    HEX_CURRENT, HEX_OLD, HEX_EXITS, SEEN_CURRENT, \
+    HEX_CURRENT, HEX_OLD, HEX_EXITS, SEEN_CURRENT, MERGE_KEEP, MERGE_REPLACE, \
     LEVEL_SURFACE, LEVEL_UNDERWORLD, LEVEL_UNDERDEEP
 from atlantis.gamedata.region import Region
 from atlantis.gamedata.rules import DIR_NORTHWEST
@@ -90,6 +90,29 @@ class TestMapHex(unittest.TestCase):
         mh_new = MapHex.json_deserialize(json.load(io))
         
         self.assertEqual(mh, mh_new)
+    
+    def test_content_hash(self):
+        """Test MapHex content hash."""
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings', 11016,
+                   {'name': 'Durshire', 'type': 'town'})
+        mh = MapHex(r, HEX_CURRENT)
+        mh_new = MapHex.json_deserialize(json.loads(json.dumps(
+                mh.json_serialize())))
+        self.assertEqual(mh.content_hash(), mh_new.content_hash())
+        
+        mh_new.status = HEX_OLD
+        self.assertNotEqual(mh, mh_new)
+        mh_new.status = HEX_CURRENT
+        self.assertEqual(mh, mh_new)
+        mh_new.last_seen = (1, 1)
+        self.assertNotEqual(mh, mh_new)
+        mh_new.last_seen = SEEN_CURRENT
+        
+        # Region changes are noticed by the hex
+        mh_new.region.wealth = 100
+        self.assertNotEqual(mh, mh_new)
+        mh.region.wealth = 100
+        self.assertEqual(mh, mh_new)
 
 class TestMapLevel(unittest.TestCase):
     """Test MapLevel class."""
@@ -331,6 +354,218 @@ class TestMap(unittest.TestCase):
         m_new = Map.json_deserialize(json.load(io))
          
         self.assertEqual(m, m_new)
+    
+    def test_json_stream_methods(self):
+        """Test Map streaming json methods."""
+        io = StringIO()
+        
+        m = Map()
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings', 11016,
+                   {'name': 'Durshire', 'type': 'town'})
+        m.add_region_info(r)
+        r = Region((22, 94, None), 'forest', 'Isshire')
+        m.add_region_info(r, HEX_EXITS)
+        r = Region((1, 1, 'underworld'), 'tunnels', 'Ithaca', 200,
+                   'drow elves', 50)
+        m.add_region_info(r)
+        
+        m.json_dump_stream(io)
+        io.seek(0)
+        self.assertEqual(json.load(io),
+                         json.loads(json.dumps(m.json_serialize())))
+        
+        io.seek(0)
+        self.assertEqual(Map.json_load_stream(io), m)
+        
+        io.seek(0)
+        hexes = list(Map.json_iter_hexes(io))
+        self.assertEqual(len(hexes), 3)
+        for name, mh in hexes:
+            self.assertEqual(
+                    m.levels[name].hexes[tuple(mh.region.location[:2])], mh)
+        
+        io.seek(0)
+        io.truncate(0)
+        json.dump(m, io, default=Map.json_serialize)
+        io.seek(0)
+        self.assertEqual(Map.json_load_stream(io), m)
+    
+    def test_age(self):
+        """Test Map.age method."""
+        m = Map()
+        m.add_region_info(Region((21, 93, None), 'plain', 'Isshire', 9836,
+                                 'vikings', 11016))
+        m.add_region_info(Region((22, 94, None), 'forest', 'Isshire'),
+                          HEX_EXITS)
+        
+        self.assertEqual(m.age((1, 4)), 1)
+        mh = m.get_region((21, 93, None))
+        self.assertEqual(mh.status, HEX_OLD)
+        self.assertEqual(mh.last_seen, (1, 4))
+        mh = m.get_region((22, 94, None))
+        self.assertEqual(mh.status, HEX_EXITS)
+        self.assertEqual(mh.last_seen, SEEN_CURRENT)
+        self.assertEqual(m.age(), 0)
+    
+    def test_merge(self):
+        """Test Map.merge method."""
+        m = Map()
+        m.add_region_info(Region((21, 93, None), 'plain', 'Isshire', 9836,
+                                 'vikings', 11016))
+        m.add_region_info(Region((22, 94, None), 'forest', 'Isshire', 120,
+                                 'vikings', 300))
+        m.add_region_info(Region((23, 95, None), 'forest', 'Isshire'),
+                          HEX_EXITS)
+        m.age((1, 4))
+        
+        turn = Map()
+        r1 = Region((21, 93, None), 'plain', 'Isshire', 9900, 'vikings',
+                    11100)
+        turn.add_region_info(r1)
+        turn.add_region_info(Region((22, 94, None), 'forest', 'Isshire'),
+                             HEX_EXITS)
+        r3 = Region((23, 95, None), 'forest', 'Isshire', 100, 'vikings', 50)
+        turn.add_region_info(r3)
+        r4 = Region((1, 1, 'underworld'), 'tunnels', 'Ithaca')
+        turn.add_region_info(r4, HEX_EXITS)
+        
+        stats = m.merge(turn, (1, 5))
+        self.assertEqual((stats.added, stats.replaced, stats.kept,
+                          stats.conflicts, stats.demoted), (1, 2, 1, 0, 0))
+        self.assertEqual(sorted(m.levels.keys()), ['surface', 'underworld'])
+        mh = m.get_region((21, 93, None))
+        self.assertIs(mh.region, r1)
+        self.assertEqual((mh.status, mh.last_seen), (HEX_CURRENT, (1, 5)))
+        mh = m.get_region((22, 94, None))
+        self.assertEqual(mh.region.population, 120)
+        self.assertEqual((mh.status, mh.last_seen), (HEX_OLD, (1, 4)))
+        mh = m.get_region((23, 95, None))
+        self.assertIs(mh.region, r3)
+        mh = m.get_region((1, 1, 'underworld'))
+        self.assertIs(mh.region, r4)
+        self.assertEqual((mh.status, mh.last_seen), (HEX_EXITS, (1, 5)))
+        self.assertEqual(turn.get_region((21, 93, None)).last_seen,
+                         SEEN_CURRENT)
+        
+        # Same data, as other faction report of the same turn
+        other = Map()
+        other.add_region_info(Region((21, 93, None), 'plain', 'Isshire',
+                                     9900, 'vikings', 11100))
+        stats = m.merge(other, (1, 5))
+        self.assertEqual((stats.added, stats.replaced, stats.kept,
+                          stats.conflicts), (0, 0, 1, 0))
+        self.assertIs(m.get_region((21, 93, None)).region, r1)
+    
+    def test_merge_conflicts(self):
+        """Test Map.merge conflict policies."""
+        m = Map()
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings', 11016)
+        m.add_region_info(r)
+        other = Map()
+        r2 = Region((21, 93, None), 'plain', 'Isshire', 9900, 'vikings',
+                    11100)
+        other.add_region_info(r2)
+        
+        stats = m.merge(other, policy=MERGE_KEEP)
+        self.assertEqual((stats.replaced, stats.kept, stats.conflicts),
+                         (0, 1, 1))
+        self.assertIs(m.get_region((21, 93, None)).region, r)
+        
+        stats = m.merge(other, policy=MERGE_REPLACE)
+        self.assertEqual((stats.replaced, stats.kept, stats.conflicts),
+                         (1, 0, 1))
+        self.assertIs(m.get_region((21, 93, None)).region, r2)
+        
+        m.add_region_info(r)
+        calls = []
+        def policy(old, new):
+            calls.append((old.region, new.region))
+            return old if old.region.wealth > new.region.wealth else new
+        stats = m.merge(other, policy=policy)
+        self.assertEqual(calls, [(r, r2)])
+        self.assertEqual((stats.replaced, stats.kept, stats.conflicts),
+                         (1, 0, 1))
+        self.assertIs(m.get_region((21, 93, None)).region, r2)
+    
+    def test_merge_current(self):
+        """Test Map.merge ranks current hexes as seen the newest turn."""
+        m = Map()
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings', 11016)
+        m.add_region_info(r)
+        other = Map()
+        other.add_region_info(Region((21, 93, None), 'plain', 'Isshire',
+                                     9900, 'vikings', 11100))
+        other.get_region((21, 93, None)).last_seen = (1, 4)
+        
+        stats = m.merge(other)
+        self.assertEqual((stats.replaced, stats.kept, stats.conflicts),
+                         (0, 1, 0))
+        self.assertIs(m.get_region((21, 93, None)).region, r)
+        self.assertEqual(m.get_region((21, 93, None)).last_seen, SEEN_CURRENT)
+        
+        # Current hexes are seen the turn given
+        stats = m.merge(other, (1, 5))
+        self.assertEqual((stats.replaced, stats.kept, stats.conflicts),
+                         (0, 1, 0))
+        stats = m.merge(other, (1, 4), MERGE_REPLACE)
+        self.assertEqual((stats.replaced, stats.kept, stats.conflicts),
+                         (1, 0, 1))
+        self.assertEqual(m.get_region((21, 93, None)).last_seen, (1, 4))
+    
+    def test_merge_turn(self):
+        """Test Map.merge_turn method."""
+        m = Map()
+        m.add_region_info(Region((21, 93, None), 'plain', 'Isshire', 9836,
+                                 'vikings', 11016))
+        m.add_region_info(Region((22, 94, None), 'forest', 'Isshire', 120,
+                                 'vikings', 300))
+        m.age((1, 4))
+        for mh in m.levels['surface']:
+            mh.status = HEX_CURRENT
+        
+        faction1 = Map()
+        faction1.add_region_info(Region((21, 93, None), 'plain', 'Isshire',
+                                        9900, 'vikings', 11100))
+        faction1.add_region_info(Region((24, 94, None), 'forest', 'Isshire'),
+                                 HEX_EXITS)
+        faction2 = Map()
+        faction2.add_region_info(Region((24, 94, None), 'forest', 'Isshire',
+                                        30, 'vikings', 10))
+        faction2.add_region_info(Region((21, 93, None), 'plain', 'Isshire'),
+                                 HEX_EXITS)
+        
+        stats = m.merge_turn([faction1, faction2], (1, 5))
+        self.assertEqual((stats.added, stats.replaced, stats.kept,
+                          stats.conflicts, stats.demoted), (1, 2, 1, 0, 2))
+        mh = m.get_region((21, 93, None))
+        self.assertEqual((mh.status, mh.last_seen), (HEX_CURRENT, (1, 5)))
+        self.assertEqual(mh.region.population, 9900)
+        mh = m.get_region((22, 94, None))
+        self.assertEqual((mh.status, mh.last_seen), (HEX_OLD, (1, 4)))
+        mh = m.get_region((24, 94, None))
+        self.assertEqual((mh.status, mh.last_seen), (HEX_CURRENT, (1, 5)))
+        self.assertEqual(mh.region.population, 30)
+    
+    def test_merge_turn_ages(self):
+        """Test Map.merge_turn ages hexes missing in the merged maps."""
+        m = Map()
+        m.add_region_info(Region((21, 93, None), 'plain', 'Isshire', 9836,
+                                 'vikings', 11016))
+        m.add_region_info(Region((22, 94, None), 'forest', 'Isshire', 120,
+                                 'vikings', 300))
+        turn = Map()
+        turn.add_region_info(Region((21, 93, None), 'plain', 'Isshire',
+                                    9900, 'vikings', 11100))
+        
+        m.merge_turn([turn], (2, 1))
+        mh = m.get_region((22, 94, None))
+        self.assertEqual((mh.status, mh.last_seen), (HEX_OLD, (1, 12)))
+        mh = m.get_region((21, 93, None))
+        self.assertEqual((mh.status, mh.last_seen), (HEX_CURRENT, (2, 1)))
+        
+        m.merge_turn([Map()], (2, 2))
+        mh = m.get_region((21, 93, None))
+        self.assertEqual((mh.status, mh.last_seen), (HEX_OLD, (2, 1)))
 
 if __name__ == '__main__':
     unittest.main()
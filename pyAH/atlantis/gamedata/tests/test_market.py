@@ -0,0 +1,104 @@
+"""Unit tests for atlantis.gamedata.market module."""
+
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.item import ItemMarket
+from atlantis.gamedata.map import Map
+from atlantis.gamedata.market import MarketIndex
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.rules import AtlantisRules
+
+import unittest
+
+def _horses(amt, price):
+    return ItemMarket('HORS', amt, price, 'horse', 'horses')
+
+class TestMarketIndex(unittest.TestCase):
+    """Test MarketIndex class."""
+    
+    def setUp(self):
+        self.index = index = MarketIndex()
+        index.add_market((21, 93, None), 'sell', [_horses(10, 60)])
+        index.add_market((22, 92, None), 'sell',
+                         [_horses(5, 70), ItemMarket('GRAI', 20, 15)])
+        index.add_market((30, 100, None), 'sell', [_horses(8, 80)])
+        index.add_market((3, 3, 'underworld'), 'sell', [_horses(2, 90)])
+        index.add_market((21, 93, None), 'buy', [_horses(4, 50)])
+        index.add_market((22, 92, None), 'buy', [_horses(3, 50)])
+    
+    def test_find(self):
+        """Test MarketIndex.find method."""
+        index = self.index
+        self.assertEqual([o[3] for o in index.find('HORS', 'sell')],
+                         [90, 80, 70, 60])
+        self.assertEqual(index.find('HORS', 'buy'),
+                         [((21, 93, None), 'buy', 4, 50),
+                          ((22, 92, None), 'buy', 3, 50)])
+        self.assertEqual(index.find('GRAI', 'buy'), [])
+        self.assertEqual(index.find('IRON', 'sell'), [])
+        
+        self.assertEqual([o[3] for o in index.find('HORS', 'sell',
+                                                   min_price=65,
+                                                   max_price=80)],
+                         [80, 70])
+        self.assertEqual(index.find('HORS', 'sell', top=1),
+                         [((3, 3, 'underworld'), 'sell', 2, 90)])
+        
+        near = (21, 93, None)
+        self.assertEqual([o[3] for o in index.find('HORS', 'sell',
+                                                   near=near)],
+                         [80, 70, 60])
+        self.assertEqual([o[3] for o in index.find('HORS', 'sell', near=near,
+                                                   distance=1)],
+                         [70, 60])
+        self.assertEqual(index.find('HORS', 'sell', near=near, distance=1,
+                                    top=1),
+                         [((22, 92, None), 'sell', 5, 70)])
+        self.assertEqual(index.find('HORS', 'sell', near=(1, 1, 'underworld'),
+                                    distance=2),
+                         [((3, 3, 'underworld'), 'sell', 2, 90)])
+    
+    def test_add_market(self):
+        """Test markets reported again replace the old ones."""
+        index = self.index
+        index.add_market((22, 92, None), 'sell', [_horses(1, 60)])
+        self.assertEqual(index.find('HORS', 'sell', max_price=60),
+                         [((21, 93, None), 'sell', 10, 60),
+                          ((22, 92, None), 'sell', 1, 60)])
+        self.assertEqual(index.get_items('sell'), ['HORS'])
+        
+        index.remove_market((21, 93, None), 'sell')
+        index.remove_market((21, 93, None), 'sell')
+        self.assertEqual(index.find('HORS', 'sell', max_price=60),
+                         [((22, 92, None), 'sell', 1, 60)])
+        self.assertEqual(index.get_items('buy'), ['HORS'])
+    
+    def test_from_map(self):
+        """Test MarketIndex.from_map method."""
+        region = Region((21, 93, None), 'plain', 'Isshire')
+        region.set_market('sell', [_horses(10, 60)])
+        region.set_market('buy', [ItemMarket('VIKI', 95, 56)])
+        m = Map()
+        m.add_region_info(region)
+        m.add_region_info(Region((21, 91, None), 'ocean', 'Atlantis Ocean'))
+        index = MarketIndex.from_map(m)
+        self.assertEqual(index.find('HORS', 'sell'),
+                         [((21, 93, None), 'sell', 10, 60)])
+        self.assertEqual(index.find('VIKI', 'buy'),
+                         [((21, 93, None), 'buy', 95, 56)])
+    
+    def test_game_data(self):
+        """Test markets are indexed as they're reported."""
+        gd = GameData(AtlantisRules())
+        gd.line('plain (21,93) in Isshire, 2392 peasants (vikings), $11016.')
+        gd.region('plain', 'Isshire', 21, 93, population=2392,
+                  racenames='vikings', wealth=11016)
+        gd.region_market('sell', [_horses(10, 60)])
+        gd.region_market('buy', [ItemMarket('VIKI', 95, 56, 'viking',
+                                            'vikings')])
+        self.assertEqual(gd.markets.find('HORS', 'sell'),
+                         [((21, 93, None), 'sell', 10, 60)])
+        self.assertEqual(gd.markets.find('VIKI', 'buy'),
+                         [((21, 93, None), 'buy', 95, 56)])
+
+if __name__ == '__main__':
+    unittest.main()
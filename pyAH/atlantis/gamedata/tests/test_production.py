@@ -0,0 +1,109 @@
+"""Unit tests for atlantis.gamedata.production module."""
+
+from atlantis.gamedata.gamedata import GameData
+from atlantis.gamedata.item import ItemAmount
+from atlantis.gamedata.map import Map, HEX_CURRENT, HEX_OLD, HEX_EXITS
+from atlantis.gamedata.production import ProductionIndex
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.rules import AtlantisRules
+
+import unittest
+
+def _region(location, terrain, products):
+    """Return a region with (*abr*, *amount*) products."""
+    region = Region(location, terrain, 'Isshire')
+    region.set_products([ItemAmount(abr, amt) for abr, amt in products])
+    return region
+
+class TestProductionIndex(unittest.TestCase):
+    """Test ProductionIndex class."""
+    
+    def setUp(self):
+        """Index products of current, old and exits hexes."""
+        self.m = m = Map()
+        m.add_region_info(_region((21, 93, None), 'plain',
+                                  [('GRAI', 34), ('HORS', 14)]))
+        m.add_region_info(_region((22, 92, None), 'mountain',
+                                  [('IRON', 10), ('STON', 20)]))
+        m.add_region_info(_region((30, 100, None), 'mountain',
+                                  [('IRON', 25)]), HEX_OLD)
+        m.add_region_info(_region((24, 90, None), 'forest',
+                                  [('WOOD', 15), ('IRON', 2)]))
+        m.add_region_info(_region((3, 3, 'underworld'), 'tunnels',
+                                  [('IRON', 30)]))
+        m.add_region_info(Region((21, 91, None), 'ocean', 'Atlantis Ocean'),
+                          HEX_EXITS)
+        self.index = ProductionIndex.from_map(m)
+    
+    def test_total(self):
+        """Test ProductionIndex.total method."""
+        index = self.index
+        self.assertEqual(index.total('IRON'), 67)
+        self.assertEqual(index.total('IRON', level='surface'), 37)
+        self.assertEqual(index.total('IRON', terrain='mountain'), 35)
+        self.assertEqual(index.total('IRON', 'underworld', 'tunnels'), 30)
+        self.assertEqual(index.total('IRON', 'underworld', 'mountain'), 0)
+        self.assertEqual(index.total('MITH'), 0)
+        self.assertEqual(index.get_items(),
+                         ['GRAI', 'HORS', 'IRON', 'STON', 'WOOD'])
+    
+    def test_find(self):
+        """Test ProductionIndex.find method."""
+        index = self.index
+        self.assertEqual(sorted(index.find('IRON', 'surface')),
+                         [((22, 92, None), 10, 'mountain', HEX_CURRENT),
+                          ((24, 90, None), 2, 'forest', HEX_CURRENT),
+                          ((30, 100, None), 25, 'mountain', HEX_OLD)])
+        self.assertEqual(len(index.find('IRON')), 4)
+        self.assertEqual(index.find('IRON', status=HEX_OLD),
+                         [((30, 100, None), 25, 'mountain', HEX_OLD)])
+        self.assertEqual(len(index.find('IRON', terrain='mountain',
+                                        min_amount=20)), 1)
+        self.assertEqual(index.find('MITH'), [])
+        self.assertEqual(index.find('IRON', 'nexus'), [])
+    
+    def test_nearest(self):
+        """Test ProductionIndex.nearest method."""
+        index = self.index
+        self.assertEqual(index.nearest('IRON', (21, 93, None)),
+                         [(1, (22, 92, None), 10, 'mountain', HEX_CURRENT)])
+        self.assertEqual([n[:2] for n in index.nearest('IRON', (21, 93, None),
+                                                       top=5)],
+                         [(1, (22, 92, None)), (3, (24, 90, None)),
+                          (9, (30, 100, None))])
+        self.assertEqual(index.nearest('IRON', (21, 93, None),
+                                       exclude={(22, 92, None)},
+                                       min_amount=5),
+                         [(9, (30, 100, None), 25, 'mountain', HEX_OLD)])
+        self.assertEqual(index.nearest('IRON', (1, 1, 'underworld')),
+                         [(2, (3, 3, 'underworld'), 30, 'tunnels',
+                           HEX_CURRENT)])
+    
+    def test_add_region(self):
+        """Test regions added again replace their products."""
+        index = self.index
+        index.add_region(_region((22, 92, None), 'mountain',
+                                 [('IRON', 12)]), HEX_OLD)
+        self.assertEqual(index.total('IRON', terrain='mountain'), 37)
+        self.assertEqual(index.total('STON'), 0)
+        self.assertNotIn('STON', index.get_items())
+        self.assertEqual(index.find('IRON', status=HEX_OLD)[-1],
+                         ((22, 92, None), 12, 'mountain', HEX_OLD))
+        
+        index.remove_region((22, 92, None))
+        index.remove_region((22, 92, None))
+        self.assertEqual(index.total('IRON'), 57)
+    
+    def test_game_data(self):
+        """Test products are indexed as they're reported."""
+        gd = GameData(AtlantisRules())
+        gd.line('plain (21,93) in Isshire, 2392 peasants (vikings), $11016.')
+        gd.region('plain', 'Isshire', 21, 93, population=2392,
+                  racenames='vikings', wealth=11016)
+        gd.region_products([ItemAmount('GRAI', 34), ItemAmount('HORS', 14)])
+        self.assertEqual(gd.production.total('HORS', terrain='plain'), 14)
+        self.assertEqual(gd.production.nearest('GRAI', (22, 92, None)),
+                         [(1, (21, 93, None), 34, 'plain', HEX_CURRENT)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@
 from atlantis.gamedata.region import Region
 from atlantis.gamedata.item import ItemAmount, ItemMarket
 from atlantis.gamedata.structure import Structure
-from atlantis.gamedata.rules import DIR_NORTH
+from atlantis.gamedata.rules import DIR_NORTH, DIR_SOUTHEAST
 
 from io import StringIO
 
@@ -172,6 +172,50 @@ class TestRegion(unittest.TestCase):
         self.assertEqual(region.structures, {1: structure})
         
 
+    def test_content_hash(self):
+        """Test content hash invalidation by Region methods."""
+        region = Region((21, 93, None), 'plain', 'Isshire',
+                        2392, 'vikings', 11016,
+                        {'name': 'Durshire', 'type': 'town'})
+        region.set_exit(DIR_NORTH, (21, 91, None))
+        region.set_market('sell', [ItemMarket('GRAI', 171, 24,
+                                              names='grain')])
+        other = Region.json_deserialize(json.loads(json.dumps(
+                region.json_serialize())))
+        # json turns exit directions into strings
+        other.exits = region.exits.copy()
+        self.assertEqual(region, other)
+        
+        h = region.content_hash()
+        region.append_report_description('plain (21,93) in Isshire.')
+        self.assertNotEqual(region.content_hash(), h)
+        region.pop_report_description()
+        self.assertEqual(region.content_hash(), h)
+        
+        region.set_market('buy', [ItemMarket('SWOR', 1, 101,
+                                             names='sword')])
+        self.assertNotEqual(region, other)
+        other.set_market('buy', [ItemMarket('SWOR', 1, 101,
+                                            names='sword')])
+        self.assertEqual(region, other)
+        
+        region.set_exit(DIR_NORTH + 1, (22, 92, None))
+        self.assertNotEqual(region, other)
+        other.set_exit(DIR_NORTH + 1, (22, 92, None))
+        self.assertEqual(region, other)
+        
+        # Changes in structures are noticed by the region
+        region.append_structure(Structure(1, 'Mine', 'Mine'))
+        self.assertNotEqual(region, other)
+        other.append_structure(Structure(1, 'Mine', 'Mine'))
+        self.assertEqual(region, other)
+        region.structures[1].name = 'Tomasa'
+        self.assertNotEqual(region, other)
+        
+        other.structures[1].append_report_description('+ Tomasa [1]')
+        self.assertNotEqual(other.structures[1],
+                            Structure(1, 'Mine', 'Mine'))
+    
     def test_json_methods(self):
         """Test implementation of JsonSerializable interface."""
         io = StringIO()
@@ -232,6 +276,26 @@ class TestRegion(unittest.TestCase):
         io.seek(0)
         region_new = Region.json_deserialize(json.load(io))
         self.assertEqual(region, region_new)
+    
+    def test_json_exits(self):
+        """Test exits read from json, where their keys are strings."""
+        region = Region((21, 93, None), 'plain', 'Isshire',
+                        2392, 'vikings', 11016,
+                        {'name': 'Durshire', 'type': 'town'})
+        region.set_exit(DIR_NORTH, (21, 91, None))
+        region.set_exit(DIR_SOUTHEAST, (22, 94, None))
+        
+        json_object = json.loads(json.dumps(region.json_serialize()))
+        self.assertEqual(sorted(json_object['exits']),
+                         [str(DIR_NORTH), str(DIR_SOUTHEAST)])
+        region_new = Region.json_deserialize(json_object)
+        self.assertEqual(region_new.exits, region.exits)
+        self.assertEqual(region_new, region)
+        
+        region_new.json_update({'exits': {str(DIR_NORTH): [21, 91, None],
+                                          'in': [1, 1, 'shaft']}})
+        self.assertEqual(region_new.exits, {DIR_NORTH: (21, 91, None),
+                                            'in': (1, 1, 'shaft')})
 
 if __name__ == '__main__':
     unittest.main()
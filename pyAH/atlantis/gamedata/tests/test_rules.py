@@ -3,10 +3,12 @@
 from atlantis.gamedata.rules import TerrainType
 from atlantis.gamedata.rules import StructureType
 from atlantis.gamedata.rules import AtlantisRules
-from atlantis.gamedata.rules import DIR_NORTH, DIR_NORTHWEST
+from atlantis.gamedata.rules import DIR_NORTH, DIR_NORTHEAST, DIR_SOUTHEAST, \
+    DIR_SOUTH, DIR_NORTHWEST
 from atlantis.gamedata.rules import STRUCTURE_BUILDING
 
 import json
+import os.path
 
 from io import StringIO
 import unittest
@@ -59,16 +61,35 @@ class TestAtlantisRules(unittest.TestCase):
     def test_get_direction(self):
         """Test AtlantisRules.get_direction method"""
         ar = AtlantisRules()
-        ar.strings['directions'] = [['n', 'north'],
+        ar.strings = {'directions': [['n', 'north'],
                                     ['ne', 'northeast'],
                                     ['se', 'southeast'],
                                     ['s', 'south'],
                                     ['sw', 'southwest'],
-                                    ['nw', 'northwest']]
+                                    ['nw', 'northwest']]}
         
         self.assertEqual(ar.get_direction('n'), DIR_NORTH)
         self.assertEqual(ar.get_direction('northwest'), DIR_NORTHWEST)
+        self.assertEqual(ar.get_direction('Northwest'), DIR_NORTHWEST)
+        self.assertEqual(ar.get_direction('sOuTh'), DIR_SOUTH)
         self.assertRaises(KeyError, ar.get_direction, 'baddirection')
+        
+        # Changes in place are followed by a table update
+        ar.strings['directions'] = [['north'], ['up']]
+        ar.update_tables()
+        self.assertEqual(ar.get_direction('up'), DIR_NORTHEAST)
+        self.assertRaises(KeyError, ar.get_direction, 'n')
+    
+    def test_read_folder(self):
+        """Test tables of rules read from a folder"""
+        folder = os.path.join(os.path.dirname(__file__), os.pardir,
+                              os.pardir, os.pardir, 'rulesets',
+                              'havilah_1.0.0')
+        ar = AtlantisRules.read_folder(folder)
+        self.assertEqual(ar.get_direction('Southeast'), DIR_SOUTHEAST)
+        self.assertEqual(ar.get_direction('nw'), DIR_NORTHWEST)
+        self.assertEqual(ar, AtlantisRules.json_deserialize(
+                ar.json_serialize()))
 
     def test_json_methods(self):
         """Test implementation of JsonSerializeble interface."""
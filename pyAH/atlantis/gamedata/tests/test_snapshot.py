@@ -0,0 +1,151 @@
+"""Unit tests for atlantis.gamedata.snapshot module."""
+
+from atlantis.gamedata.snapshot import dump_map, load_map, open_map, \
+    MAGIC, VERSION
+from atlantis.gamedata.map import Map, HEX_CURRENT, HEX_EXITS, HEX_OLD
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.structure import Structure
+from atlantis.gamedata.item import ItemAmount, ItemMarket
+from atlantis.gamedata.rules import DIR_NORTH, DIR_SOUTH
+
+from io import BytesIO
+
+import json
+import os
+import struct
+import tempfile
+import unittest
+
+class TestSnapshot(unittest.TestCase):
+    """Test dump_map and load_map functions."""
+    
+    def _make_map(self):
+        """Return a map using every region attribute."""
+        m = Map()
+        r = Region((21, 93, None), 'plain', 'Isshire', 9836, 'vikings', 11016,
+                   {'name': 'Durshire', 'type': 'town'})
+        r.append_report_description('plain (21,93) in Isshire, contains '
+                                    'Durshire [town], 9836 peasants '
+                                    '(vikings), $11016.')
+        r.set_weather('clear', 'winter', clearskies=True)
+        r.set_wages(15.3, 6180)
+        r.set_market('sell', [ItemMarket('GRAI', 93, 22, 'grain', 'grain')])
+        r.set_market('buy', [ItemMarket('VIKI', -1, 52, names='vikings'),
+                             ItemMarket('LEAT', 13, 77)])
+        r.set_entertainment(553)
+        r.set_products([ItemAmount('GRAI', 30, 'grain', 'grain'),
+                        ItemAmount('HORS', 21)])
+        r.set_exit(DIR_NORTH, (21, 91, None))
+        r.set_exit(DIR_SOUTH, (21, 95, None))
+        r.set_gate(13, False)
+        s = Structure(1, 'Tomasa', 'Mine', incomplete=4, has_runes=True)
+        s.append_report_description('+ Tomasa [1] : Mine, needs 4.')
+        r.append_structure(s)
+        s = Structure(102, 'Santa', 'Fleet',
+                      [ItemAmount('LONG', 2, 'Longboat', 'Longboats')],
+                      needs_maintenance=True, can_enter=False)
+        r.append_structure(s)
+        s = Structure(3, 'Shaft', 'Shaft', inner_location=(1, 2, 'underworld'))
+        r.append_structure(s)
+        m.add_region_info(r)
+        
+        m.add_region_info(Region((21, 91, None), 'forest', 'Isshire'),
+                          HEX_EXITS)
+        m.add_region_info(Region((1, 2, 'underworld'), 'tunnels', 'Ithaca',
+                                 200, 'drow elves', 50))
+        m.levels['underworld'].hexes[(1, 2)].status = HEX_OLD
+        m.levels['underworld'].hexes[(1, 2)].last_seen = (3, 11)
+        return m
+    
+    def test_round_trip(self):
+        """Test maps are loaded as they were dumped."""
+        io = BytesIO()
+        m = self._make_map()
+        dump_map(io, m)
+        io.seek(0)
+        m_new = load_map(io)
+        self.assertEqual(m_new, m)
+        
+        mh = m_new.get_region((21, 93, None))
+        self.assertEqual(mh.status, HEX_CURRENT)
+        self.assertEqual(mh.region.exits[DIR_NORTH], (21, 91, None))
+        self.assertEqual(mh.region.structures[3].inner_location,
+                         (1, 2, 'underworld'))
+        self.assertTrue(isinstance(mh.region.market['buy'][0], ItemMarket))
+        self.assertFalse('weather' in m_new.get_region(
+                (21, 91, None)).region.__dict__)
+        
+        io = BytesIO()
+        dump_map(io, Map())
+        io.seek(0)
+        self.assertEqual(load_map(io), Map())
+    
+    def test_json_path(self):
+        """Test snapshots of maps loaded from json."""
+        m = Map.json_deserialize(
+                json.loads(json.dumps(self._make_map().json_serialize())))
+        io = BytesIO()
+        dump_map(io, m)
+        io.seek(0)
+        self.assertEqual(load_map(io), m)
+    
+    def test_open_map(self):
+        """Test hexes are read when first accessed."""
+        m = self._make_map()
+        io = BytesIO()
+        dump_map(io, m)
+        io.seek(0)
+        m_new = open_map(io)
+        
+        self.assertEqual(sorted(m_new.levels.keys()),
+                         ['surface', 'underworld'])
+        lvl = m_new.levels['surface']
+        self.assertEqual(len(lvl.hexes._hexes), 0)
+        self.assertEqual(sorted(lvl.hexes.keys()), [(21, 91), (21, 93)])
+        self.assertTrue((21, 93) in lvl.hexes)
+        self.assertFalse((21, 95) in lvl.hexes)
+        self.assertEqual(len(lvl.hexes._hexes), 0)
+        
+        mh = lvl.get_region((21, 93))
+        self.assertEqual(mh, m.get_region((21, 93, None)))
+        self.assertEqual(len(lvl.hexes._hexes), 1)
+        self.assertTrue(mh is lvl.get_region((21, 93)))
+        self.assertEqual(lvl.get_region((21, 95)), None)
+        
+        mh.region.wealth = 0
+        self.assertEqual(m_new.get_region((21, 93, None)).region.wealth, 0)
+        
+        m_new.add_region_info(Region((21, 95, None), 'forest', 'Isshire'),
+                              HEX_EXITS)
+        self.assertEqual(len(lvl.hexes), 3)
+        del lvl.hexes[(21, 91)]
+        self.assertEqual(sorted(lvl.hexes.keys()), [(21, 93), (21, 95)])
+        
+        io.seek(0)
+        self.assertEqual(open_map(io), m)
+        
+        fd, name = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            with open(name, 'wb') as f:
+                dump_map(f, m)
+            with open(name, 'rb') as f:
+                self.assertEqual(open_map(f), m)
+        finally:
+            os.remove(name)
+    
+    def test_header(self):
+        """Test files that are not valid snapshots are rejected."""
+        self.assertRaises(ValueError, load_map, BytesIO(b''))
+        self.assertRaises(ValueError, load_map, BytesIO(b'{"levels": {}}'))
+        
+        io = BytesIO()
+        dump_map(io, self._make_map())
+        data = io.getvalue()
+        self.assertEqual(data[:len(MAGIC)], MAGIC)
+        data = data[:len(MAGIC)] + struct.pack('<H', VERSION + 1) + \
+            data[len(MAGIC) + 2:]
+        self.assertRaises(ValueError, load_map, BytesIO(data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Unit tests for atlantis.gamedata.trade module."""
+
+from atlantis.gamedata.item import ItemMarket
+from atlantis.gamedata.map import Map, HEX_EXITS
+from atlantis.gamedata.region import Region
+from atlantis.gamedata.rules import DIR_NORTH, DIR_SOUTH
+from atlantis.gamedata.trade import TradePlanner
+
+import unittest
+
+def _column(m, x, length):
+    """Add a column of regions linked north to south to a map."""
+    regions = []
+    for i in range(length):
+        region = Region((x, 2 * i + 1, None), 'plain', 'Isshire')
+        if i:
+            region.set_exit(DIR_NORTH, (x, 2 * i - 1, None))
+        if i < length - 1:
+            region.set_exit(DIR_SOUTH, (x, 2 * i + 3, None))
+        m.add_region_info(region)
+        regions.append(region)
+    return regions
+
+class TestTradePlanner(unittest.TestCase):
+    """Test TradePlanner class."""
+    
+    def setUp(self):
+        self.m = m = Map()
+        regions = _column(m, 1, 5)
+        regions[0].set_market('buy', [ItemMarket('HORS', 10, 40),
+                                      ItemMarket('IRON', 50, 60)])
+        regions[1].set_market('sell', [ItemMarket('IRON', 20, 70)])
+        regions[2].set_market('sell', [ItemMarket('HORS', 5, 70)])
+        regions[4].set_market('sell', [ItemMarket('HORS', 10, 90)])
+        
+        # Near as the crow flies, but not linked
+        region = Region((3, 1, None), 'plain', 'Isshire')
+        region.set_market('sell', [ItemMarket('HORS', 10, 200)])
+        m.add_region_info(region)
+        m.add_region_info(Region((1, 11, None), 'plain', 'Isshire'),
+                          HEX_EXITS)
+        self.planner = TradePlanner(m)
+    
+    def routes(self, planner, *args, **kwargs):
+        """Find routes as (item, destination, moves, amount, profit)."""
+        return [(r.item, r.destination[:2], r.moves, r.amount, r.profit)
+                for r in planner.find_routes(*args, **kwargs)]
+    
+    def test_get_moves(self):
+        """Test TradePlanner.get_moves method."""
+        planner = self.planner
+        self.assertEqual(planner.get_moves((1, 1, None), 2),
+                         {(1, 1, 'surface'): 0, (1, 3, 'surface'): 1,
+                          (1, 5, 'surface'): 2})
+        self.assertEqual(len(planner.get_moves((1, 1, None), 9)), 5)
+        self.assertEqual(planner.get_moves((3, 1, None), 9),
+                         {(3, 1, 'surface'): 0})
+    
+    def test_find_routes(self):
+        """Test TradePlanner.find_routes method."""
+        planner = self.planner
+        self.assertEqual(self.routes(planner, 100, 4),
+                         [('HORS', (1, 9), 4, 10, 500),
+                          ('IRON', (1, 3), 1, 20, 200),
+                          ('HORS', (1, 5), 2, 5, 150)])
+        self.assertEqual(self.routes(planner, 100, 3),
+                         [('IRON', (1, 3), 1, 20, 200),
+                          ('HORS', (1, 5), 2, 5, 150)])
+        self.assertEqual(self.routes(planner, 100, 4, top=1),
+                         [('HORS', (1, 9), 4, 10, 500)])
+        self.assertEqual(self.routes(planner, 100, 0), [])
+        self.assertEqual(self.routes(planner, 100, 4,
+                                     origins=[(1, 3, None)]), [])
+    
+    def test_capacity(self):
+        """Test routes carry what capacity allows."""
+        planner = self.planner
+        self.assertEqual(self.routes(planner, 4, 4),
+                         [('HORS', (1, 9), 4, 4, 200),
+                          ('HORS', (1, 5), 2, 4, 120),
+                          ('IRON', (1, 3), 1, 4, 40)])
+        self.assertEqual(self.routes(planner, 100, 4, weights={'HORS': 50}),
+                         [('IRON', (1, 3), 1, 20, 200),
+                          ('HORS', (1, 9), 4, 2, 100),
+                          ('HORS', (1, 5), 2, 2, 60)])
+        self.assertEqual(self.routes(planner, 10, 4,
+                                     weights={'HORS': 50, 'IRON': 20}), [])
+    
+    def test_processes(self):
+        """Test routes found by worker processes."""
+        m = self.m
+        for x, price in ((5, 30), (7, 20)):
+            regions = _column(m, x, 3)
+            regions[0].set_market('buy', [ItemMarket('HORS', 10, price)])
+            regions[2].set_market('sell', [ItemMarket('HORS', 10, 90)])
+        planner = TradePlanner(m)
+        routes = self.routes(planner, 100, 4)
+        self.assertEqual(routes[:2], [('HORS', (7, 5), 2, 10, 700),
+                                      ('HORS', (5, 5), 2, 10, 600)])
+        self.assertEqual(self.routes(planner, 100, 4, processes=2), routes)
+        self.assertEqual(self.routes(planner, 100, 4, top=2, processes=2),
+                         routes[:2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Unit tests for atlantis.gamedata.unit module."""
+
+from atlantis.gamedata.item import Item, ItemUnit
+from atlantis.gamedata.skill import Skill, SkillDays
+from atlantis.gamedata.unit import Unit
+
+from io import StringIO
+
+import json
+import unittest
+
+class TestUnit(unittest.TestCase):
+    """Test Unit class."""
+    
+    def test_constructor(self):
+        """Test Unit constructor."""
+        unit = Unit(1710, 'Scout',
+                    [ItemUnit(abr='TELF', name='tribal elf', amt=1)],
+                    [21, 93, None], faction={'name': 'Mathoyoh', 'num': 13},
+                    attitude='me', guard='avoid', behind=True, noaid=False,
+                    reveal=None)
+        self.assertEqual(unit.num, 1710)
+        self.assertEqual(unit.name, 'Scout')
+        self.assertEqual(unit.location, (21, 93, None))
+        self.assertIsNone(unit.structure)
+        self.assertEqual(unit.attitude, 'me')
+        self.assertEqual(unit.skills, [])
+        self.assertIsNone(unit.weight)
+        self.assertEqual(unit.flags, {'guard': 'avoid', 'behind': True})
+        self.assertEqual(unit.get_faction_num(), 13)
+        
+        unit = Unit(188, 'City Guard',
+                    [ItemUnit(abr='LEAD', names='leaders', amt=80)],
+                    (21, 93, None), 2)
+        self.assertEqual(unit.structure, 2)
+        self.assertIsNone(unit.get_faction_num())
+        self.assertEqual(unit.attitude, 'neutral')
+        self.assertEqual(unit.flags, {})
+    
+    def test_get_skill_level(self):
+        """Test Unit.get_skill_level method."""
+        unit = Unit(468, 'Ship', [], (21, 93, None),
+                    skills=[SkillDays('SHIP', 'shipbuilding', 3, 180),
+                            SkillDays('COMB', 'combat', 1, 30)])
+        self.assertEqual(unit.get_skill_level('SHIP'), 3)
+        self.assertEqual(unit.get_skill_level('COMB'), 1)
+        self.assertEqual(unit.get_skill_level('MINE'), 0)
+    
+    def test_json_methods(self):
+        """Test implementation of JsonSerializable interface."""
+        io = StringIO()
+        
+        unit = Unit(397, 'ShArcashmo',
+                    [ItemUnit(abr='LEAD', name='leader', amt=1),
+                     ItemUnit(abr='GALL', name='Galleon', amt=1,
+                              unfinished=15)],
+                    (21, 93, None), 1, {'name': 'Mathoyoh', 'num': 13}, 'me',
+                    [SkillDays('FIRE', 'fire', 2, 120)], 1254,
+                    {'riding': 1740, 'flying': 0, 'walking': 1755,
+                     'swimming': 0},
+                    behind=True, combat=Skill('FIRE', 'fire'),
+                    readyweapon=[Item(abr='SWOR', name='sword')],
+                    visited=['Durshire'])
+        unit.append_report_description('* ShArcashmo (397), Mathoyoh (13).')
+        
+        json.dump(unit, io, default=Unit.json_serialize)
+        io.seek(0)
+        unit_new = Unit.json_deserialize(json.load(io))
+        self.assertEqual(unit, unit_new)
+
+if __name__ == '__main__':
+    unittest.main()
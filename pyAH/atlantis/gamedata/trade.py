@@ -0,0 +1,278 @@
+"""Finds profitable trade routes.
+
+A trade route buys an item in a region market, carries it along region
+exits and sells it in another region market. :class:`TradePlanner`
+finds the most profitable routes of a :class:`~atlantis.gamedata.map.Map`
+for a carrying capacity and a movement budget.
+
+Only exits reported in :attr:`Region.exits
+<atlantis.gamedata.region.Region.exits>` are walked, and every exit
+counts as a move, as terrain movement costs are not known by
+:class:`~atlantis.gamedata.rules.AtlantisRules`.
+
+The search is pruned with bounds, so most of the map is never walked:
+
+- Offers are looked for in a
+  :class:`~atlantis.gamedata.market.MarketIndex`, so only regions
+  selling an item at a higher price than it's bought are candidates,
+  and only those within the movement budget as the crow flies, by
+  :func:`~atlantis.helpers.hex_math.hex_distance`.
+- Items bought are visited from the highest bound of their profit down,
+  and the search stops as soon as the bound can't beat the worst route
+  kept. Routes are only walked, from each origin and up to the movement
+  budget, when a candidate reaches that point.
+
+Origins can be spread across a pool of worker processes by
+:meth:`TradePlanner.find_routes`, each of them keeping their own best
+routes, merged at the end.
+
+"""
+
+from atlantis.gamedata.market import MarketIndex
+
+from concurrent.futures import ProcessPoolExecutor
+import collections
+import heapq
+import itertools
+import os
+
+# Planner of worker processes, set by _init_worker
+_worker_planner = None
+
+def _init_worker(planner):
+    """Set the planner used by a worker process."""
+    global _worker_planner
+    _worker_planner = planner
+
+def _find_routes(origins, capacity, moves, top, weights):
+    """Find routes from some origins in a worker process."""
+    return _worker_planner._find_routes(origins, capacity, moves, top,
+                                        weights)
+
+def _node(location):
+    """Return a location as a graph node, with its level name."""
+    return (location[0], location[1], location[2] or 'surface')
+
+class TradeRoute():
+    """A trade route between two regions.
+    
+    :class:`TradeRoute` has the following public attributes:
+    
+    .. attribute:: item
+    
+       Abbreviature of the item traded.
+    
+    .. attribute:: origin
+    
+       Location of the region where the item is bought.
+    
+    .. attribute:: destination
+    
+       Location of the region where the item is sold.
+    
+    .. attribute:: moves
+    
+       Number of moves from *origin* to *destination*.
+    
+    .. attribute:: amount
+    
+       Amount of items traded.
+    
+    .. attribute:: buy_price
+    
+       Price the item is bought at.
+    
+    .. attribute:: sell_price
+    
+       Price the item is sold at.
+    
+    .. attribute:: profit
+    
+       Silver earned by the route.
+    
+    """
+    
+    def __init__(self, item, origin, destination, moves, amount, buy_price,
+                 sell_price):
+        """Create a new :class:`TradeRoute`.
+        
+        :param item: abbreviature of the item traded.
+        :param origin: location where the item is bought.
+        :param destination: location where the item is sold.
+        :param moves: number of moves from *origin* to *destination*.
+        :param amount: amount of items traded.
+        :param buy_price: price the item is bought at.
+        :param sell_price: price the item is sold at.
+        
+        """
+        self.item = item
+        self.origin = origin
+        self.destination = destination
+        self.moves = moves
+        self.amount = amount
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.profit = (sell_price - buy_price) * amount
+    
+    def __repr__(self):
+        """Return a readable representation of the route."""
+        return '<TradeRoute {} {} {}->{} ({} moves): {}>'.format(
+                self.amount, self.item, self.origin, self.destination,
+                self.moves, self.profit)
+
+class TradePlanner():
+    """Finds the most profitable trade routes of a map.
+    
+    :class:`TradePlanner` keeps the exits graph of the map, and the width
+    of levels wrapping horizontally, so the map must not change while
+    it's used.
+    
+    """
+    
+    def __init__(self, m, markets=None):
+        """Create a :class:`TradePlanner`.
+        
+        :param m: :class:`~atlantis.gamedata.map.Map` object.
+        :param markets: :class:`~atlantis.gamedata.market.MarketIndex`
+            with the markets of *m*. If not given it's built from *m*.
+        
+        """
+        self.markets = markets if markets is not None else \
+            MarketIndex.from_map(m)
+        # Neighbour nodes of every node
+        self._exits = dict()
+        self._widths = dict()
+        for name, level in m.levels.items():
+            if not level.hexes:
+                continue
+            if level.wraps_horizontally():
+                x0, y0, x1, y1 = level.get_rect()
+                self._widths[name] = x1 - x0 + 1
+            for mh in level.hexes.values():
+                exits = getattr(mh.region, 'exits', None)
+                if exits:
+                    self._exits[_node(mh.region.location)] = \
+                        tuple([_node(loc) for loc in exits.values()])
+    
+    def get_moves(self, origin, moves):
+        """Return the regions reachable from a location.
+        
+        :param origin: location of the region, as a three elements
+            tuple.
+        :param moves: maximum number of moves.
+        
+        :return: dictionary with the number of moves to every reachable
+            location, keyed by their graph node, a location whose level
+            is never *None*.
+        
+        """
+        origin = _node(origin)
+        reached = {origin: 0}
+        queue = collections.deque([origin])
+        while queue:
+            node = queue.popleft()
+            n = reached[node] + 1
+            if n > moves:
+                break
+            for exit_node in self._exits.get(node, ()):
+                if exit_node not in reached:
+                    reached[exit_node] = n
+                    queue.append(exit_node)
+        return reached
+    
+    def find_routes(self, capacity, moves, origins=None, top=10,
+                    weights=None, processes=1):
+        """Find the most profitable trade routes.
+        
+        Every route carries a single item, as much of it as can be
+        bought, sold and carried.
+        
+        :param capacity: carrying capacity, in weight units.
+        :param moves: maximum number of moves of a route.
+        :param origins: list of locations where items may be bought. If
+            not given every region with a market is an origin.
+        :param top: maximum number of routes returned.
+        :param weights: dictionary with the weight of the items keyed by
+            their abbreviature. Items not in it weight one, so if not
+            given *capacity* is a number of items.
+        :param processes: number of worker processes origins are spread
+            across. If 1 routes are found in this process, without a
+            pool, and if *None* the number of processors is used.
+        
+        :return: list of :class:`TradeRoute`, the most profitable first.
+            Among routes with the same profit, which ones are returned
+            may depend on the number of processes.
+        
+        """
+        if weights is None:
+            weights = dict()
+        if origins is None:
+            origins = self.markets.get_locations('buy')
+        else:
+            origins = [tuple(loc) for loc in origins]
+        if processes == 1:
+            return self._find_routes(origins, capacity, moves, top, weights)
+        
+        workers = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            chunks = [origins[i::workers] for i in range(workers)]
+            found = executor.map(_find_routes, chunks,
+                                 itertools.repeat(capacity),
+                                 itertools.repeat(moves),
+                                 itertools.repeat(top),
+                                 itertools.repeat(weights))
+            routes = list(itertools.chain.from_iterable(found))
+        # Ties are broken by the order of the origins
+        order = dict([(origin, i) for i, origin in enumerate(origins)])
+        routes.sort(key=lambda r: (-r.profit, order[r.origin]))
+        return routes[:top]
+    
+    def _find_routes(self, origins, capacity, moves, top, weights):
+        """Find the most profitable trade routes from some origins."""
+        # Items bought, sorted by the bound of their profit
+        bought = []
+        for origin in origins:
+            for abr, amt, price in self.markets.get_offers(origin, 'buy'):
+                best = self.markets.find(abr, 'sell', min_price=price + 1,
+                                         top=1)
+                amount = min(amt, capacity // weights.get(abr, 1))
+                if best and amount > 0:
+                    bound = (best[0][3] - price) * amount
+                    bought.append((bound, len(bought), origin, abr, price,
+                                   amount))
+        bought.sort(key=lambda b: (-b[0], b[1]))
+        
+        # Heap of (profit, -count, route), worst route first
+        kept = []
+        count = itertools.count()
+        reachable = dict()
+        for bound, i, origin, abr, price, amount in bought:
+            if len(kept) == top and bound <= kept[0][0]:
+                break
+            near = _node(origin)
+            for location, market, amt, sell_price in self.markets.find(
+                    abr, 'sell', min_price=price + 1, near=origin,
+                    distance=moves, width=self._widths.get(near[2])):
+                profit_bound = (sell_price - price) * amount
+                if len(kept) == top and profit_bound <= kept[0][0]:
+                    break
+                profit = (sell_price - price) * min(amount, amt)
+                if len(kept) == top and profit <= kept[0][0]:
+                    continue
+                try:
+                    reached = reachable[origin]
+                except KeyError:
+                    reached = reachable[origin] = self.get_moves(origin,
+                                                                 moves)
+                n = reached.get(_node(location))
+                if n is None:
+                    continue
+                route = TradeRoute(abr, origin, location, n,
+                                   min(amount, amt), price, sell_price)
+                entry = (route.profit, -next(count), route)
+                if len(kept) < top:
+                    heapq.heappush(kept, entry)
+                else:
+                    heapq.heapreplace(kept, entry)
+        return [route for profit, c, route in sorted(kept, reverse=True)]
@@ -0,0 +1,224 @@
+"""Handles Atlantis PBEM units.
+
+:class:`Unit` is the main entity in Atlantis: every action a player
+does is by issuing orders to their units. Units are a group of items,
+at least one of them being a man or a monster, plus a group of learned
+skills, owned by a faction.
+
+In the Atlantis objects hierarchy :class:`Unit` is at the bottom, under
+:class:`~atlantis.gamedata.structure.Structure`, or directly under
+:class:`~atlantis.gamedata.region.Region` if the unit is outside any
+structure. A :class:`Unit` only keeps the location of its region and
+the number of its structure, so units can be looked for by number in
+:class:`~atlantis.gamedata.gamedata.GameData` without walking the map.
+
+Units are reported with very different detail: own units have all their
+flags and skills reported, while other factions' units may only show
+their name and items. So most of the unit flags are only kept when
+they're reported, in the :attr:`Unit.flags` dictionary.
+
+:class:`Unit` implements
+:class:`~atlantis.helpers.json.JsonSerializable` and
+:class:`~atlantis.helpers.comparable.RichComparable` interfaces.
+
+"""
+
+from atlantis.gamedata.item import Item, ItemUnit
+from atlantis.gamedata.skill import Skill, SkillDays
+
+from atlantis.helpers.json import JsonSerializable
+from atlantis.helpers.comparable import RichComparable
+
+# Flags holding objects, and the class of their values
+_OBJECT_FLAGS = {'canstudy': Skill, 'readyitem': Item, 'readyarmor': Item,
+                 'readyweapon': Item, 'combat': Skill}
+
+class Unit(JsonSerializable, RichComparable):
+    """Holds all data of a unit.
+    
+    :class:`Unit` has the following public attributes:
+    
+    .. attribute:: num
+    
+       Unique number identifying the :class:`Unit`.
+    
+    .. attribute:: name
+    
+       Name of the :class:`Unit`.
+    
+    .. attribute:: items
+    
+       List of :class:`~atlantis.gamedata.item.ItemUnit` of the
+       :class:`Unit`.
+    
+    .. attribute:: faction
+    
+       Dictionary with *num* and *name* of the unit faction, or *None*
+       if it's unknown.
+    
+    .. attribute:: attitude
+    
+       Attitude towards the unit faction, from **me** to **hostile**.
+    
+    .. attribute:: skills
+    
+       List of :class:`~atlantis.gamedata.skill.SkillDays` known by the
+       :class:`Unit`. Empty if unknown.
+    
+    .. attribute:: weight
+    
+       Weight of the :class:`Unit`, or *None* if unknown.
+    
+    .. attribute:: capacity
+    
+       Dictionary with the :class:`Unit` capacity per movement type, or
+       *None* if unknown.
+    
+    .. attribute:: flags
+    
+       Dictionary with the other values reported, keyed by their
+       :meth:`ReportConsumer.region_unit
+       <atlantis.parsers.reportparser.ReportConsumer.region_unit>`
+       parameter names, as *guard*, *behind* or *combat*. Only flags
+       reported are kept.
+    
+    .. attribute:: location
+    
+       Location of the :class:`~atlantis.gamedata.region.Region` the
+       :class:`Unit` is in, as a three elements tuple.
+    
+    .. attribute:: structure
+    
+       Number of the :class:`~atlantis.gamedata.structure.Structure`
+       the :class:`Unit` is in, or *None* if it's outside any structure.
+    
+    .. attribute:: report
+    
+       List of report lines describing the :class:`Unit`.
+    
+    """
+    
+    def __init__(self, num, name, items, location, structure=None,
+                 faction=None, attitude='neutral', skills=None, weight=None,
+                 capacity=None, **flags):
+        """Create a new :class:`Unit`.
+        
+        :param num: unique number identifying the :class:`Unit`.
+        :param name: name of the :class:`Unit`.
+        :param items: list of :class:`~atlantis.gamedata.item.ItemUnit`.
+        :param location: location of the region the :class:`Unit` is
+            in, as a three elements tuple.
+        :param structure: number of the structure the :class:`Unit` is
+            in, or *None* if outside any structure.
+        :param faction: dictionary with *num* and *name* of the unit
+            faction, or *None* if unknown.
+        :param attitude: attitude towards the unit faction.
+        :param skills: list of :class:`~atlantis.gamedata.skill.SkillDays`.
+        :param weight: weight of the :class:`Unit`.
+        :param capacity: dictionary with capacity per movement type.
+        :param flags: other values reported. Those with a *False* or
+            *None* value are not kept.
+        
+        """
+        self.num = num
+        self.name = name
+        self.items = items
+        self.location = tuple(location)
+        self.structure = structure
+        self.faction = faction
+        self.attitude = attitude
+        self.skills = skills if skills else []
+        self.weight = weight
+        self.capacity = capacity
+        self.flags = dict([(k, v) for k, v in flags.items() if v])
+        self.report = []
+    
+    def append_report_description(self, line):
+        """Append a new report line to :class:`Unit` description.
+        
+        :param line: report line to be appended to :class:`Unit`
+            description.
+        
+        """
+        self.report.append(line)
+    
+    def get_faction_num(self):
+        """Return the number of the unit faction.
+        
+        :return: faction number, or *None* if unknown.
+        
+        """
+        if self.faction:
+            return self.faction['num']
+        return None
+    
+    def get_skill_level(self, abr):
+        """Return the level of a skill known by the :class:`Unit`.
+        
+        :param abr: abbreviature of the skill.
+        
+        :return: skill level, or zero if the :class:`Unit` doesn't know
+            the skill.
+        
+        """
+        for sk in self.skills:
+            if sk.abr == abr:
+                return sk.level
+        return 0
+    
+    # JsonSerializable methods
+    def json_serialize(self):
+        """Return a serializable version of :class:`Unit`.
+        
+        :return: a *dict* representing the :class:`Unit` object.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        flags = dict()
+        for k, v in self.flags.items():
+            if k not in _OBJECT_FLAGS:
+                flags[k] = v
+            elif isinstance(v, list):
+                flags[k] = [it.json_serialize() for it in v]
+            else:
+                flags[k] = v.json_serialize()
+        return {'num': self.num, 'name': self.name,
+                'items': [it.json_serialize() for it in self.items],
+                'location': self.location, 'structure': self.structure,
+                'faction': self.faction, 'attitude': self.attitude,
+                'skills': [sk.json_serialize() for sk in self.skills],
+                'weight': self.weight, 'capacity': self.capacity,
+                'flags': flags, 'report': self.report}
+    
+    @staticmethod
+    def json_deserialize(json_object):
+        """Load :class:`Unit` from a deserialized json object.
+        
+        :param json_object: object returned by :func:`json.load`.
+        
+        :return: the :class:`Unit` object from json data.
+        
+        .. seealso::
+           :class:`atlantis.helpers.json.JsonSerializable`
+        
+        """
+        flags = dict()
+        for k, v in json_object['flags'].items():
+            if k not in _OBJECT_FLAGS:
+                flags[k] = v
+            elif isinstance(v, list):
+                flags[k] = [_OBJECT_FLAGS[k].json_deserialize(it) for it in v]
+            else:
+                flags[k] = _OBJECT_FLAGS[k].json_deserialize(v)
+        u = Unit(json_object['num'], json_object['name'],
+                 [ItemUnit.json_deserialize(it) \
+                  for it in json_object['items']],
+                 json_object['location'], json_object['structure'],
+                 json_object['faction'], json_object['attitude'],
+                 [SkillDays.json_deserialize(sk) \
+                  for sk in json_object['skills']],
+                 json_object['weight'], json_object['capacity'], **flags)
+        u.report = json_object['report']
+        return u
@@ -1,6 +1,40 @@
 """:mod:atlantis.helper.comparable provides helper classes providing
 rich comparison operations."""
 
+import hashlib
+import marshal
+
+_object_setattr = object.__setattr__
+
+def _normalized(value):
+    """Return a value as it's hashed by :class:`ContentHashable`.
+    
+    :mod:`marshal` writes numbers equal in python, as ``1``, ``1.0``
+    and ``True``, in different ways. They're all turned into the same
+    number, so objects equal by their attributes values have the same
+    hash.
+    
+    :param value: an object made of builtin types only.
+    
+    :return: the object with its numbers normalized.
+    
+    """
+    t = type(value)
+    if t is str or t is int or value is None:
+        return value
+    if t is bool:
+        return int(value)
+    if t is float:
+        return int(value) if value.is_integer() else value
+    if t is list:
+        return [_normalized(v) for v in value]
+    if t is tuple:
+        return tuple([_normalized(v) for v in value])
+    if t is dict:
+        return dict([(_normalized(k), _normalized(v)) \
+                     for k, v in value.items()])
+    return value
+
 class RichComparable():
     """Provide its derived classes with rich comparison operations."""
     
@@ -16,3 +50,117 @@ class RichComparable():
             return True
         else:
             return False
+
+
+class ContentHashable(RichComparable):
+    """Provide its derived classes with cached content hashes.
+    
+    :class:`RichComparable` compares the whole content of both objects
+    every time, including long lists as report lines.
+    :class:`ContentHashable` objects compute a digest of their content
+    once, and keep it until an attribute is set or deleted. So
+    comparing objects is usually just comparing two digests.
+    
+    Derived classes define :meth:`_content`, returning a serializable
+    version of the object (usually its
+    :meth:`~atlantis.helpers.json.JsonSerializable.json_serialize`
+    value). Other :class:`ContentHashable` objects the object holds may
+    be left out of it and returned by :meth:`_content_children`
+    instead, so changes in them are noticed without invalidating their
+    owner.
+    
+    Changes made in place to nested values, as appending a line to a
+    report list, can't be noticed. Methods doing such changes must call
+    :meth:`invalidate_content_hash`, and so must any code changing
+    nested values directly.
+    
+    """
+    
+    def __setattr__(self, name, value):
+        """Set an attribute, invalidating the content hash."""
+        d = self.__dict__
+        if '_content_digest' in d:
+            del d['_content_digest']
+        _object_setattr(self, name, value)
+    
+    def __delattr__(self, name):
+        """Delete an attribute, invalidating the content hash."""
+        self.__dict__.pop('_content_digest', None)
+        object.__delattr__(self, name)
+    
+    def _content(self):
+        """Return the content hashed.
+        
+        Content is serialized with :mod:`marshal`, which is faster than
+        :mod:`json` but keeps dictionaries order, so dictionaries whose
+        order may change must be given sorted, as lists of items.
+        
+        :return: an object made of builtin types only.
+        
+        """
+        raise NotImplementedError
+    
+    def _content_children(self):
+        """Return the :class:`ContentHashable` objects held.
+        
+        :return: a sequence of :class:`ContentHashable` objects, in a
+            stable order.
+        
+        """
+        return ()
+    
+    def invalidate_content_hash(self):
+        """Discard the cached content hash.
+        
+        It has to be called after changing nested values in place.
+        
+        """
+        self.__dict__.pop('_content_digest', None)
+    
+    def content_hash(self):
+        """Return the content hash of the object.
+        
+        Objects with the same content have the same hash, whatever
+        their identity. Numbers are hashed by their value, so ``1``,
+        ``1.0`` and ``True`` hash the same.
+        
+        The hash is cached until an attribute is set or deleted. Lists
+        and dictionaries changed in place don't discard it:
+        :meth:`invalidate_content_hash` must be called after such
+        changes.
+        
+        :return: a 16 bytes *bytes* object.
+        
+        """
+        digest = self.__dict__.get('_content_digest')
+        if digest is None:
+            # Version 2 doesn't write references to shared objects, so
+            # output depends only on content
+            digest = hashlib.blake2b(
+                    marshal.dumps(_normalized(self._content()), 2),
+                    digest_size=16).digest()
+            self.__dict__['_content_digest'] = digest
+        children = self._content_children()
+        if not children:
+            return digest
+        h = hashlib.blake2b(digest, digest_size=16)
+        for child in children:
+            h.update(child.content_hash())
+        return h.digest()
+    
+    def __eq__(self, other):
+        """Return *True* if both objects are equal, *False* otherwise.
+        
+        Objects are equal if they are of the same class and have the
+        same content hash.
+        
+        :param other: the object current one is compared to.
+        
+        :return: *True* if both objects are equal, *False* otherwise.
+        
+        """
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return False
+        return self.content_hash() == other.content_hash()
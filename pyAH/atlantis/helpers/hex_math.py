@@ -46,6 +46,9 @@ Zoom values:
 
    total number of zoom values
 
+The module also defines :func:`hex_distance`, the distance between two
+hexes in Atlantis coordinates.
+
 """
 
 import math
@@ -58,6 +61,32 @@ ZOOM_IN = ZOOM_200
 # Relative sizes for each zoom value
 _zoom_sizes = [1, 2, 3, 4, 6, 8]
 
+def hex_distance(a, b, width=None):
+    """Return the distance between two hexes of the same level.
+    
+    Atlantis hexes have (x, y) coordinates where x + y is even, and
+    moving one hex north or south changes y by two. Distance is the
+    number of hexes moved from one hex to the other, as computed by
+    Atlantis engine.
+    
+    :param a: location of the first hex. Only its first two coordinates
+        are used.
+    :param b: location of the second hex. Only its first two
+        coordinates are used.
+    :param width: level width, if the level wraps horizontally. If
+        *None* the level doesn't wrap.
+    
+    :return: distance in hexes.
+    
+    """
+    dx = abs(a[0] - b[0])
+    if width:
+        dx = min(dx, width - dx)
+    dy = abs(a[1] - b[1])
+    if dy > dx:
+        return (dx + dy) // 2
+    return dx
+
 class HexMath:
     """Handle all hex map math"""
     
@@ -83,14 +112,36 @@ class HexMath:
         self._set_hex_sizes()
         
     def _set_hex_sizes(self):
-        """Compute internal size values"""
+        """Compute internal size values for all zoom levels.
+        
+        Geometry for every zoom value is computed at once and stored in
+        :attr:`!_zoom_geometry`, so changing zoom later is just a
+        lookup. It only has to be recomputed when the minimum hexagon
+        size changes.
+        
+        """
         self._hex_sizes = [r * self._min_size for r in _zoom_sizes]
-        self._hex_long_side = self._hex_sizes[self._zoom]
-        self._hex_short_side = round(self._hex_long_side * self._ratio)
-                
-        self._hexagon = tuple([(int(x * self._hex_long_side),
-                                int(y * self._hex_short_side)) \
-                               for (x, y) in self._normalized_hexagon])
+        self._zoom_geometry = []
+        for long_side in self._hex_sizes:
+            short_side = round(long_side * self._ratio)
+            hexagon = tuple([(int(x * long_side), int(y * short_side)) \
+                             for (x, y) in self._normalized_hexagon])
+            bounding_size = (hexagon[2][0] * 2 + 1, hexagon[3][1] * 2 + 1)
+            self._zoom_geometry.append(
+                    (long_side, short_side, hexagon, bounding_size))
+        self._select_zoom()
+    
+    def _select_zoom(self):
+        """Set current size values from the precomputed geometry."""
+        self._hex_long_side, self._hex_short_side, \
+            self._hexagon, self._hex_bounding_size = \
+            self._zoom_geometry[self._zoom]
+    
+    def _get_sides(self, zoom):
+        """Return long and short hexagon sides for a zoom level."""
+        if zoom is None:
+            return (self._hex_long_side, self._hex_short_side)
+        return self._zoom_geometry[zoom][:2]
     
     def set_zoom(self, zoom):
         """Set zoom level.
@@ -99,7 +150,7 @@ class HexMath:
         
         """
         self._zoom = zoom
-        self._set_hex_sizes()
+        self._select_zoom()
     
     def set_map_rect(self, rect):
         """Set map enclosing rectangle in coordinates.
@@ -126,16 +177,27 @@ class HexMath:
         """
         return self._zoom
     
-    def get_size(self):
+    def get_map_rect(self):
+        """Get map enclosing rectangle in coordinates.
+        
+        :return: enclosing rectangle in coordinates.
+        
+        """
+        return self._map_rect
+    
+    def get_size(self, zoom=None):
         """Get map size in pixels.
         
+        :param zoom: zoom level. If *None* current zoom is used.
+        
         :return: map size in pixels.
         
         """
+        long_side, short_side = self._get_sides(zoom)
         x_size = self._map_rect[2] - self._map_rect[0] + 1
         y_size = self._map_rect[3] - self._map_rect[1] + 1
-        width = (x_size * 1.5 + .5) * self._hex_long_side
-        height = (y_size + 1) * self._hex_short_side
+        width = (x_size * 1.5 + .5) * long_side
+        height = (y_size + 1) * short_side
         
         return (width, height)
     
@@ -149,22 +211,24 @@ class HexMath:
         return ((self._map_rect[2] + self._map_rect[0] + 1) / 2,
                 (self._map_rect[3] + self._map_rect[1] + 1) / 2)
     
-    def get_hex_position(self, hexagon):
+    def get_hex_position(self, hexagon, zoom=None):
         """Return hex position in pixels.
         
         This method return position of hex center as an (x, y) tuple
         from hexagon coordinates.
         
         :param hexagon: hexagon coordinates as an (x, y) tuple.
+        :param zoom: zoom level. If *None* current zoom is used.
         
         :return: a tuple with the position of hexagon center in pixels.
         
         """
         
+        long_side, short_side = self._get_sides(zoom)
         x, y = hexagon
         x, y = x - self._map_rect[0], y - self._map_rect[1]
-        xoffset = (1.5 * x + 1) * self._hex_long_side
-        yoffset = self._hex_short_side * (y + 1)
+        xoffset = (1.5 * x + 1) * long_side
+        yoffset = short_side * (y + 1)
         return (xoffset, yoffset)
     
     def get_position_hex(self, point):
@@ -197,32 +261,43 @@ class HexMath:
         else:
             return None
     
-    def get_hex_polygon(self):
+    def get_hex_polygon(self, zoom=None):
         """Return an hexagonal polygon.
         
+        :param zoom: zoom level of the polygon. If *None* current zoom
+            is used.
+        
         :return: an hexagonal polygon if size according to zoom.
         
         """
-        return self._hexagon
+        if zoom is None:
+            return self._hexagon
+        return self._zoom_geometry[zoom][2]
     
-    def get_hex_bounding_size(self):
+    def get_hex_bounding_size(self, zoom=None):
         """Return the size of an hex bounding rectangle.
         
+        :param zoom: zoom level of the hexagon. If *None* current zoom
+            is used.
+        
         :return: a tuple with (width, height) of the bounding rectangle.
         
         """
-        width = self._hexagon[2][0] * 2 + 1
-        height = self._hexagon[3][1] * 2 + 1
-        return (width, height)
+        if zoom is None:
+            return self._hex_bounding_size
+        return self._zoom_geometry[zoom][3]
 
-    def get_scale(self):
+    def get_scale(self, zoom=None):
         """Get hexagon scale from 100% size.
         
+        :param zoom: zoom level. If *None* current zoom is used.
+        
         :return: scale relative to 100% size.
         
         """
-        
-        return _zoom_sizes[self._zoom] / _zoom_sizes[ZOOM_100]
+        if zoom is None:
+            zoom = self._zoom
+        return _zoom_sizes[zoom] / _zoom_sizes[ZOOM_100]
     
     def point_in_hex(self, point, hexagon):
         """Check if a point is inside an hexagon.
@@ -1,7 +1,214 @@
 """:mod:atlantis.helper.json provides helper functions and interfaces
-for loading and reading game objects from and into json files."""
+for loading and reading game objects from and into json files.
+
+Besides whole-file functions, :class:`JsonStreamReader` allows reading
+big json files piece by piece, so that objects can be built one at a
+time instead of loading the whole document in memory.
+
+Json is encoded and decoded by a *backend*: orjson_ or ujson_ if any of
+them is installed, as they are several times faster than :mod:`json`,
+and :mod:`json` otherwise. :func:`set_json_backend` can select another
+backend. :mod:`json` writes the same json :func:`json.dump` wrote
+before backends were added, and all of them write ASCII only json,
+with non ASCII characters escaped, so files can be read whatever the
+locale encoding. Saved files read back the same with any backend: only
+blanks between tokens, which :mod:`json` writes and the others don't,
+and floats in exponent notation (as ``1e16`` or ``1e+16``) are
+written differently.
+
+.. _orjson: https://github.com/ijl/orjson
+.. _ujson: https://github.com/ultrajson/ultrajson
+"""
 
 import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+_re_non_ascii = re.compile('[^\x00-\x7f]')
+
+def _escape_non_ascii(match):
+    """Return the json escape sequence of a non ASCII character."""
+    code = ord(match.group())
+    if code < 0x10000:
+        return '\\u{:04x}'.format(code)
+    # Characters out of the basic plane are written as surrogate pairs
+    code -= 0x10000
+    return '\\u{:04x}\\u{:04x}'.format(0xd800 | (code >> 10),
+                                         0xdc00 | (code & 0x3ff))
+
+class _StdlibBackend():
+    """Json backend using :mod:`json`."""
+    
+    name = 'json'
+    
+    def __init__(self):
+        """Create the backend."""
+        self._encoder = json.JSONEncoder()
+        self._sorted_encoder = json.JSONEncoder(sort_keys=True)
+    
+    def dumps(self, obj, sort_keys=False):
+        """See :func:`json_dumps`."""
+        if sort_keys:
+            return self._sorted_encoder.encode(obj)
+        return self._encoder.encode(obj)
+    
+    def dumpb(self, obj, sort_keys=False):
+        """See :func:`json_dumpb`."""
+        return self.dumps(obj, sort_keys).encode('utf-8')
+    
+    def loads(self, data):
+        """See :func:`json_loads`."""
+        return json.loads(data)
+
+
+class _OrjsonBackend():
+    """Json backend using orjson."""
+    
+    name = 'orjson'
+    
+    def __init__(self):
+        """Create the backend."""
+        # Non string keys, as exit directions, are written as strings
+        # as json does
+        self._option = orjson.OPT_NON_STR_KEYS
+        self._sorted_option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+    
+    def dumps(self, obj, sort_keys=False):
+        """See :func:`json_dumps`."""
+        if sort_keys:
+            data = orjson.dumps(obj, option=self._sorted_option)
+        else:
+            data = orjson.dumps(obj, option=self._option)
+        text = data.decode('utf-8')
+        # orjson can't escape non ASCII characters by itself
+        if not data.isascii():
+            text = _re_non_ascii.sub(_escape_non_ascii, text)
+        return text
+    
+    def dumpb(self, obj, sort_keys=False):
+        """See :func:`json_dumpb`."""
+        return self.dumps(obj, sort_keys).encode('ascii')
+    
+    def loads(self, data):
+        """See :func:`json_loads`."""
+        return orjson.loads(data)
+
+
+class _UjsonBackend():
+    """Json backend using ujson."""
+    
+    name = 'ujson'
+    
+    def dumps(self, obj, sort_keys=False):
+        """See :func:`json_dumps`."""
+        return ujson.dumps(obj, ensure_ascii=True,
+                           escape_forward_slashes=False, sort_keys=sort_keys)
+    
+    def dumpb(self, obj, sort_keys=False):
+        """See :func:`json_dumpb`."""
+        return self.dumps(obj, sort_keys).encode('utf-8')
+    
+    def loads(self, data):
+        """See :func:`json_loads`."""
+        return ujson.loads(data)
+
+
+_BACKENDS = (('orjson', orjson, _OrjsonBackend),
+             ('ujson', ujson, _UjsonBackend),
+             ('json', json, _StdlibBackend))
+
+_backend = None
+
+def set_json_backend(name=None):
+    """Select the json backend.
+    
+    :param name: name of the backend, ``orjson``, ``ujson`` or
+        ``json``. If *None* the fastest backend installed is selected.
+    
+    :raise: :class:`ValueError` if *name* is not a known backend.
+    :raise: :class:`ImportError` if the backend is not installed.
+    
+    """
+    global _backend
+    for backend_name, module, backend_class in _BACKENDS:
+        if name is None and module is None:
+            continue
+        if name is None or name == backend_name:
+            if module is None:
+                raise ImportError('{}: json backend not installed'.format(
+                        backend_name))
+            _backend = backend_class()
+            return
+    raise ValueError('{}: unknown json backend'.format(name))
+
+def get_json_backend():
+    """Return the name of the json backend selected.
+    
+    :return: ``orjson``, ``ujson`` or ``json``.
+    
+    """
+    return _backend.name
+
+def get_json_backends():
+    """Return the names of installed json backends.
+    
+    :return: list of backend names, fastest first.
+    
+    """
+    return [name for name, module, dummy in _BACKENDS if module is not None]
+
+def json_dumps(obj, sort_keys=False):
+    """Return the json representation of an object, as a string.
+    
+    :param obj: object made of primitive types, as those returned by
+        :meth:`JsonSerializable.json_serialize`.
+    :param sort_keys: if *True* dictionaries are written ordered by
+        key.
+    
+    :return: json string, with ASCII characters only.
+    
+    :raise: :class:`TypeError` if *obj* is not serializable.
+    
+    """
+    return _backend.dumps(obj, sort_keys)
+
+def json_dumpb(obj, sort_keys=False):
+    """Return the json representation of an object, as ASCII bytes.
+    
+    :param obj: object made of primitive types, as those returned by
+        :meth:`JsonSerializable.json_serialize`.
+    :param sort_keys: if *True* dictionaries are written ordered by
+        key.
+    
+    :return: json *bytes*.
+    
+    :raise: :class:`TypeError` if *obj* is not serializable.
+    
+    """
+    return _backend.dumpb(obj, sort_keys)
+
+def json_loads(data):
+    """Load an object from json data.
+    
+    :param data: json document, as *str* or UTF-8 *bytes*.
+    
+    :return: the object read.
+    
+    :raise: :class:`ValueError` if *data* is not valid json.
+    
+    """
+    return _backend.loads(data)
+
+set_json_backend()
 
 def json_dump_list(file, object_list):
     """Save a list of :class:`JsonSerializable` objects into a file.
@@ -29,7 +236,7 @@ def json_dump_list(file, object_list):
     except AttributeError:
         serializable_list = object_list[:]
         
-    json.dump(serializable_list, file)
+    file.write(json_dumps(serializable_list))
 
 def json_load_list(file, serializable_class=None):
     """Load a list of objects from a json file.
@@ -53,7 +260,7 @@ def json_load_list(file, serializable_class=None):
         implements :class:`JsonSerializable`.
     
     """
-    read_list = json.load(file)
+    read_list = json_loads(file.read())
     if serializable_class:
         try:
             read_list = [serializable_class.json_deserialize(o) \
@@ -92,7 +299,7 @@ def json_dump_dict(file, object_dict):
     except AttributeError:
         serializable_dict = object_dict.copy()
         
-    json.dump(serializable_dict, file)
+    file.write(json_dumps(serializable_dict))
 
 def json_load_dict(file, serializable_class=None):
     """Load a dictionary of objects from a json file.
@@ -116,7 +323,7 @@ def json_load_dict(file, serializable_class=None):
         implements :class:`JsonSerializable`.
     
     """
-    read_dict = json.load(file)
+    read_dict = json_loads(file.read())
     if serializable_class:
         try:
             read_dict = dict([(k, serializable_class.json_deserialize(o)) \
@@ -162,4 +369,192 @@ class JsonSerializable():
         :raise: :class:`NotImplementedError` if not overriden.
         
         """
-        raise NotImplementedError('json_deserialize must be overriden') 
\ No newline at end of file
+        raise NotImplementedError('json_deserialize must be overriden')
+    
+    def json_dumpb(self):
+        """Return the json representation of current object.
+        
+        :return: json *bytes*, as written by :func:`json_dumpb`.
+        
+        :raise: :class:`NotImplementedError` if
+            :meth:`json_serialize` is not overriden.
+        
+        """
+        return json_dumpb(self.json_serialize())
+    
+    @classmethod
+    def json_loadb(cls, data):
+        """Load an object from its json representation.
+        
+        :param data: json document, as *str* or UTF-8 *bytes*.
+        
+        :return: the object, built with :meth:`json_deserialize`.
+        
+        :raise: :class:`ValueError` if *data* is not valid json.
+        :raise: :class:`NotImplementedError` if
+            :meth:`json_deserialize` is not overriden.
+        
+        """
+        return cls.json_deserialize(json_loads(data))
+
+
+class JsonStreamReader():
+    """Incremental reader of a json document.
+    
+    :class:`JsonStreamReader` reads a json document from a file in
+    chunks, and lets its user walk through the document structure.
+    Containers are walked with :meth:`iter_object` and
+    :meth:`iter_array`, and any value can be read as a whole with
+    :meth:`read_value`. Only the part of the document not read yet, up
+    to one chunk, is kept in memory.
+    
+    For instance, objects in a list at key *hexes* can be read one by
+    one with::
+    
+        reader = JsonStreamReader(f)
+        for key in reader.iter_object():
+            if key == 'hexes':
+                for dummy in reader.iter_array():
+                    print(reader.read_value())
+            else:
+                reader.read_value()
+    
+    """
+    
+    _whitespace = ' \t\n\r'
+    # Characters of a number up to the end of the buffer
+    _number_tail = re.compile(r'[0-9.eE+-]*\Z')
+    
+    def __init__(self, file, chunk_size=65536):
+        """Create a :class:`JsonStreamReader`.
+        
+        :param file: file-like object where json data will be read from.
+        :param chunk_size: number of characters read from the file at
+            once.
+        
+        """
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _fill(self):
+        """Read a new chunk from the file.
+        
+        :return: *False* if the end of the file was already reached.
+        
+        """
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+    
+    def peek(self):
+        """Return next non blank character without consuming it.
+        
+        :return: next character, or an empty string at the end of the
+            document.
+        
+        """
+        while True:
+            while self._pos < len(self._buffer) and \
+                  self._buffer[self._pos] in self._whitespace:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                break
+        return self._buffer[self._pos:self._pos + 1]
+    
+    def expect(self, char):
+        """Consume next non blank character.
+        
+        :param char: expected character.
+        
+        :raise: :class:`ValueError` if next character is not *char*.
+        
+        """
+        c = self.peek()
+        if c != char:
+            raise ValueError('expected {!r}, found {!r}'.format(char, c))
+        self._pos += 1
+    
+    def read_value(self):
+        """Read next value as a whole.
+        
+        :return: the value, as returned by :func:`json.load`.
+        
+        :raise: :class:`ValueError` if the document is not valid json.
+        
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # A number can be cut by the end of the buffer, as in ``12.``
+            # or ``3e``, whose integer prefix is decoded
+            if (end == len(self._buffer) or \
+                    (type(value) in (int, float) and \
+                     self._number_tail.match(self._buffer, end))) and \
+                    self._fill():
+                continue
+            self._pos = end
+            return value
+    
+    def iter_object(self):
+        """Walk through next value, which must be an object.
+        
+        Each iteration returns a key. The caller must then read the
+        value of that key, either with :meth:`read_value` or walking
+        through it, before the next iteration.
+        
+        :raise: :class:`ValueError` if next value is not an object.
+        
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError('object key expected')
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            c = self.peek()
+            self._pos += 1
+            if c == '}':
+                return
+            elif c != ',':
+                raise ValueError('expected , or }}, found {!r}'.format(c))
+    
+    def iter_array(self):
+        """Walk through next value, which must be an array.
+        
+        Each iteration returns *None*. The caller must then read the
+        element, either with :meth:`read_value` or walking through it,
+        before the next iteration.
+        
+        :raise: :class:`ValueError` if next value is not an array.
+        
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            c = self.peek()
+            self._pos += 1
+            if c == ']':
+                return
+            elif c != ',':
+                raise ValueError('expected , or ], found {!r}'.format(c))
@@ -1,6 +1,6 @@
 """Unit tests for :mod:`atlantis.helpers.json`."""
 
-from atlantis.helpers.comparable import RichComparable
+from atlantis.helpers.comparable import ContentHashable, RichComparable
 
 import unittest
 
@@ -26,5 +26,91 @@ class TestRichComparable(unittest.TestCase):
         l2 = [o2]
         self.assertEqual(l1, l2)
 
+
+
+class TestContentHashable(unittest.TestCase):
+    """Test :class:`~atlantis.helpers.comparable.ContentHashable`."""
+    
+    class A(ContentHashable):
+        def __init__(self, a, b, child=None):
+            self.a = a
+            self.b = b
+            self.child = child
+        
+        def _content(self):
+            return [self.a, self.b]
+        
+        def _content_children(self):
+            if self.child:
+                return (self.child,)
+            return ()
+    
+    def test_content_hash(self):
+        """Test :meth:`ContentHashable.content_hash` method."""
+        A = TestContentHashable.A
+        o1 = A(2, [5, 8, 12])
+        o2 = A(2, [5, 8, 12])
+        self.assertEqual(o1.content_hash(), o2.content_hash())
+        self.assertEqual(len(o1.content_hash()), 16)
+        self.assertNotEqual(o1.content_hash(), A(2, [5, 8]).content_hash())
+        
+        # Equal strings hash the same, even if they're not the same object
+        s = 'pedro'
+        o1 = A([s, s], 1)
+        o2 = A([s, ''.join(['ped', 'ro'])], 1)
+        self.assertEqual(o1.content_hash(), o2.content_hash())
+        
+        # Numbers equal in python hash the same
+        o1 = A(1, {'x': [0, 2.5]})
+        o2 = A(1.0, {'x': [False, 2.5]})
+        self.assertEqual(o1.content_hash(), o2.content_hash())
+        self.assertEqual(A(True, 1), A(1, 1.0))
+        self.assertNotEqual(A(1, [2]), A(1, (2,)))
+    
+    def test_invalidation(self):
+        """Test content hash invalidation."""
+        A = TestContentHashable.A
+        o1 = A(2, [5, 8, 12])
+        o2 = A(2, [5, 8, 12])
+        self.assertEqual(o1, o2)
+        
+        o2.a = 3
+        self.assertNotEqual(o1, o2)
+        o2.a = 2
+        self.assertEqual(o1, o2)
+        
+        o2.b.append(13)
+        self.assertEqual(o1, o2)
+        o2.invalidate_content_hash()
+        self.assertNotEqual(o1, o2)
+        
+        del o2.b
+        o2.b = [5, 8, 12]
+        self.assertEqual(o1, o2)
+    
+    def test_children(self):
+        """Test hashing of children objects."""
+        A = TestContentHashable.A
+        o1 = A(1, 2, A(3, 4))
+        o2 = A(1, 2, A(3, 4))
+        self.assertEqual(o1, o2)
+        self.assertNotEqual(o1, A(1, 2))
+        
+        o2.child.a = 5
+        self.assertNotEqual(o1, o2)
+        o1.child.a = 5
+        self.assertEqual(o1, o2)
+    
+    def test_eq(self):
+        """Test equality of different classes."""
+        A = TestContentHashable.A
+        
+        class B(A):
+            pass
+        
+        self.assertNotEqual(A(1, 2), B(1, 2))
+        self.assertNotEqual(A(1, 2), None)
+        self.assertEqual([A(1, 2)], [A(1, 2)])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,6 @@
 """Unit tests for :mod:`atlantis.helpers.hex_math`."""
 
-from atlantis.helpers.hex_math import HexMath
+from atlantis.helpers.hex_math import HexMath, hex_distance
 from atlantis.helpers.hex_math import ZOOM_25, ZOOM_50, ZOOM_100, ZOOM_200
 
 import unittest
@@ -33,6 +33,7 @@ class TestHexMath(unittest.TestCase):
         hm.set_map_rect((16, 16, 31, 31))
         
         self.assertEqual(hm._map_rect, (16, 16, 31, 31))
+        self.assertEqual(hm.get_map_rect(), (16, 16, 31, 31))
     
     def test_set_min_size(self):
         """Test HexMath.set_min_size method."""
@@ -107,6 +108,30 @@ class TestHexMath(unittest.TestCase):
                        (12, 21), (-12, 21), (-24, 0))
         
         self.assertEqual(hm.get_hex_polygon(), expectedHex)
+        
+        expectedHex = ((-24, -42), (24, -42), (48, 0),
+                       (24, 42), (-24, 42), (-48, 0))
+        
+        self.assertEqual(hm.get_hex_polygon(ZOOM_200), expectedHex)
+    
+    def test_zoom_geometry_cache(self):
+        """Test HexMath geometry is precomputed for all zoom values."""
+        
+        hm = HexMath(6, (16, 16, 31, 31), ZOOM_100)
+        polygon = hm.get_hex_polygon()
+        
+        hm.set_zoom(ZOOM_25)
+        self.assertEqual(hm.get_hex_polygon(), hm.get_hex_polygon(ZOOM_25))
+        self.assertEqual(hm.get_hex_bounding_size(),
+                         hm.get_hex_bounding_size(ZOOM_25))
+        size = hm.get_size()
+        position = hm.get_hex_position((20, 20))
+        
+        hm.set_zoom(ZOOM_100)
+        self.assertIs(hm.get_hex_polygon(), polygon)
+        self.assertEqual(hm.get_size(ZOOM_25), size)
+        self.assertEqual(hm.get_hex_position((20, 20), ZOOM_25), position)
+        self.assertEqual(hm.get_zoom(), ZOOM_100)
     
     def test_get_hex_bounding_size(self):
         """Test HexMath.get_hex_bounding_size method."""
@@ -114,6 +139,7 @@ class TestHexMath(unittest.TestCase):
         hm = HexMath(6, (16, 16, 31, 31), ZOOM_100)
         
         self.assertEqual(hm.get_hex_bounding_size(), (49, 43))
+        self.assertEqual(hm.get_hex_bounding_size(ZOOM_200), (97, 85))
     
     def test_get_scale(self):
         """Test HexMath.get_scale method."""
@@ -125,6 +151,7 @@ class TestHexMath(unittest.TestCase):
         hm.set_zoom(ZOOM_25)
         
         self.assertEqual(hm.get_scale(), .25)
+        self.assertEqual(hm.get_scale(ZOOM_50), .5)
     
     def test_point_in_hex(self):
         """Test HexMath.point_in_hex method."""
@@ -135,5 +162,23 @@ class TestHexMath(unittest.TestCase):
         self.assertFalse(hm.point_in_hex((37 + 3*36, 18 + 5*21), (20, 20)))
         
 
+class TestHexDistance(unittest.TestCase):
+    """Test hex_distance function."""
+    
+    def test_hex_distance(self):
+        """Test hex_distance function."""
+        
+        self.assertEqual(hex_distance((21, 93), (21, 93)), 0)
+        self.assertEqual(hex_distance((21, 93), (21, 91)), 1)
+        self.assertEqual(hex_distance((21, 93), (22, 92)), 1)
+        self.assertEqual(hex_distance((21, 93), (21, 97)), 2)
+        self.assertEqual(hex_distance((21, 93), (24, 90)), 3)
+        self.assertEqual(hex_distance((21, 93), (22, 100)), 4)
+        self.assertEqual(hex_distance((21, 93, None), (22, 92, None)), 1)
+        
+        self.assertEqual(hex_distance((1, 1), (30, 2)), 29)
+        self.assertEqual(hex_distance((1, 1), (30, 2), 32), 3)
+        
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,10 @@ from atlantis.helpers.json import json_load_list
 from atlantis.helpers.json import json_dump_dict
 from atlantis.helpers.json import json_load_dict
 from atlantis.helpers.json import JsonSerializable
+from atlantis.helpers.json import JsonStreamReader
+from atlantis.helpers.json import json_dumps, json_dumpb, json_loads
+from atlantis.helpers.json import get_json_backend, get_json_backends
+from atlantis.helpers.json import set_json_backend
 
 from io import StringIO
 import json
@@ -257,5 +261,143 @@ class TestFunctions(unittest.TestCase):
         returned_dict = json_load_dict(io, SerializableClass)
         self.assertEqual(returned_dict, my_dict)
 
+
+class TestJsonStreamReader(unittest.TestCase):
+    """Test JsonStreamReader class."""
+    
+    def test_read_value(self):
+        """Test JsonStreamReader.read_value method."""
+        for value in (12345678, 'a long string', [1, 2.5, None],
+                      {'a': [True, False], 'b': {'c': 'd'}}):
+            for chunk_size in (1, 3, 65536):
+                io = StringIO(' ' + json.dumps(value) + ' ')
+                reader = JsonStreamReader(io, chunk_size)
+                self.assertEqual(reader.read_value(), value)
+                self.assertEqual(reader.peek(), '')
+        
+        reader = JsonStreamReader(StringIO('[1, 2'), 2)
+        self.assertRaises(ValueError, reader.read_value)
+    
+    def test_numbers(self):
+        """Test numbers cut by the end of a chunk."""
+        numbers = [12.5, 3e5, -7, -0.25, 1.5e-3, 2E+10, 100, -4e-2]
+        document = '[12.5, 3e5, -7, -0.25, 1.5e-3, 2E+10, 100, -4e-2]'
+        for chunk_size in (1, 2, 3):
+            reader = JsonStreamReader(StringIO(document), chunk_size)
+            self.assertEqual([reader.read_value() \
+                              for dummy in reader.iter_array()], numbers)
+            reader = JsonStreamReader(StringIO(document), chunk_size)
+            self.assertEqual(reader.read_value(), numbers)
+            reader = JsonStreamReader(StringIO(' -12.5e1 '), chunk_size)
+            self.assertEqual(reader.read_value(), -125.0)
+            self.assertEqual(reader.peek(), '')
+    
+    def test_iter_methods(self):
+        """Test JsonStreamReader iter_object and iter_array methods."""
+        document = {'name': 'surface',
+                    'hexes': [{'x': 1}, {'x': 22}, {'x': 333}],
+                    'empty': [], 'none': {}}
+        for chunk_size in (1, 3, 65536):
+            reader = JsonStreamReader(StringIO(json.dumps(document)),
+                                      chunk_size)
+            read = {}
+            for key in reader.iter_object():
+                if key == 'hexes':
+                    read[key] = [reader.read_value() \
+                                 for dummy in reader.iter_array()]
+                elif key == 'empty':
+                    read[key] = list(reader.iter_array())
+                elif key == 'none':
+                    read[key] = dict([(k, reader.read_value()) \
+                                      for k in reader.iter_object()])
+                else:
+                    read[key] = reader.read_value()
+            self.assertEqual(read, document)
+        
+        reader = JsonStreamReader(StringIO('[1, 2}'))
+        with self.assertRaises(ValueError):
+            for dummy in reader.iter_array():
+                reader.read_value()
+        
+        reader = JsonStreamReader(StringIO('[1, 2]'))
+        with self.assertRaises(ValueError):
+            for dummy in reader.iter_object():
+                reader.read_value()
+
+
+class TestJsonBackends(unittest.TestCase):
+    """Test json backends."""
+    
+    document = {'name': 'Ñandú', 'location': (21, 93, None),
+                'exits': {0: [21, 91, None], 3: [21, 95, None]},
+                'wages': {'productivity': 15.6, 'amount': 3672},
+                'flags': [True, False], 'report': ['a/b "c"\n']}
+    
+    def tearDown(self):
+        set_json_backend()
+    
+    def test_set_json_backend(self):
+        """Test backend selection."""
+        backends = get_json_backends()
+        self.assertEqual(backends[-1], 'json')
+        set_json_backend()
+        self.assertEqual(get_json_backend(), backends[0])
+        set_json_backend('json')
+        self.assertEqual(get_json_backend(), 'json')
+        
+        self.assertRaises(ValueError, set_json_backend, 'pickle')
+        for name in ('orjson', 'ujson'):
+            if name not in backends:
+                self.assertRaises(ImportError, set_json_backend, name)
+    
+    def test_backends(self):
+        """Test all backends write and read the same json."""
+        expected = json.dumps(self.document)
+        expected_sorted = json.dumps(self.document, sort_keys=True)
+        loaded = json.loads(expected)
+        
+        set_json_backend('json')
+        self.assertEqual(json_dumps(self.document), expected)
+        self.assertEqual(json_dumps(self.document, sort_keys=True),
+                         expected_sorted)
+        self.assertEqual(json_dumpb(self.document), expected.encode('ascii'))
+        
+        for name in get_json_backends():
+            set_json_backend(name)
+            text = json_dumps(self.document)
+            self.assertTrue(text.isascii())
+            self.assertEqual(json.loads(text), loaded)
+            self.assertEqual(json.loads(json_dumps(self.document,
+                                                   sort_keys=True)), loaded)
+            self.assertEqual(json_dumpb(self.document), text.encode('ascii'))
+            self.assertEqual(json_dumps(['\U0001f600']), '["\\ud83d\\ude00"]')
+            self.assertEqual(json_loads(expected), loaded)
+            self.assertEqual(json_loads(expected.encode('utf-8')), loaded)
+            self.assertRaises(ValueError, json_loads, '[1, 2')
+            self.assertRaises(TypeError, json_dumps, [object()])
+    
+    def test_serializable_methods(self):
+        """Test JsonSerializable json_dumpb and json_loadb methods."""
+        
+        class SerializableClass(JsonSerializable):
+            def __init__(self, a, b):
+                self.a = a
+                self.b = b
+            
+            def json_serialize(self):
+                return {'a': self.a, 'b': self.b}
+            
+            @staticmethod
+            def json_deserialize(json_object):
+                return SerializableClass(**json_object)
+        
+        for name in get_json_backends():
+            set_json_backend(name)
+            ob = SerializableClass('pedro', [1, 2])
+            data = ob.json_dumpb()
+            self.assertEqual(json.loads(data), {'a': 'pedro', 'b': [1, 2]})
+            ob = SerializableClass.json_loadb(data)
+            self.assertEqual((ob.a, ob.b), ('pedro', [1, 2]))
+
 if __name__ == '__main__':
     unittest.main()
@@ -33,7 +33,7 @@ import wx.lib.newevent
 from atlantis.wxgui import resources
 from atlantis.helpers.hex_math import HexMath
 
-from atlantis.helpers.hex_math import ZOOM_OUT, ZOOM_IN
+from atlantis.helpers.hex_math import ZOOM_OUT, ZOOM_IN, ZOOM_50
 
 HexSelected, EVT_HEX_SELECTED = wx.lib.newevent.NewCommandEvent()
 
@@ -66,6 +66,40 @@ class HexMapDataLabel():
         self.colour = colour
         
 
+class HexMapDrawList():
+    """Placeholder for a whole map ready to be drawn.
+    
+    Elements are grouped by the brush, bitmap or label used to draw
+    them, and positions are already in pixels, so
+    :class:`HexMapWindow` can draw the map in a few batched calls.
+    
+    Public attributes in :class:`HexMapDrawList` are:
+    
+    .. attribute:: polygons
+       List of (*brush*, *polygons*) tuples, in drawing order. *brush*
+       is a :class:`wx.Brush` object, and *polygons* a list of point
+       lists to be drawn with it.
+    
+    .. attribute:: bitmaps
+       List of (*bitmap*, *positions*) tuples. *bitmap* is a
+       :class:`wx.Bitmap` object, and *positions* a list of (x, y)
+       upper left corners where it's drawn.
+    
+    .. attribute:: labels
+       List of (*label*, *position*) tuples. *label* is a
+       :class:`HexMapDataLabel` object and *position* the (x, y) center
+       of the hexagon it belongs to.
+    
+    """
+    
+    def __init__(self, polygons=None, bitmaps=None, labels=None):
+        """Class constructor."""
+        
+        self.polygons = polygons if polygons is not None else []
+        self.bitmaps = bitmaps if bitmaps is not None else []
+        self.labels = labels if labels is not None else []
+
+
 class HexMapDataHex():
     """Interface to hold data for an :class:`HexMapWindow` hex.
     
@@ -142,6 +176,38 @@ class HexMapData():
         """
         raise NotImplementedError('method must be defined')
     
+    def get_draw_list(self):
+        """Return the map ready to be drawn.
+        
+        Implementing this method is optional. By default it returns
+        *None*, and :class:`HexMapWindow` draws the map hexagon by
+        hexagon, iterating over the :class:`HexMapData` object.
+        
+        :return: an :class:`HexMapDrawList` object for the current zoom,
+            or *None*.
+        
+        """
+        return None
+    
+    def get_terrain_polygons(self, zoom):
+        """Return terrain polygons of the map at a zoom level.
+        
+        Only terrain polygons are needed to draw the map as an overview,
+        so no bitmap nor label has to be built for them. Current zoom of
+        :class:`~atlantis.helpers.hex_math.HexMath` object isn't changed.
+        
+        Implementing this method is optional. By default it returns
+        *None*, and :class:`HexMapWindow` draws the map with full detail
+        at every zoom level.
+        
+        :param zoom: zoom level of the polygons.
+        
+        :return: an :class:`HexMapDrawList` object with only polygons,
+            or *None*.
+        
+        """
+        return None
+    
     def get_rect(self):
         """Get map rect.
         
@@ -200,6 +266,14 @@ class HexMapWindow(wx.Window):
         self._dragging = False
         self._view_start = (0, 0)
         self._buffer = None
+        
+        # Label layouts keyed on (text, font id, zoom)
+        self._label_layouts = dict()
+        
+        # Level of detail: zoom values up to _overview_zoom are drawn
+        # from a terrain overview bitmap
+        self._overview_zoom = ZOOM_50
+        self._overviews = dict()
 
         self.Bind(wx.EVT_PAINT, self._OnPaint)
         self.Bind(wx.EVT_SIZE, self._OnSize)
@@ -227,10 +301,31 @@ class HexMapWindow(wx.Window):
         """
         self._map_data = map_data
         self._map_data.use_hex_math(self._hex_math)
+        self._label_layouts = dict()
+        self._overviews = dict()
         self._hex_math.set_map_rect(map_data.get_rect())
         self.zoom_and_center()
     
-    # Zoom    
+    # Zoom
+    def set_overview_zoom(self, zoom):
+        """Set the zoom below which the map is drawn as an overview.
+        
+        At zoom values up to *zoom* hexagons are only a few pixels wide,
+        so the map is drawn as a precomputed terrain colour bitmap, with
+        no hexagon outlines, icons nor labels. Full detail is drawn at
+        higher zoom values.
+        
+        Only :class:`HexMapData` objects implementing
+        :meth:`HexMapData.get_terrain_polygons` are drawn as an overview.
+        
+        :param zoom: higher zoom value drawn as an overview, or *None*
+            to always draw full detail.
+        
+        """
+        self._overview_zoom = zoom
+        self._overviews = dict()
+        self._redraw()
+    
     def zoom_and_center(self, zoom=None, centered_pos=None, centered_hex=None):
         """Set map zoom.
         
@@ -240,8 +335,9 @@ class HexMapWindow(wx.Window):
         """
         if zoom is None:
             zoom = self._hex_math.get_zoom()
-        else:
+        elif zoom != self._hex_math.get_zoom():
             self._hex_math.set_zoom(zoom)
+            self._label_layouts = dict()
         
         if not centered_pos:
             sx, sy = self.GetClientSize()
@@ -393,14 +489,92 @@ class HexMapWindow(wx.Window):
 
     def _draw_map(self, dc):
         if self._map_data:
-            for h in self._map_data:
-                self._draw_hex(dc, h)
-            for h in self._map_data:
-                self._draw_hex_labels(dc, h)
+            overview = None
+            if self._overview_zoom is not None and \
+               self._hex_math.get_zoom() <= self._overview_zoom:
+                overview = self._get_overview()
+            
+            if overview:
+                dc.DrawBitmap(overview, 0, 0)
+            else:
+                draw_list = self._map_data.get_draw_list()
+                if draw_list is not None:
+                    self._draw_list(dc, draw_list)
+                else:
+                    for h in self._map_data:
+                        self._draw_hex(dc, h)
+                    for h in self._map_data:
+                        self._draw_hex_labels(dc, h)
         
         self._draw_selected_hex(dc)
         del dc
     
+    def _get_overview(self):
+        """Return the overview bitmap for current zoom.
+        
+        The overview is rendered once at the overview zoom, drawing only
+        terrain polygons, and scaled down for smaller zoom values.
+        Bitmaps are cached while the terrain polygons, which change with
+        level and map data, stay the same.
+        
+        :return: a :class:`wx.Bitmap` with the whole level, to be drawn
+            at logical position (0, 0), or *None* if map data has no
+            terrain polygons.
+        
+        """
+        base_list = self._map_data.get_terrain_polygons(self._overview_zoom)
+        if base_list is None:
+            return None
+        
+        zoom = self._hex_math.get_zoom()
+        try:
+            cached_list, bitmap = self._overviews[zoom]
+            if cached_list is base_list:
+                return bitmap
+        except KeyError:
+            pass
+        
+        try:
+            cached_list, base = self._overviews[self._overview_zoom]
+            if cached_list is not base_list:
+                raise KeyError
+        except KeyError:
+            width, height = self._hex_math.get_size(self._overview_zoom)
+            base = wx.Bitmap.FromRGBA(int(width) + 1, int(height) + 1,
+                                      0xff, 0xff, 0xff, wx.IMAGE_ALPHA_OPAQUE)
+            mdc = wx.MemoryDC(base)
+            for brush, polygons in base_list.polygons:
+                mdc.DrawPolygonList(polygons, wx.TRANSPARENT_PEN, brush)
+            mdc.SelectObject(wx.NullBitmap)
+            self._overviews[self._overview_zoom] = (base_list, base)
+        
+        if zoom == self._overview_zoom:
+            bitmap = base
+        else:
+            width, height = self._hex_math.get_size()
+            bitmap = base.ConvertToImage().Scale(
+                    int(width) + 1, int(height) + 1,
+                    wx.IMAGE_QUALITY_NORMAL).ConvertToBitmap()
+        self._overviews[zoom] = (base_list, bitmap)
+        return bitmap
+    
+    def _draw_list(self, dc, draw_list):
+        """Draw a :class:`HexMapDrawList` with batched calls."""
+        for brush, polygons in draw_list.polygons:
+            dc.DrawPolygonList(polygons, self._thin_pen, brush)
+        
+        for bitmap, positions in draw_list.bitmaps:
+            for x, y in positions:
+                dc.DrawBitmap(bitmap, x, y)
+        
+        for label, (xoffset, yoffset) in draw_list.labels:
+            xlabel, ylabel = self._get_label_layout(dc, label)
+            if label.font:
+                dc.SetFont(label.font)
+            if label.colour:
+                dc.SetTextForeground(label.colour)
+            dc.DrawText(label.label, xoffset + xlabel, yoffset + ylabel)
+    
     def _draw_hex(self, dc, hexagon):
         xoffset, yoffset = self._hex_math.get_hex_position(
                 hexagon.get_location())
@@ -419,15 +593,42 @@ class HexMapWindow(wx.Window):
         xoffset, yoffset = self._hex_math.get_hex_position(
                 hexagon.get_location())
         for label in hexagon.get_labels():
-            width, height = dc.GetFullTextExtent(label.label, label.font)[:2]
-            xlabel, ylabel = label.offset
+            xlabel, ylabel = self._get_label_layout(dc, label)
             if label.font:
                 dc.SetFont(label.font)
             if label.colour:
                 dc.SetTextForeground(label.colour)
-            dc.DrawText(label.label,
-                        xoffset + xlabel - width / 2,
-                        yoffset + ylabel - height / 2)
+            dc.DrawText(label.label, xoffset + xlabel, yoffset + ylabel)
+    
+    def _get_label_layout(self, dc, label):
+        """Return label position relative to the hexagon center.
+        
+        Text extents are only measured the first time a label is drawn
+        with a font at a zoom level. Layouts are forgotten when zoom or
+        map data change.
+        
+        :param dc: :class:`wx.DC` the label is drawn on.
+        :param label: :class:`HexMapDataLabel` object.
+        
+        :return: an (x, y) tuple with the offset of the label top left
+            corner from the hexagon center.
+        
+        """
+        key = (label.label, id(label.font), self._hex_math.get_zoom())
+        try:
+            font, xlabel, ylabel = self._label_layouts[key]
+            # Font id could have been reused by a new font object
+            if font is label.font:
+                return (xlabel, ylabel)
+        except KeyError:
+            pass
+        
+        width, height = dc.GetFullTextExtent(label.label, label.font)[:2]
+        xlabel, ylabel = label.offset
+        xlabel -= width / 2
+        ylabel -= height / 2
+        self._label_layouts[key] = (label.font, xlabel, ylabel)
+        return (xlabel, ylabel)
 
     
     def _draw_selected_hex(self, dc):
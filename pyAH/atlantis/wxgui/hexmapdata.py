@@ -16,8 +16,10 @@ Classes defined here are :class:`MapDataHex`, which implements
 """
 
 from atlantis.gamedata.map import HEX_EXITS
+from atlantis.helpers.hex_math import ZOOM_VALUES
 
-from atlantis.wxgui.hexmap import HexMapDataLabel, HexMapDataHex, HexMapData
+from atlantis.wxgui.hexmap import HexMapDataLabel, HexMapDrawList, \
+    HexMapDataHex, HexMapData
 
 import wx
 import os.path
@@ -80,13 +82,11 @@ class MapDataHex(HexMapDataHex):
         
         labels = []
         
-        if self._map_hex.region.town:
-            font_data = self._parent.get_town_label_data(
-                    self._map_hex.region.town['type'])
-            if font_data:
-                offset, font, colour = font_data 
-                labels.append(HexMapDataLabel(self._map_hex.region.town['name'],
-                                              offset, font, colour))
+        town = self._map_hex.region.town
+        if town:
+            label = self._parent.get_town_label(town['name'], town['type'])
+            if label:
+                labels.append(label)
         
         return labels
             
@@ -120,6 +120,10 @@ class MapData(HexMapData):
         self._theme = None
         self._map_data = None
         self._current_level = None
+        self._zoom_cache = dict()
+        self._labels = dict()
+        self._level_draw_data = dict()
+        self._draw_lists = dict()
     
     def __iter__(self):
         """Return an iterator on :class:`HexMapData` instance.
@@ -148,36 +152,73 @@ class MapData(HexMapData):
         have to be shown (in case some of them are only shown in inner
         zoom values) and to resize bitmaps if needed.
         
+        Bitmaps and labels for all zoom values are computed here, so
+        further zoom changes don't need to rescale any image.
+        
         :param hex_math: :class:`~atlantis.helpers.hex_math.HexMath`
             object.
         
         """
         self._hex_math = hex_math
+        self._zoom = None
+        self._zoom_cache = dict()
+        self._labels = dict()
+        self._draw_lists = dict()
+        if self._theme:
+            for zoom in range(ZOOM_VALUES):
+                self._build_zoom_cache(zoom)
         self._redim_bitmaps()
+    
+    def _build_zoom_cache(self, zoom):
+        """Scale bitmaps and fonts to a zoom level and cache them.
+        
+        :param zoom: zoom level.
+        
+        :return: a tuple with town bitmaps, town labels and structure
+            bitmaps dictionaries for that zoom level.
+        
+        """
+        width, height = self._hex_math.get_hex_bounding_size(zoom)
+        scale = self._hex_math.get_scale(zoom)
+        
+        town_bitmaps = dict()
+        for town, image in self._town_images.items():
+            im = image.Scale(width, height, wx.IMAGE_QUALITY_HIGH)
+            town_bitmaps[town] = im.ConvertToBitmap()
+        
+        town_labels = dict()
+        for town, label in self._town_labels.items():
+            town_labels[town] = {
+                    'offset': tuple([v * scale for v in label['base_offset']]),
+                    'font': wx.Font(wx.FontInfo(label['font_size'] * scale).
+                                    FaceName(label['font_face'])),
+                    'colour': label['colour']}
+        
+        structure_bitmaps = dict()
+        for structure_type, image in self._structure_images.items():
+            im = image.Scale(width, height, wx.IMAGE_QUALITY_HIGH)
+            structure_bitmaps[structure_type] = im.ConvertToBitmap()
+        
+        self._zoom_cache[zoom] = (town_bitmaps, town_labels,
+                                  structure_bitmaps)
+        return self._zoom_cache[zoom]
         
     def _redim_bitmaps(self):
-        """Dimensionate bitmaps to current zoom level."""
-        if self._zoom is None or self._zoom != self._hex_math.get_zoom():
-            self._town_bitmaps = dict()
-            self._structure_bitmaps = dict()
-            width, height = self._hex_math.get_hex_bounding_size()
-            scale = self._hex_math.get_scale()
-            
-            for town, image in self._town_images.items():
-                im = image.Scale(width, height, wx.IMAGE_QUALITY_HIGH)
-                self._town_bitmaps[town] = im.ConvertToBitmap()
-            
-            for town, label in self._town_labels.items():
-                self._town_labels[town]['offset'] = tuple(
-                        [ v * scale \
-                          for v in self._town_labels[town]['base_offset'] ])
-                self._town_labels[town]['font'] = wx.Font(
-                        wx.FontInfo(label['font_size'] * scale).
-                        FaceName(label['font_face']))
-            
-            for structure_type, image in self._structure_images.items():
-                im = image.Scale(width, height, wx.IMAGE_QUALITY_HIGH)
-                self._structure_bitmaps[structure_type] = im.ConvertToBitmap()
+        """Dimensionate bitmaps to current zoom level.
+        
+        Scaled bitmaps are taken from the zoom cache, so they're only
+        computed the first time a zoom level is used with a theme.
+        
+        """
+        zoom = self._hex_math.get_zoom()
+        if self._zoom is None or self._zoom != zoom:
+            try:
+                cached = self._zoom_cache[zoom]
+            except KeyError:
+                cached = self._build_zoom_cache(zoom)
+            self._town_bitmaps, self._town_zoom_labels, \
+                self._structure_bitmaps = cached
+            self._zoom = zoom
     
     def get_rect(self):
         """Get map rect.
@@ -250,6 +291,7 @@ class MapData(HexMapData):
                  for (town, town_data) in theme._data['towns'].items()])
         self._town_bitmaps = None
         
+        self._town_zoom_labels = None
         self._town_labels = dict()
         for town, town_data in theme._data['towns'].items():
             td = dict()
@@ -268,6 +310,12 @@ class MapData(HexMapData):
                     if structure_data['bitmap'] is not None])
         self._structure_bitmaps = None
         
+        # Scaled bitmaps belong to the theme
+        self._zoom = None
+        self._zoom_cache = dict()
+        self._labels = dict()
+        self._draw_lists = dict()
+        
     
     def use_map(self, map_data):
         """Set map data used for this map
@@ -293,6 +341,10 @@ class MapData(HexMapData):
         
         """
         self._map_data = map_data
+        self._draw_lists = dict()
+        self._level_draw_data = dict(
+                [(name, self._build_level_draw_data(level)) \
+                 for name, level in map_data.levels.items()])
             
         if not self._current_level:
             levels = list(map_data.levels.keys())
@@ -303,6 +355,172 @@ class MapData(HexMapData):
             else:
                 self._current_level = None
     
+    @staticmethod
+    def _build_level_draw_data(level):
+        """Group level hexes by what they're drawn with.
+        
+        Groups don't depend on theme nor zoom: hexes are grouped by
+        their terrain and status, by town and structure types for
+        bitmaps, and town labels are listed. Pixel positions are
+        computed by :meth:`get_draw_list` from these groups.
+        
+        :param level: :class:`~atlantis.gamedata.map.MapLevel` object.
+        
+        :return: a tuple with three elements: a dictionary of locations
+            keyed by (*terrain*, *status*), a dictionary of locations
+            keyed by (*kind*, *type*), being *kind* either ``town`` or
+            ``structure``, and a list of (*name*, *town type*,
+            *location*) tuples.
+        
+        """
+        polygons = dict()
+        bitmaps = dict()
+        labels = []
+        for mh in level:
+            region = mh.region
+            location = tuple(region.location[:2])
+            polygons.setdefault((region.terrain, mh.status),
+                                []).append(location)
+            if region.town:
+                bitmaps.setdefault(('town', region.town['type']),
+                                   []).append(location)
+                labels.append((region.town['name'], region.town['type'],
+                               location))
+            try:
+                for st in region.structures.values():
+                    bitmaps.setdefault(
+                            ('structure', st.structure_type.lower()),
+                            []).append(location)
+            except AttributeError:
+                pass
+        return (polygons, bitmaps, labels)
+    
+    def get_draw_list(self):
+        """Return current level ready to be drawn.
+        
+        This method implements :meth:`!get_draw_list` in
+        :class:`atlantis.wxgui.hexmap.HexMapData` interface.
+        
+        Draw lists are built from the groups computed by
+        :meth:`use_map` the first time a level is shown at a zoom
+        level, and then reused. Zoom levels drawn as an overview by
+        :class:`~atlantis.wxgui.hexmap.HexMapWindow` only use
+        :meth:`get_terrain_polygons`, so bitmaps and labels are never
+        built for them.
+        
+        :return: an :class:`~atlantis.wxgui.hexmap.HexMapDrawList`
+            object, or *None* if there's nothing to draw.
+        
+        """
+        if not (self._map_data and self._current_level and self._theme):
+            return None
+        
+        key = (self._current_level.name, self._hex_math.get_zoom(),
+               tuple(self._hex_math.get_map_rect()))
+        try:
+            return self._draw_lists[key]
+        except KeyError:
+            pass
+        
+        try:
+            polygon_groups, bitmap_groups, label_list = \
+                self._level_draw_data[self._current_level.name]
+        except KeyError:
+            polygon_groups, bitmap_groups, label_list = \
+                self._build_level_draw_data(self._current_level)
+        
+        position = self._hex_math.get_hex_position
+        
+        bitmaps = []
+        for (kind, bitmap_type), locations in bitmap_groups.items():
+            if kind == 'town':
+                bm = self.get_town_bitmap(bitmap_type)
+            else:
+                bm = self.get_structure_bitmap(bitmap_type)
+            if not bm:
+                continue
+            w, h = bm.GetWidth() / 2, bm.GetHeight() / 2
+            bitmaps.append((bm, [(x - w, y - h) for (x, y) in \
+                                 [position(loc) for loc in locations]]))
+        
+        labels = []
+        for name, town, location in label_list:
+            label = self.get_town_label(name, town)
+            if label:
+                labels.append((label, position(location)))
+        
+        draw_list = HexMapDrawList(self._build_polygons(polygon_groups),
+                                   bitmaps, labels)
+        self._draw_lists[key] = draw_list
+        return draw_list
+    
+    def get_terrain_polygons(self, zoom):
+        """Return terrain polygons of current level at a zoom level.
+        
+        This method implements :meth:`!get_terrain_polygons` in
+        :class:`atlantis.wxgui.hexmap.HexMapData` interface.
+        
+        No bitmap nor label is built, and current zoom of the
+        :class:`~atlantis.helpers.hex_math.HexMath` object isn't
+        changed. Polygons are cached as draw lists are.
+        
+        :param zoom: zoom level of the polygons.
+        
+        :return: an :class:`~atlantis.wxgui.hexmap.HexMapDrawList`
+            object with only polygons, or *None* if there's nothing to
+            draw.
+        
+        """
+        if not (self._map_data and self._current_level and self._theme):
+            return None
+        
+        key = ('terrain', self._current_level.name, zoom,
+               tuple(self._hex_math.get_map_rect()))
+        try:
+            return self._draw_lists[key]
+        except KeyError:
+            pass
+        
+        try:
+            polygon_groups = \
+                self._level_draw_data[self._current_level.name][0]
+        except KeyError:
+            polygon_groups = \
+                self._build_level_draw_data(self._current_level)[0]
+        
+        draw_list = HexMapDrawList(self._build_polygons(polygon_groups, zoom))
+        self._draw_lists[key] = draw_list
+        return draw_list
+    
+    def _build_polygons(self, polygon_groups, zoom=None):
+        """Return hexagon polygons grouped by brush.
+        
+        :param polygon_groups: dictionary of locations keyed by
+            (*terrain*, *status*), as built by
+            :meth:`_build_level_draw_data`.
+        :param zoom: zoom level of the polygons. If *None* current zoom
+            is used.
+        
+        :return: list of (*brush*, *polygons*) tuples, in drawing
+            order.
+        
+        """
+        hexagon = self._hex_math.get_hex_polygon(zoom)
+        position = self._hex_math.get_hex_position
+        
+        # Solid brushes first, as hatched ones are drawn on top of them
+        solid = []
+        hatched = []
+        for (terrain, status), locations in polygon_groups.items():
+            centers = [position(loc, zoom) for loc in locations]
+            polygons = [[(x + px, y + py) for (px, py) in hexagon] \
+                        for (x, y) in centers]
+            brushes = self.get_brushes(terrain, status)
+            solid.append((brushes[0], polygons))
+            for br in brushes[1:]:
+                hatched.append((br, polygons))
+        return solid + hatched
+    
     def current_level(self, level_name=None):
         """Set current level to be shown, or return current level.
         
@@ -391,11 +609,38 @@ class MapData(HexMapData):
         """
         try:
             self._redim_bitmaps()
-            td = self._town_labels[town]
+            td = self._town_zoom_labels[town]
             return (td['offset'], td['font'], td['colour'])
         except (KeyError, TypeError):
             return None
         
+    def get_town_label(self, name, town):
+        """Return the label used to show a town name.
+        
+        Labels are built once per zoom level and kept while theme and
+        hex math stay the same, so they're reused by every redraw and
+        zoom change.
+        
+        :param name: name of the town.
+        :param town: town type. Valid values are ``village``, ``town``
+            and ``city``.
+        
+        :return: a :class:`~atlantis.wxgui.hexmap.HexMapDataLabel`
+            object, or *None* if no label has to be shown.
+        
+        """
+        font_data = self.get_town_label_data(town)
+        if not font_data:
+            return None
+        key = (name, town, self._zoom)
+        try:
+            return self._labels[key]
+        except KeyError:
+            offset, font, colour = font_data
+            label = HexMapDataLabel(name, offset, font, colour)
+            self._labels[key] = label
+            return label
+        
     def get_structure_bitmap(self, structure_type):
         """Return the bitmap used to show a structure type.
         
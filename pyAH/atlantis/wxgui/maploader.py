@@ -0,0 +1,177 @@
+"""Load reports into map data without freezing the GUI.
+
+Parsing a report and building the map data of a large game can take
+several seconds. This module defines :class:`MapLoader`, a worker thread
+that reads a report, feeds it into a
+:class:`~atlantis.gamedata.gamedata.GameData` object and prepares a
+:class:`~atlantis.wxgui.hexmapdata.MapData` object, while the GUI
+thread keeps handling events.
+
+Only work that doesn't touch wx GDI objects is done in the worker
+thread. Finished data is handed back to the GUI thread with
+:func:`wx.CallAfter`, where the theme is applied.
+
+:mod:`atlantis.wxgui.maploader` defines the following events, which are
+posted to the handler given to :class:`MapLoader`.
+
+.. attribute:: LoadProgress
+
+   Loading is progressing. Event has *stage*, with values ``parse``
+   and ``map``, and *progress*, a value between 0 and 1 of the
+   current stage completion. Its event binder is ``EVT_LOAD_PROGRESS``.
+
+.. attribute:: LoadDone
+
+   Loading has finished. Event has *game_data* and *map_data*
+   attributes with loaded data, and *error*, which is *None* unless
+   loading failed, in which case it's the exception raised and both
+   data attributes are *None*. Its event binder is ``EVT_LOAD_DONE``.
+
+"""
+
+import wx
+import wx.lib.newevent
+
+from atlantis.gamedata.gamedata import GameData
+from atlantis.parsers.reportparser import ReportParser
+from atlantis.wxgui.hexmapdata import MapData
+
+import os
+import threading
+
+LoadProgress, EVT_LOAD_PROGRESS = wx.lib.newevent.NewEvent()
+LoadDone, EVT_LOAD_DONE = wx.lib.newevent.NewEvent()
+
+STAGE_PARSE = 'parse'
+STAGE_MAP = 'map'
+
+
+class _ProgressFile():
+    """File wrapper that reports how much of the file has been read.
+    
+    Only :meth:`readline`, the method used by
+    :class:`~atlantis.parsers.reportparser.ReportReader`, is
+    implemented.
+    
+    """
+    
+    def __init__(self, f, size, callback, cancelled, step=.01):
+        """Create a wrapper on an open file.
+        
+        :param f: file object open in text mode.
+        :param size: size of the file in bytes.
+        :param callback: function called with the fraction of the file
+            read so far.
+        :param cancelled: :class:`threading.Event` set when reading
+            has to be stopped.
+        :param step: minimum fraction of the file read between
+            consecutive calls to *callback*.
+        
+        """
+        self._file = f
+        self._size = max(size, 1)
+        self._callback = callback
+        self._cancelled = cancelled
+        self._step = step
+        self._reported = 0
+    
+    def readline(self):
+        """Read a line, reporting progress if needed.
+        
+        :return: next line, or an empty string if at the end of the
+            file or loading has been cancelled.
+        
+        """
+        if self._cancelled.is_set():
+            return ''
+        line = self._file.readline()
+        # Size is given in bytes, so progress is told by the position of
+        # the binary buffer, not by the characters read
+        progress = min(self._file.buffer.tell() / self._size, 1)
+        if progress - self._reported >= self._step:
+            self._reported = progress
+            self._callback(progress)
+        return line
+
+
+class MapLoader(threading.Thread):
+    """Worker thread loading a report.
+    
+    Usage is::
+    
+        frame.Bind(EVT_LOAD_PROGRESS, on_progress)
+        frame.Bind(EVT_LOAD_DONE, on_done)
+        MapLoader(frame, 'report.3', rules, theme).start()
+    
+    The handler receives :data:`LoadProgress` events while the report
+    is being loaded, and a single :data:`LoadDone` event at the end,
+    unless loading is cancelled with :meth:`cancel`.
+    
+    """
+    
+    def __init__(self, handler, file_name, rules, theme):
+        """Create a :class:`MapLoader`.
+        
+        :param handler: :class:`wx.EvtHandler` (usually a window)
+            receiving loading events.
+        :param file_name: name of the report file.
+        :param rules: :class:`~atlantis.gamedata.rules.AtlantisRules`
+            object used to read the report.
+        :param theme: :class:`~atlantis.gamedata.theme.Theme` object
+            applied to the map data.
+        
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self._handler = handler
+        self._file_name = file_name
+        self._rules = rules
+        self._theme = theme
+        self._cancelled = threading.Event()
+    
+    def cancel(self):
+        """Stop loading.
+        
+        No :data:`LoadDone` event will be posted after cancelling.
+        
+        """
+        self._cancelled.set()
+    
+    def run(self):
+        """Load the report. Runs in the worker thread."""
+        try:
+            game_data = GameData(self._rules)
+            parser = ReportParser(game_data)
+            size = os.path.getsize(self._file_name)
+            with open(self._file_name) as f:
+                parser.parse(_ProgressFile(
+                        f, size,
+                        lambda p: self._post_progress(STAGE_PARSE, p),
+                        self._cancelled))
+            if self._cancelled.is_set():
+                return
+            
+            self._post_progress(STAGE_MAP, 0)
+            map_data = MapData()
+            map_data.use_map(game_data.map)
+            self._post_progress(STAGE_MAP, 1)
+        except Exception as e:
+            if not self._cancelled.is_set():
+                wx.CallAfter(self._done, None, None, e)
+        else:
+            if not self._cancelled.is_set():
+                wx.CallAfter(self._done, game_data, map_data, None)
+    
+    def _post_progress(self, stage, progress):
+        """Post a :data:`LoadProgress` event to the handler."""
+        wx.PostEvent(self._handler,
+                     LoadProgress(stage=stage, progress=progress))
+    
+    def _done(self, game_data, map_data, error):
+        """Finish loading. Runs in the GUI thread."""
+        if self._cancelled.is_set():
+            return
+        if map_data:
+            map_data.use_theme(self._theme)
+        wx.PostEvent(self._handler, LoadDone(game_data=game_data,
+                                             map_data=map_data,
+                                             error=error))